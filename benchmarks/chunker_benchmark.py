@@ -0,0 +1,90 @@
+"""
+Text Chunker Benchmark - Splits 10k-word answers the way /ask long responses are split
+
+Run from the repository root:
+    python -m benchmarks.chunker_benchmark
+"""
+
+import random
+import time
+
+from bot.utils.text_chunker import chunk_text
+
+MAX_DESCRIPTION_LENGTH = 3800
+WORDS = ("the model returns a long answer with lists code and plenty of detail "
+         "about python async discord embeds limits and rate buckets").split()
+
+
+def build_answer(word_count, seed=0):
+    """Generate a long answer with sentences, paragraphs and an occasional code block"""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(word_count):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.07:
+            word += '.'
+        elif roll < 0.08:
+            word += '?'
+        elif roll < 0.09:
+            word += '.\n\n'
+        elif roll < 0.0915:
+            lines = '\n'.join(f"    total += {n}" for n in range(rng.randint(5, 400)))
+            word += f"\n```python\ndef example():\n    total = 0\n{lines}\n    return total\n```\n"
+        parts.append(word)
+    return ' '.join(parts)
+
+
+def legacy_chunk(response, max_description_length=MAX_DESCRIPTION_LENGTH):
+    """Sentence splitting from the original create_ask_embeds_multiple"""
+    chunks = []
+    current_chunk = ""
+    sentences = response.split('. ')
+    
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if sentence != sentences[-1]:
+            sentence += '. '
+        if len(current_chunk + sentence) > max_description_length:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+                current_chunk = sentence
+            else:
+                chunks.append(sentence[:max_description_length])
+                current_chunk = sentence[max_description_length:]
+        else:
+            current_chunk += sentence
+    
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def measure(func, texts, rounds):
+    """Return average milliseconds per call of func over texts"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text, MAX_DESCRIPTION_LENGTH)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(texts)) * 1000
+
+
+def main(rounds: int = 20):
+    texts = [build_answer(10_000, seed) for seed in range(5)]
+    
+    results = {
+        'legacy sentence split': measure(legacy_chunk, texts, rounds),
+        'boundary chunker': measure(chunk_text, texts, rounds),
+    }
+    
+    average_chars = sum(len(text) for text in texts) // len(texts)
+    print(f"Chunking 10k-word answers (~{average_chars} chars) x {rounds} rounds")
+    for name, millis in results.items():
+        print(f"  {name:<22} {millis:>8.2f} ms/answer")
+
+
+if __name__ == "__main__":
+    main()
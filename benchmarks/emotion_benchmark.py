@@ -0,0 +1,125 @@
+"""
+Emotion Detector Benchmark - Measures detection throughput over typical bot responses
+
+Run from the repository root:
+    python -m benchmarks.emotion_benchmark
+"""
+
+import re
+import time
+
+from bot.utils.emotion_detector import EmotionDetector
+
+# Responses in the style Chatore actually sends (short, casual, English + Hinglish)
+CORPUS = [
+    "lol that's actually a solid plan, go for it 🎮",
+    "Bro what the hell is this?! I'm so angry right now!!",
+    "Arrey yaar, kya baat hai! Aaj toh maza aa gaya 😄",
+    "I'm sorry... that really hurts. Feels bad man :(",
+    "Honestly? Minecraft with shaders is peak chill vibes.",
+    "WTF is wrong with this game, I'm fed up with these lag spikes!!!",
+    "rip bhai, sed lyf... big sad 😢",
+    "Hello! Downloading the update now, should be done soon.",
+    "Nah that's stupid, I hate when people spoil movies. Damn.",
+    "Pizza at 2am hits different, no cap 🍕",
+    "Deeply sad to hear that... I'm heartbroken for you.",
+    "Bhai padhle, exams aa rahe hain, bas kar gaming ab 📚",
+    "That's so cool! Python decorators are basically function wrappers.",
+    "Ugh, I'm really annoyed, this bug is driving me mad!!",
+    "My bad, I messed that up. Sorry, I regret saying that...",
+    "Sounds like a trip! Send pics when you're back ✈️",
+]
+
+
+# Keyword lists and regex patterns used by the substring-loop implementation
+LEGACY_ANGER_KEYWORDS = [
+    'extremely angry', 'really angry', 'very angry', 'so angry',
+    'angry', 'mad', 'furious', 'pissed', 'annoyed', 'irritated', 'frustrated',
+    'rage', 'livid', 'outraged', 'infuriated', 'enraged', 'irate',
+    'wtf', 'damn', 'hell', 'shit', 'fuck', 'bloody', 'bastard',
+    'stupid', 'idiot', 'moron', 'pathetic',
+    'hate', 'disgusted', 'sick of', 'fed up', 'can\'t stand',
+    'bsdk', 'chutiya', 'madarchod', 'bhenchod', 'saala', 'kamina'
+]
+
+LEGACY_SADNESS_KEYWORDS = [
+    'very sad', 'deeply sad', 'extremely sad', 'really sad', 'so sad',
+    'sad', 'depressed', 'heartbroken', 'crying', 'tears', 'miserable',
+    'lonely', 'empty', 'broken', 'devastated', 'crushed', 'hopeless',
+    'despair', 'grief', 'sorry', 'apologize', 'regret', 'mistake',
+    'failed', 'failure', 'down', 'blue', 'melancholy', 'gloomy',
+    'dejected', 'sed', 'rip', 'oof', 'feels bad', 'big sad', 'depression',
+    'hurt', 'disappointed', 'upset'
+]
+
+LEGACY_ANGER_PATTERNS = [
+    r'\b(what|why) the (hell|fuck|damn)\b',
+    r'\b(go to hell|fuck off|shut up|piss off)\b',
+    r'\b(i hate|i\'m done|screw this|this sucks)\b',
+    r'[!]{2,}',
+    r'[A-Z]{3,}',
+]
+
+LEGACY_SADNESS_PATTERNS = [
+    r'\b(i\'m sorry|so sorry|my bad|forgive me)\b',
+    r'\b(feel bad|feels bad|feeling down)\b',
+    r'\b(no hope|give up|can\'t do)\b',
+    r'[.]{3,}',
+    r':\(',
+]
+
+
+def legacy_detect_emotion(text):
+    """Substring-loop detection as it worked before the token index"""
+    text_lower = text.lower()
+    
+    anger_score = 0
+    for keyword in LEGACY_ANGER_KEYWORDS:
+        if keyword in text_lower:
+            anger_score += 1
+    for pattern in LEGACY_ANGER_PATTERNS:
+        if re.search(pattern, text_lower, re.IGNORECASE):
+            anger_score += 1
+    
+    sadness_score = 0
+    for keyword in LEGACY_SADNESS_KEYWORDS:
+        if keyword in text_lower:
+            sadness_score += 1
+    for pattern in LEGACY_SADNESS_PATTERNS:
+        if re.search(pattern, text_lower, re.IGNORECASE):
+            sadness_score += 1
+    
+    if anger_score > sadness_score and anger_score >= 2:
+        return 'angry'
+    elif sadness_score > anger_score and sadness_score >= 2:
+        return 'sad'
+    elif anger_score == sadness_score and anger_score >= 2:
+        return 'angry'
+    return 'neutral'
+
+
+def measure(func, texts, rounds):
+    """Return throughput in texts/second for func over texts"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return (rounds * len(texts)) / elapsed
+
+
+def main(rounds: int = 2000):
+    detector = EmotionDetector()
+    
+    results = {
+        'legacy substring loop': measure(legacy_detect_emotion, CORPUS, rounds),
+        'token index': measure(detector.detect_emotion, CORPUS, rounds),
+    }
+    
+    print(f"Emotion detection over {len(CORPUS)} responses x {rounds} rounds")
+    for name, throughput in results.items():
+        print(f"  {name:<22} {throughput:>12,.0f} texts/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Response Formatter Benchmark - Measures chat reply post-processing cost
+
+Run from the repository root:
+    python -m benchmarks.formatter_benchmark
+"""
+
+import time
+
+from bot.utils.response_formatter import format_chat_response
+
+# Raw model outputs: mostly short, some rambling past the 120 character limit
+RESPONSES = [
+    "lol fair enough 😂",
+    "Bro that's actually a solid plan, go for it and let me know how it turns out 🎮",
+    "Arrey yaar, kya baat hai!\nAaj toh maza aa gaya, chal ek aur game khelte hain 😄",
+    "Honestly? Minecraft with shaders is peak chill vibes,\\n especially at night with rain sounds and a cozy base by the lake.",
+    "Pizza at 2am hits different, no cap 🍕",
+    "Python decorators are basically functions that wrap other functions, letting you add behaviour before or after the call without touching the original code at all, which is super handy.",
+    "   Sounds   like  a   trip!   Send pics   when you're back ✈️   ",
+    "Nah that's stupid, I hate when people spoil movies. Like just let me watch it in peace man, is that too much to ask for real?",
+]
+
+
+def legacy_format_response(response):
+    """Split/join formatter plus the line and length checks from handle_ai_response"""
+    response = response.replace('\\n', ' ').replace('\n', ' ')
+    response = ' '.join(response.split())
+    
+    if len(response) <= 60:
+        formatted = response
+    else:
+        words = response.split()
+        if len(words) <= 15:
+            formatted = response
+        else:
+            mid_point = len(words) // 2
+            line1 = ' '.join(words[:mid_point])
+            line2 = ' '.join(words[mid_point:])
+            if len(line1) > 80:
+                for i in range(mid_point - 3, mid_point + 3):
+                    if i > 0 and i < len(words):
+                        test_line1 = ' '.join(words[:i])
+                        if len(test_line1) <= 80:
+                            line1 = test_line1
+                            line2 = ' '.join(words[i:])
+                            break
+            formatted = f"{line1}\n{line2}"
+    
+    lines = formatted.split('\n')
+    if len(lines) > 2:
+        formatted = '\n'.join(lines[:2])
+    if len(formatted) > 120:
+        formatted = formatted[:117] + "..."
+    return formatted
+
+
+def measure(func, texts, rounds):
+    """Return average microseconds per call of func over texts"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(texts)) * 1_000_000
+
+
+def main(rounds: int = 20000):
+    results = {
+        'legacy split/join': measure(legacy_format_response, RESPONSES, rounds),
+        'single-pass formatter': measure(format_chat_response, RESPONSES, rounds),
+    }
+    
+    print(f"Response formatting over {len(RESPONSES)} responses x {rounds} rounds")
+    for name, micros in results.items():
+        print(f"  {name:<22} {micros:>8.2f} µs/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Help Navigation Benchmark - Cost of handling one /help page flip, including payload serialization
+
+Run from the repository root:
+    python -m benchmarks.help_benchmark
+"""
+
+import asyncio
+import os
+import time
+
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark-fake-key')
+os.environ.setdefault('STATE_BACKEND', 'memory')
+
+import discord
+
+from bot.luna_bot import LunaBot
+from bot.commands.help_commands import HelpView
+from bot.utils.sharding import ShardPlan
+
+# dropdown -> chat, next, previous, dropdown -> utility, next, home, dropdown -> about
+NAVIGATION = [("select", "chat"), ("next", None), ("previous", None), ("select", "utility"), ("next", None), ("home", None), ("select", "about")]
+
+
+class FakeResponse:
+    """Serializes the payload the way discord.py does before sending an edit"""
+    
+    def __init__(self):
+        self.payload_bytes = 0
+        self.view = None
+    
+    async def edit_message(self, embed=None, view=None):
+        payload = {'embeds': [embed.to_dict()], 'components': view.to_components()}
+        self.payload_bytes += len(repr(payload))
+        self.view = view
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeInteraction:
+    """A component click as the router sees it"""
+    
+    def __init__(self, user_id=1234):
+        self.user = FakeUser(user_id)
+        self.type = discord.InteractionType.component
+        self.data = {}
+        self.response = FakeResponse()
+
+
+class LegacyHelpView(discord.ui.View):
+    """The original view: page lists, embeds and every component rebuilt on each flip"""
+    
+    def __init__(self, bot):
+        super().__init__(timeout=30)
+        self.bot = bot
+        self.current_page = "main"
+        self.current_subpage = 0
+        self.setup_components()
+    
+    def setup_components(self):
+        self.clear_items()
+        self.add_item(discord.ui.Select(placeholder="Choose a help category...", options=[
+            discord.SelectOption(label=label, emoji=emoji, value=value)
+            for label, emoji, value in (("Home", "🏠", "main"), ("About Me", "🤖", "about"), ("Chat Commands", "💬", "chat"), ("Utility Commands", "🛠️", "utility"))
+        ]))
+        if self.current_page in ["chat", "utility"]:
+            left_button = discord.ui.Button(emoji="⬅️", style=discord.ButtonStyle.secondary, disabled=self.current_subpage == 0, row=1)
+            left_button.callback = self.previous_page
+            self.add_item(left_button)
+            right_button = discord.ui.Button(emoji="➡️", style=discord.ButtonStyle.secondary, disabled=not self.has_next_page(), row=1)
+            right_button.callback = self.next_page
+            self.add_item(right_button)
+        home_button = discord.ui.Button(label="🏠 Home", style=discord.ButtonStyle.primary, row=1)
+        home_button.callback = self.home_button_callback
+        self.add_item(home_button)
+    
+    def get_chat_pages(self):
+        all_commands = [
+            ("/memory <text>", "💾", "Tell me something to remember about you forever"),
+            ("/memories", "📝", "See what I remember about you + manage memories"),
+            ("/ask <question>", "❓", "Ask me a formal question with length options (private DM response)"),
+            ("/delete_memory", "🗑️", "Delete a specific memory from your stored memories"),
+            ("/forget", "🗑️", "Clear all your memories and conversation history"),
+        ]
+        return [all_commands[i:i+5] for i in range(0, len(all_commands), 5)]
+    
+    def get_utility_pages(self):
+        all_commands = [
+            ("/personality", "🌟", "Learn about my personality and customize it (Premium)"),
+            ("/language", "🌐", "Switch between English and Hinglish personalities"),
+            ("/langstatus", "🗣️", "Check your current language setting"),
+            ("/ping", "🏓", "Check my response time and connection status"),
+            ("/stats", "📊", "View bot statistics and usage information"),
+            ("/activity", "⏰", "Check your activity status and memory cleanup info"),
+            ("/plan", "📊", "Check your subscription plan and usage limits"),
+            ("/subscribe", "⭐", "Subscribe to Chatore Premium for enhanced features"),
+            ("/invite", "🔗", "Get the invite link to add me to your server"),
+            ("/owner", "👑", "Meet Abhinav Anand - Chatore's owner and creator"),
+            ("/help", "❓", "Show this interactive help menu"),
+        ]
+        return [all_commands[i:i+6] for i in range(0, len(all_commands), 6)]
+    
+    def has_next_page(self):
+        if self.current_page == "chat":
+            return self.current_subpage < len(self.get_chat_pages()) - 1
+        elif self.current_page == "utility":
+            return self.current_subpage < len(self.get_utility_pages()) - 1
+        return False
+    
+    def get_current_embed(self):
+        if self.current_page in ("chat", "utility"):
+            pages = self.get_chat_pages() if self.current_page == "chat" else self.get_utility_pages()
+            embed = discord.Embed(title="Commands", description="Helpful tools and bot information", color=0xE91E63)
+            for cmd, emoji, desc in pages[self.current_subpage]:
+                embed.add_field(name=f"{emoji} {cmd}", value=desc, inline=False)
+            embed.add_field(name="🎯 Pro Tips", value="• Slash commands work in any channel\n• Most responses use beautiful embeds", inline=False)
+            embed.set_footer(text=f"Page {self.current_subpage + 1}/{len(pages)} • Use ⬅️➡️ to navigate")
+            return embed
+        embed = discord.Embed(title="🍽️ Chatore Help Center", description="Welcome! I'm Chatore.", color=0x7289DA)
+        embed.add_field(name="🚀 Quick Start", value="• Mention me `@Chatore` to chat naturally\n• Use `/help` to see all commands", inline=False)
+        embed.add_field(name="📋 Categories", value="Use the dropdown menu below to explore", inline=False)
+        embed.set_thumbnail(url=None)
+        embed.set_footer(text="Select a category from the dropdown • Auto-closes in 30s")
+        return embed
+    
+    async def show_current_page(self, interaction):
+        embed = self.get_current_embed()
+        self.setup_components()
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    async def previous_page(self, interaction):
+        if self.current_subpage > 0:
+            self.current_subpage -= 1
+            await self.show_current_page(interaction)
+    
+    async def next_page(self, interaction):
+        if self.has_next_page():
+            self.current_subpage += 1
+            await self.show_current_page(interaction)
+    
+    async def home_button_callback(self, interaction):
+        self.current_page = "main"
+        self.current_subpage = 0
+        await self.show_current_page(interaction)
+
+
+async def navigate_legacy(view, interaction, rounds):
+    """Run the navigation script against the per-menu view; returns microseconds per page flip"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for action, target in NAVIGATION:
+            if action == "select":
+                # What the legacy dropdown callback did once discord.py had parsed the selected value
+                view.current_page = target
+                view.current_subpage = 0
+                await view.show_current_page(interaction)
+            elif action == "next":
+                await view.next_page(interaction)
+            elif action == "previous":
+                await view.previous_page(interaction)
+            else:
+                await view.home_button_callback(interaction)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(NAVIGATION)) * 1_000_000
+
+
+async def navigate_stateless(bot, view, interaction, rounds):
+    """Run the navigation script by clicking custom_ids through the component router"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for action, target in NAVIGATION:
+            dropdown, *buttons = view.children
+            if action == "select":
+                interaction.data = {'custom_id': dropdown.custom_id, 'values': [target]}
+            elif action == "previous":
+                interaction.data = {'custom_id': buttons[0].custom_id}
+            elif action == "next":
+                interaction.data = {'custom_id': buttons[1].custom_id}
+            else:
+                interaction.data = {'custom_id': buttons[-1].custom_id}
+            await bot.component_router.dispatch(interaction)
+            view = interaction.response.view
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(NAVIGATION)) * 1_000_000
+
+
+async def run(rounds):
+    bot = LunaBot(ShardPlan())
+    results = {}
+    
+    interaction = FakeInteraction()
+    view = LegacyHelpView(bot)
+    await navigate_legacy(view, interaction, 50)  # warm up
+    open_micros = time_view_open(lambda: LegacyHelpView(bot), rounds)
+    results['legacy rebuild per flip'] = (await navigate_legacy(view, interaction, rounds), open_micros)
+    
+    interaction = FakeInteraction()
+    view = HelpView(bot, interaction.user.id)
+    await navigate_stateless(bot, view, interaction, 50)  # warm up (and build the catalog once)
+    open_micros = time_view_open(lambda: HelpView(bot, interaction.user.id), rounds)
+    results['stateless custom_id'] = (await navigate_stateless(bot, view, interaction, rounds), open_micros)
+    
+    print(f"/help navigation, {rounds} rounds of {len(NAVIGATION)} page flips")
+    for name, (flip_micros, open_micros) in results.items():
+        print(f"  {name:<24} {flip_micros:>8.1f} us/flip   {open_micros:>8.1f} us/view opened")
+
+
+def time_view_open(make_view, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        make_view().get_current_embed()  # what /help does before its first send
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def main(rounds: int = 2000):
+    asyncio.run(run(rounds))
+
+
+if __name__ == "__main__":
+    main()
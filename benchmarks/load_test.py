@@ -0,0 +1,167 @@
+"""
+Load Test - Drives LunaBot.on_message and /ask with fake Discord objects and a fake Gemini
+
+Runs fully offline. Run from the repository root:
+    python -m benchmarks.load_test --users 200 --messages 10 --gemini-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+
+# Keep the run offline and away from the real JSON state files
+os.environ.setdefault('GEMINI_API_KEY', 'load-test-fake-key')
+os.environ.setdefault('STATE_BACKEND', 'memory')
+os.environ.setdefault('TRACE_SAMPLE_RATE', '0')
+os.environ.setdefault('USAGE_FILE', '')
+
+from bot.luna_bot import CHAT_STAGE_SECONDS
+from tests.fake_bot import FakeLunaBot, FakeGemini, FakeUser, FakeChannel, FakeMessage, FakeInteraction
+
+
+def current_rss_mb() -> float:
+    """Resident set size now (Linux), falling back to the peak from getrusage"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def simulate_user(bot, ask_command, user, channel, args, rng, results, ask_tasks):
+    """One user sending messages back to back, some of them as /ask"""
+    for n in range(args.messages):
+        if rng.random() < args.ask_ratio:
+            user.dm_received = asyncio.get_running_loop().create_future()
+            interaction = FakeInteraction(user)
+            started = time.perf_counter()
+            # /ask waits 5s before deleting its acknowledgement, so time it to the DM and let the rest run on
+            ask_tasks.append(asyncio.create_task(ask_command.callback(interaction, question=f"question {n} from {user.name}?")))
+            try:
+                delivered = await asyncio.wait_for(user.dm_received, timeout=60)
+                results['ask'].append(delivered - started)
+            except asyncio.TimeoutError:
+                results['ask_timeouts'] += 1
+            continue
+        
+        message = FakeMessage(user, channel, f"{bot.user.mention} message {n} from {user.name}", [bot.user])
+        started = time.perf_counter()
+        await bot.on_message(message)
+        finished = time.perf_counter()
+        results['handler'].append(finished - started)
+        if message.replied_at is not None:
+            results['reply'].append(message.replied_at - started)
+        else:
+            results['no_reply'] += 1
+        
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, args.think_ms / 1000))
+
+
+async def run(args):
+    fake_gemini = FakeGemini(args.gemini_latency_ms / 1000, args.gemini_jitter_ms / 1000, args.error_rate, args.seed)
+    bot = FakeLunaBot(fake_gemini)
+    bot.api_keys = [f"fake-key-{n}" for n in range(args.keys)]
+    
+    if not args.keep_rate_limits:
+        for config in bot.tier_manager.tier_configs.values():
+            config['requests_per_12h'] = 10 ** 9
+            config['requests_per_minute'] = 10 ** 9
+    
+    ask_command = bot.tree.get_command('ask')
+    rng = random.Random(args.seed)
+    users = [FakeUser(10_000 + n, f"loaduser{n}") for n in range(args.users)]
+    channels = [FakeChannel(20_000 + n) for n in range(args.channels)]
+    
+    results = {'reply': [], 'handler': [], 'ask': [], 'no_reply': 0, 'ask_timeouts': 0}
+    ask_tasks = []
+    
+    async with bot:
+        await bot.setup_hook()
+        
+        # Onboarded users (added after state is loaded), so every message takes the AI path rather than the welcome flow
+        for user in users:
+            bot.memory.add_user_memory(str(user.id), f"Name: {user.name}, Hobbies: load testing")
+        
+        rss_before = current_rss_mb()
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_user(bot, ask_command, user, channels[n % len(channels)], args, random.Random(rng.random()), results, ask_tasks)
+            for n, user in enumerate(users)
+        ))
+        elapsed = time.perf_counter() - started
+        
+        rss_after = current_rss_mb()
+        loop_stats = bot.loop_monitor.get_stats()
+        dispatcher_stats = bot.dispatcher.get_stats()
+        for task in ask_tasks:
+            task.cancel()
+        await asyncio.gather(*ask_tasks, return_exceptions=True)
+    
+    report(args, results, elapsed, fake_gemini, rss_before, rss_after, loop_stats, dispatcher_stats)
+
+
+def report(args, results, elapsed, fake_gemini, rss_before, rss_after, loop_stats, dispatcher_stats):
+    chat = sorted(results['reply'])
+    handler = sorted(results['handler'])
+    ask = sorted(results['ask'])
+    total = len(handler) + len(ask)
+    
+    print(f"Load test: {args.users} users x {args.messages} messages, Gemini {args.gemini_latency_ms}±{args.gemini_jitter_ms}ms, "
+          f"error rate {args.error_rate:.0%}, {args.keys} key(s)")
+    print(f"  completed        {total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} msgs/sec")
+    for name, values in (('chat reply', chat), ('chat handler', handler), ('/ask to DM', ask)):
+        if values:
+            print(f"  {name:<16} p50 {percentile(values, 0.50) * 1000:8.1f}ms  p95 {percentile(values, 0.95) * 1000:8.1f}ms  "
+                  f"p99 {percentile(values, 0.99) * 1000:8.1f}ms  (n={len(values)})")
+    print(f"  no reply         {results['no_reply']}   /ask timeouts {results['ask_timeouts']}   fake Gemini errors {fake_gemini.errors}")
+    print(f"  RSS              {rss_before:.1f} MiB -> {rss_after:.1f} MiB (peak {peak_rss_mb():.1f} MiB)")
+    print(f"  loop lag         p50 {loop_stats['p50'] * 1000:.1f}ms  p99 {loop_stats['p99'] * 1000:.1f}ms  max {loop_stats['max'] * 1000:.1f}ms")
+    print(f"  outbound queue   p95 delay {dispatcher_stats['queue_delay_p95'] * 1000:.1f}ms  dropped {sum(dispatcher_stats['dropped'].values())}")
+    
+    print("  mean time per chat stage:")
+    for (stage,), (_, stage_sum, stage_count) in sorted(CHAT_STAGE_SECONDS.samples.items()):
+        print(f"    {stage:<18} {stage_sum / stage_count * 1000:8.2f}ms  (n={stage_count})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for Chatore's chat path")
+    parser.add_argument('--users', type=int, default=100, help="simulated users, each sending concurrently")
+    parser.add_argument('--messages', type=int, default=10, help="messages per user")
+    parser.add_argument('--channels', type=int, default=20, help="channels the users are spread over")
+    parser.add_argument('--ask-ratio', type=float, default=0.1, help="fraction of requests sent as /ask")
+    parser.add_argument('--think-ms', type=float, default=0, help="max random pause between a user's messages")
+    parser.add_argument('--gemini-latency-ms', type=float, default=200, help="fake Gemini response time")
+    parser.add_argument('--gemini-jitter-ms', type=float, default=50, help="uniform +/- jitter on the response time")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of fake Gemini calls that fail")
+    parser.add_argument('--keys', type=int, default=1, help="number of fake API keys to fail over between")
+    parser.add_argument('--keep-rate-limits', action='store_true', help="keep the real per-tier request limits")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,15 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 from datetime import datetime
+from ..utils.text_chunker import iter_chunks, chunk_text, EMBED_TOTAL_LIMIT
+from ..utils.component_router import StatelessView, encode_custom_id
+from ..utils.tracing import span
+from ..utils.tier_manager import create_rate_limit_embed
+
+# Discord message limit: 10 embeds, 6000 characters across all of them
+MAX_EMBEDS_PER_MESSAGE = 10
+# Part size for multi-embed answers - two parts plus titles, question and footers fit one message
+ASK_PART_LENGTH = 2600
 
 class AddMemoryModal(discord.ui.Modal, title="Add New Memory"):
     def __init__(self, bot, user_id):
@@ -46,129 +55,18 @@ class AddMemoryModal(discord.ui.Modal, title="Add New Memory"):
         embed.set_footer(text=f"Memory added for {interaction.user.display_name}")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-class MemoryManagementView(discord.ui.View):
-    def __init__(self, bot, user_id):
-        super().__init__(timeout=30)  # 30 second timeout
-        self.bot = bot
-        self.user_id = user_id
-        self.message = None  # Store message for timeout updates
-    
-    @discord.ui.button(label="Add New Memory", emoji="➕", style=discord.ButtonStyle.primary)
-    async def add_memory_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This memory management is not for you!", ephemeral=True)
-            return
-        
-        # Show modal to add new memory
-        modal = AddMemoryModal(self.bot, str(self.user_id))
-        await interaction.response.send_modal(modal)
+class MemoryManagementView(StatelessView):
+    """Add/edit/delete buttons for /memories; clicks go to the "memories" component handler"""
     
-    @discord.ui.button(label="Edit Memory", emoji="✏️", style=discord.ButtonStyle.secondary)
-    async def edit_memory_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This memory management is not for you!", ephemeral=True)
-            return
-        
-        # Get memories with indices
-        memories_with_indices = self.bot.memory.get_user_memories_with_indices(self.user_id)
-        
-        if not memories_with_indices:
-            await interaction.response.send_message("❌ You don't have any memories to edit!", ephemeral=True)
-            return
-        
-        # Create dropdown for memory selection
-        view = MemoryEditView(self.bot, self.user_id, memories_with_indices)
-        embed = discord.Embed(
-            title="✏️ Edit Specific Memory",
-            description="Select which memory you'd like to edit from the dropdown below:",
-            color=0xFFD700
+    def __init__(self, user_id):
+        super().__init__(
+            discord.ui.Button(label="Add New Memory", emoji="➕", style=discord.ButtonStyle.primary,
+                              custom_id=encode_custom_id("memories", "add", user_id)),
+            discord.ui.Button(label="Edit Memory", emoji="✏️", style=discord.ButtonStyle.secondary,
+                              custom_id=encode_custom_id("memories", "edit", user_id)),
+            discord.ui.Button(label="Delete Specific Memory", emoji="🗑️", style=discord.ButtonStyle.danger,
+                              custom_id=encode_custom_id("memories", "delete", user_id)),
         )
-        
-        # Show memories with numbers
-        memory_list = []
-        for i, mem in enumerate(memories_with_indices[:10]):  # Show max 10
-            memory_preview = mem['memory'][:50] + "..." if len(mem['memory']) > 50 else mem['memory']
-            memory_list.append(f"**{i+1}.** {memory_preview}")
-        
-        embed.add_field(
-            name="Your Memories",
-            value="\n".join(memory_list),
-            inline=False
-        )
-        
-        embed.add_field(
-            name="💡 Tip",
-            value="Select a memory to edit its content.",
-            inline=False
-        )
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-    
-    @discord.ui.button(label="Delete Specific Memory", emoji="🗑️", style=discord.ButtonStyle.danger)
-    async def delete_memory_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This memory management is not for you!", ephemeral=True)
-            return
-        
-        # Get memories with indices
-        memories_with_indices = self.bot.memory.get_user_memories_with_indices(self.user_id)
-        
-        if not memories_with_indices:
-            await interaction.response.send_message("❌ You don't have any memories to delete!", ephemeral=True)
-            return
-        
-        # Create dropdown for memory selection
-        view = MemoryDeletionView(self.bot, self.user_id, memories_with_indices)
-        embed = discord.Embed(
-            title="🗑️ Delete Specific Memory",
-            description="Select which memory you'd like to delete from the dropdown below:",
-            color=0xFF6B6B
-        )
-        
-        # Show memories with numbers
-        memory_list = []
-        for i, mem in enumerate(memories_with_indices[:10]):  # Show max 10
-            memory_preview = mem['memory'][:50] + "..." if len(mem['memory']) > 50 else mem['memory']
-            memory_list.append(f"**{i+1}.** {memory_preview}")
-        
-        embed.add_field(
-            name="Your Memories",
-            value="\n".join(memory_list),
-            inline=False
-        )
-        
-        embed.add_field(
-            name="⚠️ Warning",
-            value="Deleted memories cannot be recovered!",
-            inline=False
-        )
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-    
-    async def on_timeout(self):
-        """Handle timeout - disable all components and update message"""
-        for item in self.children:
-            item.disabled = True
-        
-        # Create timeout embed
-        embed = discord.Embed(
-            title="⏰ Memory Menu Timed Out",
-            description="This memory management menu has expired after 30 seconds of inactivity.",
-            color=0x95A5A6
-        )
-        embed.add_field(
-            name="💡 Need Help Again?",
-            value="Use `/memories` to open a new memory menu anytime!",
-            inline=False
-        )
-        embed.set_footer(text="Menu expired • Use /memories for a new one")
-        
-        # Try to edit the message to show timeout
-        if self.message:
-            try:
-                await self.message.edit(embed=embed, view=self)
-            except (discord.NotFound, discord.Forbidden, Exception):
-                pass
 
 class MemoryDeletionView(discord.ui.View):
     def __init__(self, bot, user_id, memories_with_indices):
@@ -398,22 +296,10 @@ def create_ask_embed(response: str, question: str, user: discord.User, guild: di
         "long": "Comprehensive Answer"
     }
     
-    # Smart truncation - try to avoid cutting mid-sentence
+    # Smart truncation - cut at the last paragraph/sentence boundary that fits
     if len(response) > max_description_length:
-        # Try to find a good breaking point (sentence end)
-        truncate_point = max_description_length - 100  # Leave buffer for "..."
-        
-        # Look for sentence endings near the truncate point
-        sentence_endings = ['. ', '! ', '? ', '.\n', '!\n', '?\n']
-        best_break = truncate_point
-        
-        for ending in sentence_endings:
-            last_occurrence = response.rfind(ending, 0, max_description_length - 50)
-            if last_occurrence > truncate_point - 200:  # Within reasonable range
-                best_break = last_occurrence + len(ending)
-                break
-        
-        response = response[:best_break].rstrip() + "\n\n*[Response truncated due to length limit. For very detailed answers, consider asking more specific questions.]*"
+        notice = "\n\n*[Response truncated due to length limit. For very detailed answers, consider asking more specific questions.]*"
+        response = next(iter_chunks(response, max_description_length - len(notice))) + notice
     
     embed = discord.Embed(
         title=f"{length_emojis.get(length, '📝')} Chatore's {length_names.get(length, 'Detailed Answer')}",
@@ -456,35 +342,8 @@ def create_ask_embeds_multiple(response: str, question: str, user: discord.User,
     if len(response) <= max_description_length:
         return [create_ask_embed(response, question, user, guild, length)]
     
-    # Split response into chunks
-    chunks = []
-    current_chunk = ""
-    sentences = response.split('. ')
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-            
-        # Add period back if it's not the last sentence
-        if sentence != sentences[-1]:
-            sentence += '. '
-        
-        # Check if adding this sentence would exceed limit
-        if len(current_chunk + sentence) > max_description_length:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
-            else:
-                # Single sentence is too long, force split
-                chunks.append(sentence[:max_description_length])
-                current_chunk = sentence[max_description_length:]
-        else:
-            current_chunk += sentence
-    
-    # Add remaining chunk
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    # Split response into chunks at paragraph/sentence/code-block boundaries
+    chunks = chunk_text(response, ASK_PART_LENGTH)
     
     # Create embeds for each chunk
     length_emojis = {
@@ -545,9 +404,115 @@ def create_ask_embeds_multiple(response: str, question: str, user: discord.User,
     
     return embeds
 
+def group_embeds_for_messages(embeds):
+    """Pack embeds into as few messages as Discord allows, keeping their order"""
+    groups = []
+    current_group = []
+    current_size = 0
+    
+    for embed in embeds:
+        embed_size = len(embed)
+        if current_group and (len(current_group) >= MAX_EMBEDS_PER_MESSAGE or current_size + embed_size > EMBED_TOTAL_LIMIT):
+            groups.append(current_group)
+            current_group = []
+            current_size = 0
+        current_group.append(embed)
+        current_size += embed_size
+    
+    if current_group:
+        groups.append(current_group)
+    
+    return groups
+
 def setup(bot):
     """Setup chat commands"""
     
+    async def handle_memories_component(interaction: discord.Interaction, component):
+        """Buttons of MemoryManagementView"""
+        user_id = component.user_id
+        
+        if component.action == "add":
+            # Show modal to add new memory
+            modal = AddMemoryModal(bot, user_id)
+            await interaction.response.send_modal(modal)
+        
+        elif component.action == "edit":
+            # Get memories with indices
+            memories_with_indices = bot.memory.get_user_memories_with_indices(user_id)
+            
+            if not memories_with_indices:
+                await interaction.response.send_message("❌ You don't have any memories to edit!", ephemeral=True)
+                return
+            
+            # Create dropdown for memory selection
+            view = MemoryEditView(bot, user_id, memories_with_indices)
+            embed = discord.Embed(
+                title="✏️ Edit Specific Memory",
+                description="Select which memory you'd like to edit from the dropdown below:",
+                color=0xFFD700
+            )
+            
+            # Show memories with numbers
+            memory_list = []
+            for i, mem in enumerate(memories_with_indices[:10]):  # Show max 10
+                memory_preview = mem['memory'][:50] + "..." if len(mem['memory']) > 50 else mem['memory']
+                memory_list.append(f"**{i+1}.** {memory_preview}")
+            
+            embed.add_field(
+                name="Your Memories",
+                value="\n".join(memory_list),
+                inline=False
+            )
+            
+            embed.add_field(
+                name="💡 Tip",
+                value="Select a memory to edit its content.",
+                inline=False
+            )
+            
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        
+        elif component.action == "delete":
+            # Get memories with indices
+            memories_with_indices = bot.memory.get_user_memories_with_indices(user_id)
+            
+            if not memories_with_indices:
+                await interaction.response.send_message("❌ You don't have any memories to delete!", ephemeral=True)
+                return
+            
+            # Create dropdown for memory selection
+            view = MemoryDeletionView(bot, user_id, memories_with_indices)
+            embed = discord.Embed(
+                title="🗑️ Delete Specific Memory",
+                description="Select which memory you'd like to delete from the dropdown below:",
+                color=0xFF6B6B
+            )
+            
+            # Show memories with numbers
+            memory_list = []
+            for i, mem in enumerate(memories_with_indices[:10]):  # Show max 10
+                memory_preview = mem['memory'][:50] + "..." if len(mem['memory']) > 50 else mem['memory']
+                memory_list.append(f"**{i+1}.** {memory_preview}")
+            
+            embed.add_field(
+                name="Your Memories",
+                value="\n".join(memory_list),
+                inline=False
+            )
+            
+            embed.add_field(
+                name="⚠️ Warning",
+                value="Deleted memories cannot be recovered!",
+                inline=False
+            )
+            
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    
+    bot.component_router.register(
+        "memories", handle_memories_component,
+        "❌ This memory management is not for you!", "memories"
+    )
+    
     @bot.command(name='memory')
     async def add_memory(ctx, *, memory_text):
         """Add a memory about yourself"""
@@ -555,7 +520,7 @@ def setup(bot):
         
         # Check if user has completed welcome setup
         if not bot.memory.has_completed_welcome_setup(user_id):
-            from ..commands.welcome_system import create_welcome_embed, OnboardingView
+            from ..commands.welcome_system import OnboardingView
             
             language = bot.memory.get_user_language(user_id)
             
@@ -607,8 +572,8 @@ def setup(bot):
                     # Save the memory they wanted to add for after setup
                     bot.memory.add_user_memory(user_id, f"[Pre-setup memory]: {memory_text}")
                     
-                    embed = create_welcome_embed(bot, button_interaction.user)
                     view = OnboardingView(bot, button_interaction.user.id, button_interaction.user)
+                    embed = view.get_welcome_embed()
                     await button_interaction.response.edit_message(embed=embed, view=view)
                     view.message = await button_interaction.original_response()
             
@@ -647,7 +612,7 @@ def setup(bot):
         
         # Check if user has completed welcome setup
         if not bot.memory.has_completed_welcome_setup(user_id):
-            from ..commands.welcome_system import create_welcome_embed, OnboardingView
+            from ..commands.welcome_system import OnboardingView
             
             language = bot.memory.get_user_language(user_id)
             
@@ -691,8 +656,8 @@ def setup(bot):
                         await button_interaction.response.send_message("❌ This setup is not for you!", ephemeral=True)
                         return
                     
-                    embed = create_welcome_embed(bot, button_interaction.user)
                     view = OnboardingView(bot, button_interaction.user.id, button_interaction.user)
+                    embed = view.get_welcome_embed()
                     await button_interaction.response.edit_message(embed=embed, view=view)
                     view.message = await button_interaction.original_response()
             
@@ -720,6 +685,7 @@ def setup(bot):
     @bot.command(name='ask')
     async def ask_question(ctx, *, question):
         """Ask Luna a formal question (response sent privately to you)"""
+        reservation = None
         try:
             # Delete the original command message for privacy
             try:
@@ -727,6 +693,14 @@ def setup(bot):
             except:
                 pass  # Ignore if we can't delete (permissions)
             
+            # Take the request from the user's limits before doing any work
+            user_id = str(ctx.author.id)
+            await bot.tier_manager.refresh_user(user_id)
+            reservation, usage_info = await bot.tier_manager.reserve_request(user_id)
+            if reservation is None:
+                await ctx.send(embed=create_rate_limit_embed(usage_info))
+                return
+            
             # Send a brief acknowledgment in the channel
             ack_embed = discord.Embed(
                 description=f"📨 {ctx.author.mention}, I'm processing your question privately...",
@@ -734,9 +708,6 @@ def setup(bot):
             )
             ack_msg = await ctx.send(embed=ack_embed)
             
-            # Process the question
-            user_id = str(ctx.author.id)
-            
             # Get user context
             context = bot.memory.get_user_context(user_id)
             
@@ -788,6 +759,13 @@ def setup(bot):
             # Generate response
             response = await bot.generate_response(prompt)
             
+            # A failed generation doesn't count against the user's limits
+            if response == bot.FALLBACK_RESPONSE:
+                await bot.tier_manager.refund_usage(reservation)
+            else:
+                bot.tier_manager.commit_usage(reservation)
+            await bot.tier_manager.save_tiers()
+            
             # Create embed for private response with size handling (default to medium for prefix command)
             embeds = [create_ask_embed(response, question, ctx.author, ctx.guild, "medium")]
             # Set the bot avatar for the embed
@@ -829,6 +807,8 @@ def setup(bot):
                 description="Something went wrong processing your question. Try again!",
                 color=0xFF6B6B
             )
+            if reservation is not None:
+                await bot.tier_manager.refund_usage(reservation)
             await ctx.send(embed=error_embed)
             print(f"Error in ask command: {e}")
 
@@ -841,7 +821,7 @@ def setup(bot):
         
         # Check if user has completed welcome setup
         if not bot.memory.has_completed_welcome_setup(user_id):
-            from ..commands.welcome_system import create_welcome_embed, OnboardingView
+            from ..commands.welcome_system import OnboardingView
             
             language = bot.memory.get_user_language(user_id)
             
@@ -893,8 +873,8 @@ def setup(bot):
                     # Save the memory they wanted to add for after setup
                     bot.memory.add_user_memory(user_id, f"[Pre-setup memory]: {memory_text}")
                     
-                    embed = create_welcome_embed(bot, button_interaction.user)
                     view = OnboardingView(bot, button_interaction.user.id, button_interaction.user)
+                    embed = view.get_welcome_embed()
                     await button_interaction.response.edit_message(embed=embed, view=view)
                     view.message = await button_interaction.original_response()
             
@@ -936,7 +916,7 @@ def setup(bot):
         
         # Check if user has completed welcome setup
         if not bot.memory.has_completed_welcome_setup(user_id):
-            from ..commands.welcome_system import create_welcome_embed, OnboardingView
+            from ..commands.welcome_system import OnboardingView
             
             language = bot.memory.get_user_language(user_id)
             
@@ -980,8 +960,8 @@ def setup(bot):
                         await button_interaction.response.send_message("❌ This setup is not for you!", ephemeral=True)
                         return
                     
-                    embed = create_welcome_embed(bot, button_interaction.user)
                     view = OnboardingView(bot, button_interaction.user.id, button_interaction.user)
+                    embed = view.get_welcome_embed()
                     await button_interaction.response.edit_message(embed=embed, view=view)
                     view.message = await button_interaction.original_response()
             
@@ -1005,9 +985,8 @@ def setup(bot):
             embed.add_field(name="Conversations", value=f"We've had {convo_count} recent conversations", inline=False)
         
         # Always show memory management view (for adding and deleting)
-        view = MemoryManagementView(bot, user_id)
+        view = MemoryManagementView(user_id)
         await interaction.response.send_message(embed=embed, view=view)
-        view.message = await interaction.original_response()
 
 
 
@@ -1023,7 +1002,21 @@ def setup(bot):
     ])
     async def slash_ask(interaction: discord.Interaction, question: str, length: app_commands.Choice[str] = None):
         """Ask Chatore a formal question (response sent privately to you) (slash command)"""
+        reservation = None
         try:
+            # Acknowledge within Discord's 3 second deadline; shared backends make the reservation a round-trip
+            await interaction.response.defer(thinking=True)
+            
+            # Take the request from the user's limits before doing any work
+            user_id = str(interaction.user.id)
+            await bot.tier_manager.refresh_user(user_id)
+            reservation, usage_info = await bot.tier_manager.reserve_request(user_id)
+            if reservation is None:
+                # Swap the public "thinking" message for a private notice
+                await interaction.delete_original_response()
+                await interaction.followup.send(embed=create_rate_limit_embed(usage_info), ephemeral=True)
+                return
+            
             # Get answer length (default to medium)
             answer_length = length.value if length else "medium"
             
@@ -1038,13 +1031,11 @@ def setup(bot):
                 description=f"📨 {interaction.user.mention}, I'm processing your question privately... (preparing {length_text} answer)",
                 color=0x5865F2
             )
-            await interaction.response.send_message(embed=ack_embed)
-            
-            # Process the question
-            user_id = str(interaction.user.id)
+            await interaction.edit_original_response(embed=ack_embed)
             
             # Get user context
-            context = bot.memory.get_user_context(user_id)
+            with span('get_user_context'):
+                context = bot.memory.get_user_context(user_id)
             
             # Get user's language preference for formal responses
             user_language = bot.memory.get_user_language(user_id)
@@ -1111,7 +1102,15 @@ def setup(bot):
             """
             
             # Generate response
-            response = await bot.generate_response(prompt)
+            with span('generate_response', prompt_chars=len(prompt), answer_length=answer_length):
+                response = await bot.generate_response(prompt)
+            
+            # A failed generation doesn't count against the user's limits
+            if response == bot.FALLBACK_RESPONSE:
+                await bot.tier_manager.refund_usage(reservation)
+            else:
+                bot.tier_manager.commit_usage(reservation)
+            await bot.tier_manager.save_tiers()
             
             # Create embed(s) for private response with size handling
             if answer_length == "long" and len(response) > 3800:
@@ -1132,14 +1131,14 @@ def setup(bot):
                     icon_url=bot.user.avatar.url if bot.user.avatar else None
                 )
             
+            # Pack parts into as few messages as the embed limits allow
+            message_groups = group_embeds_for_messages(embeds)
+            
             # Send private DM(s)
             try:
-                # Send first embed
-                await interaction.user.send(embed=embeds[0])
-                
-                # Send additional embeds if any
-                for embed in embeds[1:]:
-                    await interaction.user.send(embed=embed)
+                with span('send_dm', messages=len(message_groups), response_chars=len(response)):
+                    for group in message_groups:
+                        await interaction.user.send(embeds=group)
                 
                 # Update acknowledgment message
                 success_embed = discord.Embed(
@@ -1162,8 +1161,8 @@ def setup(bot):
                 await interaction.edit_original_response(embed=error_embed)
                 
                 # Send all embeds in channel
-                for embed in embeds:
-                    await interaction.followup.send(embed=embed)
+                for group in message_groups:
+                    await interaction.followup.send(embeds=group)
             
             # Note: /ask command responses are NOT saved to memory to keep them private
             
@@ -1173,6 +1172,8 @@ def setup(bot):
                 description="Something went wrong processing your question. Try again!",
                 color=0xFF6B6B
             )
+            if reservation is not None:
+                await bot.tier_manager.refund_usage(reservation)
             try:
                 await interaction.edit_original_response(embed=error_embed)
             except:
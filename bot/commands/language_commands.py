@@ -5,12 +5,10 @@ Language Commands - Language switching and preferences
 import discord
 from discord.ext import commands
 from discord import app_commands
+from ..utils.component_router import StatelessView, encode_custom_id
 
 class LanguageSelect(discord.ui.Select):
-    def __init__(self, bot, original_user_id):
-        self.bot = bot
-        self.original_user_id = original_user_id
-        
+    def __init__(self, original_user_id):
         options = [
             discord.SelectOption(
                 label="English",
@@ -30,24 +28,27 @@ class LanguageSelect(discord.ui.Select):
             placeholder="Choose your preferred language...",
             min_values=1,
             max_values=1,
-            options=options
+            options=options,
+            custom_id=encode_custom_id("language", "select", original_user_id)
         )
+
+class LanguageView(StatelessView):
+    """Language picker; the choice goes to the "language" component handler"""
     
-    async def callback(self, interaction: discord.Interaction):
-        # Check if this is the original user
-        if str(interaction.user.id) != str(self.original_user_id):
-            await interaction.response.send_message(
-                "❌ This language menu was not opened by you! Use `/language` to get your own.",
-                ephemeral=True
-            )
-            return
-        
-        selected_language = self.values[0]
-        user_id = str(interaction.user.id)
+    def __init__(self, original_user_id):
+        super().__init__(LanguageSelect(original_user_id))
+
+def setup(bot):
+    """Setup language commands"""
+    
+    async def handle_language_component(interaction: discord.Interaction, component):
+        """Selection from LanguageView"""
+        user_id = component.user_id
+        selected_language = interaction.data["values"][0]
         
         # Save language preference
-        self.bot.memory.set_user_language(user_id, selected_language)
-        await self.bot.memory.save_memory()
+        bot.memory.set_user_language(user_id, selected_language)
+        await bot.memory.save_memory()
         
         # Create response embed based on selected language
         if selected_language == "english":
@@ -77,47 +78,11 @@ class LanguageSelect(discord.ui.Select):
         embed.timestamp = discord.utils.utcnow()
         
         await interaction.response.edit_message(embed=embed, view=None)
-
-class LanguageView(discord.ui.View):
-    def __init__(self, bot, original_user_id):
-        super().__init__(timeout=30)
-        self.message = None  # Store message for timeout updates
-        self.bot = bot
-        self.original_user_id = original_user_id
-        self.add_item(LanguageSelect(bot, original_user_id))
-    
-    async def on_timeout(self):
-        # Disable the select menu when timeout occurs
-        for item in self.children:
-            item.disabled = True
     
-    async def on_timeout(self):
-        """Handle timeout - disable all components and update message"""
-        for item in self.children:
-            item.disabled = True
-        
-        # Create timeout embed
-        embed = discord.Embed(
-            title="⏰ Language Menu Timed Out",
-            description="This language selection menu has expired after 30 seconds of inactivity.",
-            color=0x95A5A6
-        )
-        embed.add_field(
-            name="💡 Need Help Again?",
-            value="Use `/language` to open a new language menu anytime!",
-            inline=False
-        )
-        embed.set_footer(text="Menu expired • Use /language for a new one")
-        
-        # Try to edit the message to show timeout
-        if self.message:
-            try:
-                await self.message.edit(embed=embed, view=self)
-            except (discord.NotFound, discord.Forbidden, Exception):
-                pass
-
-def setup(bot):
-    """Setup language commands"""
+    bot.component_router.register(
+        "language", handle_language_component,
+        "❌ This language menu was not opened by you! Use `/language` to get your own.", "language"
+    )
     
     @bot.command(name='language', aliases=['lang'])
     async def set_language(ctx):
@@ -149,10 +114,10 @@ def setup(bot):
             inline=False
         )
         
-        embed.set_footer(text="Select from the dropdown below • Timeout: 1 minute")
+        embed.set_footer(text="Select from the dropdown below")
         embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
         
-        view = LanguageView(bot, ctx.author.id)
+        view = LanguageView(ctx.author.id)
         await ctx.reply(embed=embed, view=view)
     
     @bot.command(name='langstatus')
@@ -224,12 +189,11 @@ def setup(bot):
             inline=False
         )
         
-        embed.set_footer(text="Select from the dropdown below • Timeout: 1 minute")
+        embed.set_footer(text="Select from the dropdown below")
         embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
         
-        view = LanguageView(bot, interaction.user.id)
+        view = LanguageView(interaction.user.id)
         await interaction.response.send_message(embed=embed, view=view)
-        view.message = await interaction.original_response()
     
     @bot.tree.command(name="langstatus", description="Check your current language setting")
     async def slash_langstatus(interaction: discord.Interaction):
@@ -5,10 +5,16 @@ Owner Commands - Hidden commands only for the bot owner
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
+import time
+from ..utils.profiler import Profiler, ProfilerBusy, dump_tasks
 
 # Bot owner's user ID
 OWNER_ID = 1369333896965001396
 
+# Discord's attachment limit for bots without boosts
+MAX_REPORT_BYTES = 8 * 1024 * 1024
+
 def is_owner():
     """Check if user is the bot owner"""
     def predicate(ctx):
@@ -19,9 +25,18 @@ def is_owner_interaction(interaction: discord.Interaction) -> bool:
     """Check if interaction user is the bot owner"""
     return interaction.user.id == OWNER_ID
 
+def report_file(report: str, name: str) -> discord.File:
+    """Wrap a text report as a timestamped attachment, trimmed to the upload limit"""
+    data = report.encode('utf-8')
+    if len(data) > MAX_REPORT_BYTES:
+        data = data[:MAX_REPORT_BYTES - 100] + b"\n\n... report truncated ..."
+    return discord.File(io.BytesIO(data), filename=f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+
 def setup(bot):
     """Setup owner commands"""
     
+    profiler = Profiler()
+    
     @bot.command(name='listserver', hidden=True)
     @is_owner()
     async def list_servers(ctx):
@@ -421,6 +436,275 @@ def setup(bot):
             await interaction.response.send_message(embed=error_embed, ephemeral=True)
             print(f"Error in slash apistatus command: {e}")
     
+    @bot.command(name='gifstats', hidden=True)
+    @is_owner()
+    async def gif_stats(ctx):
+        """Show how many emotion GIFs were sent per emotion since startup (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            gif_stats = bot.emotion_detector.get_gif_stats()
+            
+            embed = discord.Embed(
+                title="🎞️ Emotion GIF Stats",
+                description="GIFs sent since the last restart",
+                color=0x7289DA
+            )
+            
+            for emotion, count in gif_stats.items():
+                embed.add_field(name=emotion.title(), value=f"{count} GIF(s)", inline=True)
+            
+            embed.add_field(name="Total", value=f"{sum(gif_stats.values())} GIF(s)", inline=True)
+            
+            await ctx.author.send(embed=embed)
+            
+        except Exception as e:
+            print(f"Error in gifstats command: {e}")
+    
+    @bot.command(name='sendstats', hidden=True)
+    @is_owner()
+    async def send_stats(ctx):
+        """Show outbound message queue metrics (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            stats = bot.dispatcher.get_stats()
+            
+            embed = discord.Embed(
+                title="📤 Outbound Queue Stats",
+                description="Messages sent through the dispatcher since the last restart",
+                color=0x7289DA
+            )
+            
+            embed.add_field(
+                name="Queue",
+                value=f"**Queued**: {stats['queued']} ({stats['queued_low_priority']} low priority)\n**In flight**: {stats['in_flight']}\n**Routes tracked**: {stats['routes_tracked']}",
+                inline=False
+            )
+            embed.add_field(
+                name="Sent",
+                value="\n".join(f"**{kind.title()}**: {count}" for kind, count in stats['sent'].items()),
+                inline=True
+            )
+            embed.add_field(
+                name="Dropped",
+                value="\n".join(f"**{kind.title()}**: {count}" for kind, count in stats['dropped'].items()),
+                inline=True
+            )
+            embed.add_field(
+                name="Queue Delay",
+                value=f"**p50**: {stats['queue_delay_p50'] * 1000:.0f}ms\n**p95**: {stats['queue_delay_p95'] * 1000:.0f}ms\n**Max**: {stats['queue_delay_max'] * 1000:.0f}ms",
+                inline=True
+            )
+            embed.add_field(
+                name="Errors",
+                value=f"**Failed sends**: {stats['failed']}\n**429s observed**: {stats['rate_limits_observed']}",
+                inline=False
+            )
+            
+            await ctx.author.send(embed=embed)
+            
+        except Exception as e:
+            print(f"Error in sendstats command: {e}")
+    
+    @bot.command(name='profile', hidden=True)
+    @is_owner()
+    async def profile(ctx, seconds: int = 15, mode: str = 'sample'):
+        """Profile the live bot for a few seconds and DM the report (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            mode = mode.lower()
+            if mode not in ('sample', 'cprofile'):
+                await ctx.author.send("Usage: `!profile [seconds] [sample|cprofile]`")
+                return
+            
+            await ctx.author.send(f"⏱️ Running the {mode} profiler for {seconds}s...")
+            
+            try:
+                if mode == 'cprofile':
+                    summary, report = await profiler.run_cprofile(seconds)
+                else:
+                    summary, report = await profiler.run_sampler(seconds)
+            except (ProfilerBusy, RuntimeError) as e:
+                await ctx.author.send(f"❌ {e}")
+                return
+            
+            embed = discord.Embed(
+                title="🔬 Profile Complete",
+                description=summary,
+                color=0x7289DA
+            )
+            embed.add_field(name="Mode", value=mode, inline=True)
+            embed.add_field(name="Duration", value=f"{seconds}s", inline=True)
+            
+            await ctx.author.send(embed=embed, file=report_file(report, f"profile-{mode}"))
+            
+        except Exception as e:
+            print(f"Error in profile command: {e}")
+    
+    @bot.command(name='memprofile', hidden=True)
+    @is_owner()
+    async def mem_profile(ctx, top: str = '25'):
+        """Start tracemalloc, or DM the top allocation sites since it started; `stop` turns it off (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            if top.lower() == 'stop':
+                stopped = profiler.stop_memory_tracing()
+                await ctx.author.send("🧠 tracemalloc stopped." if stopped else "🧠 tracemalloc wasn't running.")
+                return
+            
+            result = profiler.memory_snapshot(int(top))
+            if result is None:
+                await ctx.author.send("🧠 tracemalloc started. Run `!memprofile` again later for a snapshot, and `!memprofile stop` when done (tracing slows allocations).")
+                return
+            
+            summary, report = result
+            embed = discord.Embed(
+                title="🧠 Memory Snapshot",
+                description=summary,
+                color=0x7289DA
+            )
+            embed.set_footer(text="Run again to see growth since this snapshot")
+            
+            await ctx.author.send(embed=embed, file=report_file(report, "memory"))
+            
+        except Exception as e:
+            print(f"Error in memprofile command: {e}")
+    
+    @bot.command(name='tasks', hidden=True)
+    @is_owner()
+    async def task_dump(ctx):
+        """DM asyncio task counts and stacks (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            counts, report = dump_tasks()
+            
+            embed = discord.Embed(
+                title="🧵 Asyncio Tasks",
+                description=f"**{sum(counts.values())}** live task(s)",
+                color=0x7289DA
+            )
+            embed.add_field(
+                name="Most Common",
+                value="\n".join(f"**{count}** × `{name[:80]}`" for name, count in counts.most_common(10)) or "None",
+                inline=False
+            )
+            
+            await ctx.author.send(embed=embed, file=report_file(report, "tasks"))
+            
+        except Exception as e:
+            print(f"Error in tasks command: {e}")
+    
+    @bot.command(name='usage', hidden=True)
+    @is_owner()
+    async def usage_report(ctx, resolution: str = 'minute', points: int = 60):
+        """DM Gemini requests, latency and tokens per minute, hour or day (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            resolution = resolution.lower()
+            try:
+                series = bot.usage_series.query(resolution, points)
+            except ValueError as e:
+                await ctx.author.send(f"❌ {e}\nUsage: `!usage [minute|hour|day] [points]`")
+                return
+            
+            totals = bot.usage_series.summarize(series)
+            embed = discord.Embed(
+                title="📈 Gemini Usage",
+                description=f"Last {len(series)} {resolution}(s)",
+                color=0x7289DA
+            )
+            embed.add_field(
+                name="Requests",
+                value=f"**Total**: {totals['requests']}\n**Errors**: {totals['errors']}",
+                inline=True
+            )
+            embed.add_field(
+                name="Latency",
+                value=f"**Avg**: {totals['latency_ms_avg']:.0f}ms\n**Max**: {totals['latency_ms_max']:.0f}ms",
+                inline=True
+            )
+            embed.add_field(
+                name="Tokens",
+                value=f"**Prompt**: {totals['prompt_tokens']}\n**Output**: {totals['output_tokens']}",
+                inline=True
+            )
+            embed.set_footer(text=f"Ring buffers hold {bot.usage_series.memory_bytes() // 1024} KiB regardless of uptime")
+            
+            time_format = '%Y-%m-%d' if resolution == 'day' else '%Y-%m-%d %H:%M'
+            lines = [f"{'start (UTC)':<17} {'requests':>8} {'errors':>6} {'avg ms':>8} {'max ms':>8} {'prompt tok':>10} {'output tok':>10}"]
+            for point in series:
+                lines.append(
+                    f"{time.strftime(time_format, time.gmtime(point['start'])):<17} {point['requests']:>8} {point['errors']:>6} "
+                    f"{point['latency_ms_avg']:>8.0f} {point['latency_ms_max']:>8.0f} {point['prompt_tokens']:>10} {point['output_tokens']:>10}"
+                )
+            
+            await ctx.author.send(embed=embed, file=report_file("\n".join(lines), f"usage-{resolution}"))
+        
+        except Exception as e:
+            print(f"Error in usage command: {e}")
+    
+    @bot.command(name='checkstats', hidden=True)
+    @is_owner()
+    async def check_stats(ctx, mode: str = 'check'):
+        """Verify the running /stats counters against a full scan; `fix` resyncs any that drifted (Owner only)"""
+        try:
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+            
+            repair = mode.lower() == 'fix'
+            started = time.perf_counter()
+            results = {
+                "Memory": bot.memory.check_stats(repair),
+                "Tiers": bot.tier_manager.check_stats(repair),
+                "Personalities": bot.personality_manager.check_stats(repair),
+            }
+            elapsed = time.perf_counter() - started
+            
+            drifted = any(results.values())
+            embed = discord.Embed(
+                title="🧮 Stats Consistency Check",
+                description=f"Running counters compared with a full scan in {elapsed * 1000:.1f}ms",
+                color=0xFFA500 if drifted else 0x00FF7F
+            )
+            for manager, mismatches in results.items():
+                embed.add_field(
+                    name=manager,
+                    value="\n".join(f"**{name}**: running {running}, scanned {scanned}" for name, (running, scanned) in mismatches.items()) or "✅ Consistent",
+                    inline=False
+                )
+            if drifted:
+                embed.set_footer(text="Counters resynced from the scan" if repair else "Run !checkstats fix to resync them")
+            
+            await ctx.author.send(embed=embed)
+        
+        except Exception as e:
+            print(f"Error in checkstats command: {e}")
+    
     # Error handler for owner-only commands
     @list_servers.error
     async def listserver_error(ctx, error):
@@ -442,4 +726,81 @@ def setup(bot):
             except:
                 pass
         else:
-            print(f"Error in apistatus command: {error}")
\ No newline at end of file
+            print(f"Error in apistatus command: {error}")
+    
+    @gif_stats.error
+    async def gifstats_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in gifstats command: {error}")
+    
+    @send_stats.error
+    async def sendstats_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in sendstats command: {error}")
+    
+    @profile.error
+    async def profile_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in profile command: {error}")
+    
+    @mem_profile.error
+    async def memprofile_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in memprofile command: {error}")
+    
+    @task_dump.error
+    async def tasks_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in tasks command: {error}")
+    
+    @usage_report.error
+    async def usage_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in usage command: {error}")
+    
+    @check_stats.error
+    async def checkstats_error(ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            # Silently ignore - don't reveal the command exists
+            try:
+                await ctx.message.delete()
+            except:
+                pass
+        else:
+            print(f"Error in checkstats command: {error}")
\ No newline at end of file
@@ -6,57 +6,19 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
+from ..utils.component_router import StatelessView, encode_custom_id
+from ..utils.outbound_dispatcher import user_route, PRIORITY_DM
 
-class SubscriptionView(discord.ui.View):
-    def __init__(self, bot, user_id):
-        super().__init__(timeout=30)  # 30 second timeout
-        self.bot = bot
-        self.user_id = user_id
-        self.message = None  # Store message for timeout updates
-    
-    @discord.ui.button(label="Request Premium", emoji="⭐", style=discord.ButtonStyle.primary)
-    async def subscribe_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This subscription menu is not for you!", ephemeral=True)
-            return
-        
-        # Create subscription request modal
-        modal = SubscriptionModal(self.bot)
-        await interaction.response.send_modal(modal)
-    
-    @discord.ui.button(label="Learn More", emoji="ℹ️", style=discord.ButtonStyle.secondary)
-    async def learn_more_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This subscription menu is not for you!", ephemeral=True)
-            return
-        
-        embed = create_features_comparison_embed(self.bot)
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    async def on_timeout(self):
-        """Handle timeout - disable all components and update message"""
-        for item in self.children:
-            item.disabled = True
-        
-        # Create timeout embed
-        embed = discord.Embed(
-            title="⏰ Subscription Menu Timed Out",
-            description="This subscription menu has expired after 30 seconds of inactivity.",
-            color=0x95A5A6
-        )
-        embed.add_field(
-            name="💡 Need Help Again?",
-            value="Use `/subscribe` to open a new subscription menu anytime!",
-            inline=False
+class SubscriptionView(StatelessView):
+    """Request/learn-more buttons for /subscribe; clicks go to the "subscribe" component handler"""
+    
+    def __init__(self, user_id):
+        super().__init__(
+            discord.ui.Button(label="Request Premium", emoji="⭐", style=discord.ButtonStyle.primary,
+                              custom_id=encode_custom_id("subscribe", "request", user_id)),
+            discord.ui.Button(label="Learn More", emoji="ℹ️", style=discord.ButtonStyle.secondary,
+                              custom_id=encode_custom_id("subscribe", "learn", user_id)),
         )
-        embed.set_footer(text="Menu expired • Use /subscribe for a new one")
-        
-        # Try to edit the message to show timeout
-        if self.message:
-            try:
-                await self.message.edit(embed=embed, view=self)
-            except (discord.NotFound, discord.Forbidden, Exception):
-                pass
 
 class SubscriptionModal(discord.ui.Modal, title="Premium Subscription Request"):
     def __init__(self, bot):
@@ -166,7 +128,7 @@ class SubscriptionModal(discord.ui.Modal, title="Premium Subscription Request"):
                 embed.set_thumbnail(url=interaction.user.display_avatar.url)
                 embed.set_footer(text="Premium Subscription Request • Chatore Bot")
                 
-                await owner.send(embed=embed)
+                await self.bot.dispatcher.send(user_route(owner), lambda: owner.send(embed=embed), priority=PRIORITY_DM)
                 
         except Exception as e:
             print(f"Error notifying owner about subscription request: {e}")
@@ -195,7 +157,7 @@ def create_plan_embed(bot, user_id: str) -> discord.Embed:
     
     embed.add_field(
         name="📊 Current Usage",
-        value=f"{usage_bar}\n**{usage_stats['current_usage']}/{usage_stats['usage_limit']} requests** ({usage_percentage:.1f}%)\nResets in {usage_stats['hours_until_reset']:.1f} hours",
+        value=f"{usage_bar}\n**{usage_stats['current_usage']}/{usage_stats['usage_limit']} requests** ({usage_percentage:.1f}%)\nFully refilled in {usage_stats['hours_until_reset']:.1f} hours\n**Burst limit**: {usage_stats['burst_limit']} requests per minute",
         inline=False
     )
     
@@ -371,6 +333,21 @@ def create_usage_bar(percentage: float, length: int = 10) -> str:
 def setup(bot):
     """Setup subscription commands"""
     
+    async def handle_subscribe_component(interaction: discord.Interaction, component):
+        """Buttons of SubscriptionView"""
+        if component.action == "request":
+            # Create subscription request modal
+            modal = SubscriptionModal(bot)
+            await interaction.response.send_modal(modal)
+        elif component.action == "learn":
+            embed = create_features_comparison_embed(bot)
+            await interaction.response.edit_message(embed=embed, view=SubscriptionView(component.user_id))
+    
+    bot.component_router.register(
+        "subscribe", handle_subscribe_component,
+        "❌ This subscription menu is not for you!", "subscribe"
+    )
+    
     @bot.tree.command(name="plan", description="Check your current subscription plan and usage")
     async def plan_command(interaction: discord.Interaction):
         """Show user's current plan and usage statistics"""
@@ -385,10 +362,9 @@ def setup(bot):
         user_id = str(interaction.user.id)
         
         embed = create_subscription_embed(bot, user_id)
-        view = SubscriptionView(bot, user_id)
+        view = SubscriptionView(user_id)
         
         await interaction.response.send_message(embed=embed, view=view)
-        view.message = await interaction.original_response()
     
     # Owner-only commands for tier management
     @bot.tree.command(name="grant_premium", description="Grant premium to a user (Owner only)")
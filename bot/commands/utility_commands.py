@@ -6,113 +6,39 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from .personality_commands import PersonalityCustomizationView
+from ..utils.component_router import StatelessView, encode_custom_id
 
-class PersonalityView(discord.ui.View):
-    def __init__(self, bot, user_id, has_custom):
-        super().__init__(timeout=30)  # 30 second timeout
-        self.bot = bot
-        self.user_id = user_id
-        self.has_custom = has_custom
-        self.message = None  # Store message for timeout updates
-    
-    @discord.ui.button(label="Customize Personality", emoji="🎨", style=discord.ButtonStyle.primary, row=0)
-    async def customize_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This personality menu is not for you!", ephemeral=True)
-            return
-        
-        # Start personality customization
-        customization_view = PersonalityCustomizationView(self.bot, self.user_id)
-        embed = customization_view.get_welcome_embed()
-        await interaction.response.edit_message(embed=embed, view=customization_view)
-    
-    @discord.ui.button(label="Manage Presets", emoji="💾", style=discord.ButtonStyle.secondary, row=0)
-    async def presets_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This personality menu is not for you!", ephemeral=True)
-            return
-        
-        # Show preset management
-        preset_view = PersonalityPresetView(self.bot, self.user_id)
-        embed = preset_view.get_preset_embed()
-        await interaction.response.send_message(embed=embed, view=preset_view, ephemeral=True)
-    
-    @discord.ui.button(label="Edit Personality", emoji="✏️", style=discord.ButtonStyle.secondary, row=1)
-    async def edit_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This personality menu is not for you!", ephemeral=True)
-            return
-        
-        if not self.has_custom:
-            await interaction.response.send_message("❌ You don't have a custom personality to edit! Create one first.", ephemeral=True)
-            return
-        
-        # Show personality edit options
-        edit_view = PersonalityEditView(self.bot, self.user_id)
-        embed = edit_view.get_edit_embed()
-        await interaction.response.send_message(embed=embed, view=edit_view, ephemeral=True)
-    
-    @discord.ui.button(label="Reset to Default", emoji="🔄", style=discord.ButtonStyle.secondary, row=1)
-    async def reset_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if str(interaction.user.id) != str(self.user_id):
-            await interaction.response.send_message("❌ This personality menu is not for you!", ephemeral=True)
-            return
-        
-        if not self.has_custom:
-            await interaction.response.send_message("❌ You don't have a custom personality to reset!", ephemeral=True)
-            return
-        
-        # Reset personality
-        success = self.bot.personality_manager.reset_personality(str(self.user_id))
-        
-        if success:
-            await self.bot.personality_manager.save_personalities()
-            
-            embed = discord.Embed(
-                title="🔄 Personality Reset",
-                description="Your custom personality has been reset to default. I'm back to my original self!",
-                color=0x00FF7F
-            )
-            embed.add_field(
-                name="✅ What Changed",
-                value="• Returned to default Chatore personality\n• All custom traits removed\n• Original speaking style restored",
-                inline=False
-            )
-            embed.set_footer(text="You can customize me again anytime using the button above!")
-            
-            await interaction.response.edit_message(embed=embed, view=None)
-        else:
-            embed = discord.Embed(
-                title="❌ Reset Failed",
-                description="There was an error resetting your personality. Please try again.",
-                color=0xFF6B6B
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+# PersonalityView buttons that need an active Premium subscription
+PREMIUM_PERSONALITY_ACTIONS = {"customize", "presets", "edit"}
+
+def create_premium_required_embed() -> discord.Embed:
+    """Reply to a premium personality button clicked by a user who is no longer Premium"""
+    embed = discord.Embed(
+        title="⭐ Premium Feature",
+        description="Personality customization is only available with an active Premium subscription.",
+        color=0xFF9933
+    )
+    embed.add_field(
+        name="⭐ Upgrade to Premium",
+        value="Customize my personality, save presets and more!\nUse `/subscribe` to upgrade.",
+        inline=False
+    )
+    return embed
+
+class PersonalityView(StatelessView):
+    """Premium personality buttons; clicks go to the "personality" component handler"""
     
-    async def on_timeout(self):
-        """Handle timeout - disable all components and update message"""
-        for item in self.children:
-            item.disabled = True
-        
-        # Create timeout embed
-        embed = discord.Embed(
-            title="⏰ Personality Menu Timed Out",
-            description="This personality menu has expired after 30 seconds of inactivity.",
-            color=0x95A5A6
-        )
-        embed.add_field(
-            name="💡 Need Help Again?",
-            value="Use `/personality` to open a new personality menu anytime!",
-            inline=False
+    def __init__(self, user_id):
+        super().__init__(
+            discord.ui.Button(label="Customize Personality", emoji="🎨", style=discord.ButtonStyle.primary, row=0,
+                              custom_id=encode_custom_id("personality", "customize", user_id)),
+            discord.ui.Button(label="Manage Presets", emoji="💾", style=discord.ButtonStyle.secondary, row=0,
+                              custom_id=encode_custom_id("personality", "presets", user_id)),
+            discord.ui.Button(label="Edit Personality", emoji="✏️", style=discord.ButtonStyle.secondary, row=1,
+                              custom_id=encode_custom_id("personality", "edit", user_id)),
+            discord.ui.Button(label="Reset to Default", emoji="🔄", style=discord.ButtonStyle.secondary, row=1,
+                              custom_id=encode_custom_id("personality", "reset", user_id)),
         )
-        embed.set_footer(text="Menu expired • Use /personality for a new one")
-        
-        # Try to edit the message to show timeout
-        if self.message:
-            try:
-                await self.message.edit(embed=embed, view=self)
-            except (discord.NotFound, discord.Forbidden, Exception):
-                pass
 
 class PersonalityPresetView(discord.ui.View):
     def __init__(self, bot, user_id):
@@ -685,6 +611,76 @@ class PersonalityFieldEditModal(discord.ui.Modal):
 def setup(bot):
     """Setup utility commands"""
     
+    async def handle_personality_component(interaction: discord.Interaction, component):
+        """Buttons of PersonalityView"""
+        user_id = component.user_id
+        # Looked up per click rather than stored in the button, so it's never stale
+        has_custom = bot.personality_manager.has_custom_personality(user_id)
+        
+        # The menu outlives a lapsed subscription, so the tier is checked per click too
+        if component.action in PREMIUM_PERSONALITY_ACTIONS and bot.tier_manager.get_user_tier(user_id) != 'premium':
+            await interaction.response.send_message(embed=create_premium_required_embed(), ephemeral=True)
+            return
+        
+        if component.action == "customize":
+            # Start personality customization
+            customization_view = PersonalityCustomizationView(bot, user_id)
+            embed = customization_view.get_welcome_embed()
+            await interaction.response.edit_message(embed=embed, view=customization_view)
+        
+        elif component.action == "presets":
+            # Show preset management
+            preset_view = PersonalityPresetView(bot, user_id)
+            embed = preset_view.get_preset_embed()
+            await interaction.response.send_message(embed=embed, view=preset_view, ephemeral=True)
+        
+        elif component.action == "edit":
+            if not has_custom:
+                await interaction.response.send_message("❌ You don't have a custom personality to edit! Create one first.", ephemeral=True)
+                return
+            
+            # Show personality edit options
+            edit_view = PersonalityEditView(bot, user_id)
+            embed = edit_view.get_edit_embed()
+            await interaction.response.send_message(embed=embed, view=edit_view, ephemeral=True)
+        
+        elif component.action == "reset":
+            if not has_custom:
+                await interaction.response.send_message("❌ You don't have a custom personality to reset!", ephemeral=True)
+                return
+            
+            # Reset personality
+            success = bot.personality_manager.reset_personality(user_id)
+            
+            if success:
+                await bot.personality_manager.save_personalities()
+                
+                embed = discord.Embed(
+                    title="🔄 Personality Reset",
+                    description="Your custom personality has been reset to default. I'm back to my original self!",
+                    color=0x00FF7F
+                )
+                embed.add_field(
+                    name="✅ What Changed",
+                    value="• Returned to default Chatore personality\n• All custom traits removed\n• Original speaking style restored",
+                    inline=False
+                )
+                embed.set_footer(text="You can customize me again anytime using the button above!")
+                
+                await interaction.response.edit_message(embed=embed, view=None)
+            else:
+                embed = discord.Embed(
+                    title="❌ Reset Failed",
+                    description="There was an error resetting your personality. Please try again.",
+                    color=0xFF6B6B
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    bot.component_router.register(
+        "personality", handle_personality_component,
+        "❌ This personality menu is not for you!", "personality"
+    )
+    
     @bot.command(name='personality')
     async def show_personality(ctx):
         """Show Chatore's personality with customization options for premium users"""
@@ -790,7 +786,7 @@ def setup(bot):
         
         # Add buttons for premium users
         if tier == 'premium':
-            view = PersonalityView(bot, ctx.author.id, has_custom)
+            view = PersonalityView(ctx.author.id)
             await ctx.reply(embed=embed, view=view)
         else:
             await ctx.reply(embed=embed)
@@ -934,7 +930,7 @@ def setup(bot):
         
         # Check if user has completed welcome setup
         if not bot.memory.has_completed_welcome_setup(user_id):
-            from ..commands.welcome_system import create_welcome_embed, OnboardingView
+            from ..commands.welcome_system import OnboardingView
             
             language = bot.memory.get_user_language(user_id)
             
@@ -983,8 +979,8 @@ def setup(bot):
                         await button_interaction.response.send_message("❌ This setup is not for you!", ephemeral=True)
                         return
                     
-                    embed = create_welcome_embed(bot, button_interaction.user)
                     view = OnboardingView(bot, button_interaction.user.id, button_interaction.user)
+                    embed = view.get_welcome_embed()
                     await button_interaction.response.edit_message(embed=embed, view=view)
                     view.message = await button_interaction.original_response()
             
@@ -1092,9 +1088,8 @@ def setup(bot):
         
         # Add buttons for premium users
         if tier == 'premium':
-            view = PersonalityView(bot, interaction.user.id, has_custom)
+            view = PersonalityView(interaction.user.id)
             await interaction.response.send_message(embed=embed, view=view)
-            view.message = await interaction.original_response()
         else:
             await interaction.response.send_message(embed=embed)
         
@@ -2,9 +2,75 @@
 Welcome System - Handles new user onboarding with systematic memory collection
 """
 
+import weakref
+
 import discord
 from discord.ext import commands
 
+from ..utils.metrics import REGISTRY
+
+# Every OnboardingView not yet garbage collected; a steadily growing count means views are leaking
+LIVE_ONBOARDING_VIEWS = weakref.WeakSet()
+REGISTRY.gauge('chatore_onboarding_views', 'Onboarding views currently alive (not yet garbage collected)').set_function(
+    lambda: len(LIVE_ONBOARDING_VIEWS))
+
+# Per-user part of the welcome embed; everything else comes from the cached template
+WELCOME_DESCRIPTIONS = {
+    'hinglish': "Hey {name}! Main Chatore hun, tera AI dost! 🤖\n\nTujhe better jaanne ke liye, main step by step kuch sawal puchunga. Ready hai?",
+    'english': "Hey {name}! I'm Chatore, your AI companion! 🤖\n\nTo get to know you better, I'll ask you a few questions step by step. Ready?",
+}
+
+welcome_templates = {}  # language -> Embed without the user's name or the bot's avatar
+
+def build_welcome_template(language: str) -> discord.Embed:
+    """The welcome embed's fixed text for one language"""
+    if language == 'hinglish':
+        embed = discord.Embed(
+            title="🎉 Namaste! Welcome to Chatore!",
+            color=0x7289DA
+        )
+        embed.add_field(
+            name="📝 Kya hoga?",
+            value="• Tera naam\n• Age (optional)\n• Hobbies aur interests\n• Likes/dislikes\n• Occupation\n• Aur kuch bhi jo tu batana chahe!",
+            inline=False
+        )
+        embed.add_field(
+            name="⏱️ Time lagega?",
+            value="Bas 2-3 minutes! Aur tu koi bhi step skip kar sakta hai.",
+            inline=False
+        )
+    else:
+        embed = discord.Embed(
+            title="🎉 Welcome to Chatore!",
+            color=0x7289DA
+        )
+        embed.add_field(
+            name="📝 What we'll cover:",
+            value="• Your name\n• Age (optional)\n• Hobbies & interests\n• Things you like\n• Your occupation\n• Anything else you'd like to share!",
+            inline=False
+        )
+        embed.add_field(
+            name="⏱️ How long?",
+            value="Just 2-3 minutes! You can skip any step you want.",
+            inline=False
+        )
+    
+    embed.set_footer(text="Click 'Let's Start!' to begin • Timeout: 10 minutes")
+    return embed
+
+def render_welcome_embed(bot, language: str, user_name: str) -> discord.Embed:
+    """Welcome embed for one user, copied from the cached per-language template"""
+    language = language if language in WELCOME_DESCRIPTIONS else 'english'
+    template = welcome_templates.get(language)
+    if template is None:
+        template = welcome_templates[language] = build_welcome_template(language)
+    
+    # Embed.copy() copies the field list too, so the per-user changes below never reach the template
+    embed = template.copy()
+    embed.description = WELCOME_DESCRIPTIONS[language].format(name=user_name)
+    embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
+    return embed
+
 class OnboardingData:
     """Class to store onboarding data during the process"""
     def __init__(self):
@@ -173,6 +239,7 @@ class OnboardingView(discord.ui.View):
         self.onboarding_data = OnboardingData()
         self.current_step = "welcome"
         self.setup_buttons()
+        LIVE_ONBOARDING_VIEWS.add(self)
     
     def check_user(self, interaction: discord.Interaction) -> bool:
         """Check if this is the original user"""
@@ -184,43 +251,7 @@ class OnboardingView(discord.ui.View):
         """Initial welcome embed"""
         language = self.bot.memory.get_user_language(str(self.original_user_id))
         user_name = self.user.display_name if self.user else "Friend"
-        
-        if language == 'hinglish':
-            embed = discord.Embed(
-                title="🎉 Namaste! Welcome to Chatore!",
-                description=f"Hey {user_name}! Main Chatore hun, tera AI dost! 🤖\n\nTujhe better jaanne ke liye, main step by step kuch sawal puchunga. Ready hai?",
-                color=0x7289DA
-            )
-            embed.add_field(
-                name="📝 Kya hoga?",
-                value="• Tera naam\n• Age (optional)\n• Hobbies aur interests\n• Likes/dislikes\n• Occupation\n• Aur kuch bhi jo tu batana chahe!",
-                inline=False
-            )
-            embed.add_field(
-                name="⏱️ Time lagega?",
-                value="Bas 2-3 minutes! Aur tu koi bhi step skip kar sakta hai.",
-                inline=False
-            )
-        else:
-            embed = discord.Embed(
-                title="🎉 Welcome to Chatore!",
-                description=f"Hey {user_name}! I'm Chatore, your AI companion! 🤖\n\nTo get to know you better, I'll ask you a few questions step by step. Ready?",
-                color=0x7289DA
-            )
-            embed.add_field(
-                name="📝 What we'll cover:",
-                value="• Your name\n• Age (optional)\n• Hobbies & interests\n• Things you like\n• Your occupation\n• Anything else you'd like to share!",
-                inline=False
-            )
-            embed.add_field(
-                name="⏱️ How long?",
-                value="Just 2-3 minutes! You can skip any step you want.",
-                inline=False
-            )
-        
-        embed.set_thumbnail(url=self.bot.user.avatar.url if self.bot.user.avatar else None)
-        embed.set_footer(text="Click 'Let's Start!' to begin • Timeout: 10 minutes")
-        return embed
+        return render_welcome_embed(self.bot, language, user_name)
     
     def get_age_embed(self) -> discord.Embed:
         """Age collection embed"""
@@ -778,20 +809,6 @@ class OnboardingView(discord.ui.View):
             except (discord.NotFound, discord.Forbidden, Exception):
                 pass
 
-def create_welcome_embed(bot, user: discord.User) -> discord.Embed:
-    """Create the initial welcome embed for new users"""
-    view = OnboardingView(bot, user.id, user)
-    return view.get_welcome_embed()
-
-class WelcomeView(discord.ui.View):
-    """Wrapper class for compatibility"""
-    def __init__(self, bot, original_user_id, user=None):
-        super().__init__(timeout=600)
-        self.onboarding_view = OnboardingView(bot, original_user_id, user)
-        # Copy all items from onboarding view
-        for item in self.onboarding_view.children:
-            self.add_item(item)
-
 def setup(bot):
     """Setup welcome system - this is called from the main bot file"""
     pass  # No commands to register, just utility functions
\ No newline at end of file
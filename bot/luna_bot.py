@@ -7,13 +7,24 @@ from discord.ext import commands
 from discord import app_commands
 import google.generativeai as genai
 import os
+import math
 import asyncio
-from datetime import datetime
+import time
 
 from .memory.memory_manager import MemoryManager
+from .utils.component_router import ComponentRouter
 from .utils.emotion_detector import EmotionDetector
-from .utils.tier_manager import TierManager
+from .utils.loop_monitor import LoopMonitor
+from .utils.metrics import REGISTRY
+from .utils.outbound_dispatcher import OutboundDispatcher, channel_route, PRIORITY_GIF
+from .utils.response_formatter import format_chat_response
+from .utils.tier_manager import TierManager, create_rate_limit_embed
 from .utils.personality_manager import PersonalityManager
+from .utils.sharding import ShardPlan
+from .utils.state_backend import create_state_backend
+from .utils.tracing import create_tracer, current_span, span, CURRENT_SPAN
+from .utils.usage_timeseries import create_usage_series
+from .utils.user_locks import UserLocks
 from .commands import chat_commands, utility_commands, help_commands, language_commands, welcome_system, owner_commands, subscription_commands
 
 # Configure Gemini with fallback API keys
@@ -36,20 +47,92 @@ if not GEMINI_API_KEYS:
 genai.configure(api_key=GEMINI_API_KEYS[0])
 print(f"🔑 Loaded {len(GEMINI_API_KEYS)} Gemini API key(s)")
 
+# Chat path and slash command metrics (served at /metrics by keep_alive)
+CHAT_REQUESTS = REGISTRY.counter('chatore_chat_requests_total', 'AI chat requests by outcome', ('outcome',))
+CHAT_REQUEST_SECONDS = REGISTRY.histogram('chatore_chat_request_seconds', 'Time from typing indicator to saved history for a chat reply')
+CHAT_STAGE_SECONDS = REGISTRY.histogram('chatore_chat_stage_seconds', 'Time spent in each stage of handle_ai_response', ('stage',))
+SLASH_COMMANDS = REGISTRY.counter('chatore_slash_commands_total', 'Slash command invocations by outcome', ('command', 'outcome'))
+SLASH_COMMAND_SECONDS = REGISTRY.histogram('chatore_slash_command_seconds', 'Slash command handler duration', ('command',))
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Command tree that times each slash command and opens its trace"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras['started_at'] = time.perf_counter()
+        
+        # The command callback runs later in this same task, so its spans attach to this root
+        command = interaction.command.qualified_name if interaction.command else 'unknown'
+        trace = self.client.tracer.start_trace(f'slash_{command}', command=command, user_id=str(interaction.user.id))
+        if trace.recording:
+            interaction.extras['trace'] = trace
+            CURRENT_SPAN.set(trace)
+        return True
+
+def gemini_token_counts(response) -> tuple:
+    """(prompt, output) tokens from a Gemini response's usage metadata; zeros if it has none"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, 'prompt_token_count', 0) or 0, getattr(usage, 'candidates_token_count', 0) or 0
+
+def record_slash_command(interaction: discord.Interaction, outcome: str):
+    """Count a finished slash command, observe how long its handler ran and close its trace"""
+    command = interaction.command.qualified_name if interaction.command else 'unknown'
+    SLASH_COMMANDS.inc(command=command, outcome=outcome)
+    started = interaction.extras.get('started_at')
+    if started is not None:
+        SLASH_COMMAND_SECONDS.observe(time.perf_counter() - started, command=command)
+    
+    trace = interaction.extras.pop('trace', None)
+    if trace is not None:
+        trace.set('outcome', outcome)
+        if outcome == 'error':
+            trace.status = 'error'
+        trace.end()
+
 class LunaBot(commands.Bot):
-    def __init__(self):
+    # What generate_response returns once every API key has failed (callers refund the request)
+    FALLBACK_RESPONSE = "Sorry, I'm having trouble with my AI brain right now! 🤔 Please try again in a moment."
+    
+    def __init__(self, shard_plan: ShardPlan = None, **options):
+        # PREFIX_COMMANDS=0 turns off '!' commands and with them the privileged message content intent
+        self.prefix_commands = os.getenv('PREFIX_COMMANDS', '1').strip().lower() not in ('0', 'false', 'no')
         intents = discord.Intents.default()
-        intents.message_content = True
-        super().__init__(command_prefix='!', intents=intents, help_command=None)
+        if self.prefix_commands:
+            intents.message_content = True
+        else:
+            # Mentions and DMs still arrive with their content; typing events are never used
+            intents.typing = False
+        super().__init__(command_prefix='!', intents=intents, help_command=None, tree_cls=InstrumentedCommandTree, **options)
         
-        self.memory = MemoryManager()
-        self.tier_manager = TierManager()
+        # Each shard process keeps its own traces and usage rollups in its data directory; user state is in the shared backend
+        self.shard_plan = shard_plan or ShardPlan()
+        data_dir = self.shard_plan.data_dir
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        
+        # JSON files by default; SQLite/Redis let several processes share users (STATE_BACKEND)
+        self.state = create_state_backend(data_dir)
+        self.memory = MemoryManager(self.state)
+        self.tier_manager = TierManager(self.state)
         self.tier_manager.set_bot_instance(self)  # Set bot instance for DM sending
-        self.personality_manager = PersonalityManager()
+        self.personality_manager = PersonalityManager(self.state)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
         self.current_api_key_index = 0
         self.api_keys = GEMINI_API_KEYS
         self.emotion_detector = EmotionDetector()
+        self.emotion_queue = None  # Created in setup_hook once the event loop is running
+        self.dispatcher = OutboundDispatcher()  # All chat replies, GIFs and DMs go through here
+        self.user_locks = UserLocks()  # One chat message per user at a time
+        self.last_generation_at = None  # Unix time of the last successful Gemini response
+        self.messages_filtered = 0  # Dropped by the on_message pre-filter
+        self.messages_processed = 0  # Commands, mentions and DMs past the pre-filter
+        self.keep_alive_runner = None
+        self.tracer = create_tracer(data_dir)  # Sampled request traces (TRACE_SAMPLE_RATE)
+        self.usage_series = create_usage_series(data_dir)  # Per-minute/hour/day Gemini usage (USAGE_FILE)
+        self.loop_monitor = LoopMonitor.from_env()  # Event loop lag and blocking-callback reports
+        self.component_router = ComponentRouter.from_env()  # Buttons/selects of stateless menus (state lives in custom_id)
+        self.register_metrics()
         
         # Bot personalities for different languages
         self.personalities = {
@@ -110,6 +193,29 @@ class LunaBot(commands.Bot):
         # Load commands
         self.setup_commands()
     
+    def register_metrics(self):
+        """Expose live bot state as gauges read at scrape time"""
+        REGISTRY.gauge('chatore_gateway_latency_seconds', 'Gateway heartbeat latency').set_function(
+            lambda: self.latency if math.isfinite(self.latency) else None)
+        REGISTRY.gauge('chatore_up', '1 while the gateway is connected').set_function(
+            lambda: 1 if self.is_ready() and not self.is_closed() else 0)
+        REGISTRY.gauge('chatore_guilds', 'Guilds visible to this process').set_function(lambda: len(self.guilds))
+        REGISTRY.gauge('chatore_last_generation_timestamp_seconds', 'Unix time of the last successful Gemini response').set_function(
+            lambda: self.last_generation_at or 0)
+        REGISTRY.gauge('chatore_outbound_queued', 'Sends waiting in the outbound dispatcher').set_function(
+            lambda: self.dispatcher.get_stats()['queued'])
+        REGISTRY.counter('chatore_outbound_rate_limits_total', 'Discord 429 responses observed since start').set_function(
+            lambda: self.dispatcher.get_stats()['rate_limits_observed'])
+        REGISTRY.counter('chatore_messages_filtered_total', 'Messages dropped by the on_message pre-filter (not a command, mention or DM)').set_function(
+            lambda: self.messages_filtered)
+        REGISTRY.counter('chatore_messages_processed_total', 'Messages past the on_message pre-filter').set_function(
+            lambda: self.messages_processed)
+        REGISTRY.gauge('chatore_emotion_queue_size', 'Bot replies waiting for emotion analysis').set_function(
+            lambda: self.emotion_queue.qsize() if self.emotion_queue else 0)
+        for name in ('p50', 'p95', 'p99'):
+            REGISTRY.gauge(f'chatore_event_loop_lag_{name}_seconds', f'Event loop lag {name} over the recent probe window').set_function(
+                lambda name=name: self.loop_monitor.get_percentiles()[name])
+    
     def get_personality(self, user_id: str) -> str:
         """Get personality based on user's language preference and custom settings"""
         language = self.memory.get_user_language(user_id)
@@ -123,49 +229,21 @@ class LunaBot(commands.Bot):
         return self.personalities.get(language, self.personalities['english'])
     
     def format_response(self, response: str) -> str:
-        """Format response to be concise and avoid unnecessary line breaks"""
-        # Remove any existing \n characters that might be in the AI response
-        response = response.replace('\\n', ' ').replace('\n', ' ')
-        
-        # Clean up extra spaces
-        response = ' '.join(response.split())
-        
-        # If response is short (under 60 characters), return as is
-        if len(response) <= 60:
-            return response
-        
-        # For longer responses, split into max 2 lines only
-        words = response.split()
-        if len(words) <= 15:  # Short enough for one line
-            return response
-        
-        # Split into 2 lines maximum
-        mid_point = len(words) // 2
-        line1 = ' '.join(words[:mid_point])
-        line2 = ' '.join(words[mid_point:])
-        
-        # Make sure neither line is too long
-        if len(line1) > 80:
-            # Find a better split point
-            for i in range(mid_point - 3, mid_point + 3):
-                if i > 0 and i < len(words):
-                    test_line1 = ' '.join(words[:i])
-                    if len(test_line1) <= 80:
-                        line1 = test_line1
-                        line2 = ' '.join(words[i:])
-                        break
-        
-        return f"{line1}\n{line2}"
+        """Format response to be concise: max 2 lines, 120 characters, cut at word boundaries"""
+        return format_chat_response(response)
     
     async def handle_new_user_welcome(self, message):
         """Handle welcome message for new users"""
-        from .commands.welcome_system import create_welcome_embed, OnboardingView
+        from .commands.welcome_system import OnboardingView
         
         try:
-            embed = create_welcome_embed(self, message.author)
             view = OnboardingView(self, message.author.id, message.author)
+            embed = view.get_welcome_embed()
             
-            welcome_message = await message.reply(embed=embed, view=view)
+            welcome_message = await self.dispatcher.send(
+                channel_route(message.channel),
+                lambda: message.reply(embed=embed, view=view)
+            )
             view.message = welcome_message
             
         except Exception as e:
@@ -175,7 +253,7 @@ class LunaBot(commands.Bot):
     
     async def check_and_welcome_new_user(self, interaction: discord.Interaction):
         """Check if user is new and show welcome message (for slash commands)"""
-        from .commands.welcome_system import create_welcome_embed, OnboardingView
+        from .commands.welcome_system import OnboardingView
         
         try:
             # Skip welcome for help command
@@ -187,8 +265,8 @@ class LunaBot(commands.Bot):
                 # Update user activity to mark them as no longer new
                 self.memory.update_user_activity(user_id)
                 
-                embed = create_welcome_embed(self, interaction.user)
                 view = OnboardingView(self, interaction.user.id, interaction.user)
+                embed = view.get_welcome_embed()
                 
                 welcome_message = await interaction.followup.send(embed=embed, view=view)
                 view.message = welcome_message
@@ -202,6 +280,11 @@ class LunaBot(commands.Bot):
             try:
                 await asyncio.sleep(3600)  # Wait 1 hour (3600 seconds)
                 
+                if self.state.shared:
+                    # Other processes write the same store - clean up its latest copy, not ours
+                    await self.memory.save_memory()
+                    await self.memory.load_memory()
+                
                 # Cleanup inactive users
                 cleaned_users = self.memory.cleanup_all_inactive_users()
                 
@@ -223,19 +306,59 @@ class LunaBot(commands.Bot):
         owner_commands.setup(self)
         subscription_commands.setup(self)
     
-    async def on_ready(self):
-        print(f'{self.user} has landed! 🚀')
-        await self.change_presence(activity=discord.Game(name="Chatting with humans! 💬"))
+    async def setup_hook(self):
+        """Load state and start background workers once the event loop is running"""
+        await self.memory.load_memory()
+        await self.tier_manager.load_tiers()
+        await self.personality_manager.load_personalities()
+        await self.usage_series.load()
         
-        # Sync slash commands
+        self.emotion_queue = asyncio.Queue(maxsize=1000)
+        self.loop.create_task(self.emotion_worker())
+        self.dispatcher.start()
+        self.tracer.start()
+        self.usage_series.start()
+        self.loop_monitor.start()
+        await self.start_keep_alive()
+    
+    async def start_keep_alive(self):
+        """Start the keep-alive/health server on this event loop (optional, for hosting services)"""
         try:
-            synced = await self.tree.sync()
-            print(f"✅ Synced {len(synced)} slash command(s)")
+            from keep_alive import keep_alive
+            # Shard processes each get their own port: PORT, PORT + 1, ...
+            port = int(os.getenv('PORT', '8080')) + self.shard_plan.process_index
+            self.keep_alive_runner = await keep_alive(self, port)
+        except ImportError:
+            print("ℹ️ Keep-alive server not available (running locally)")
         except Exception as e:
-            print(f"❌ Failed to sync slash commands: {e}")
+            print(f"⚠️ Keep-alive server failed to start: {e}")
+    
+    async def close(self):
+        """Let queued sends finish before disconnecting"""
+        await self.dispatcher.close()
+        await super().close()
+        await self.state.close()
+        await self.tracer.close()
+        await self.usage_series.close()
+        await self.loop_monitor.close()
+        if self.keep_alive_runner:
+            await self.keep_alive_runner.cleanup()
+    
+    async def on_ready(self):
+        print(f'{self.user} has landed! 🚀 ({self.shard_plan.describe()})')
+        await self.change_presence(activity=discord.Game(name="Chatting with humans! 💬"))
+        
+        # Sync slash commands (once per deployment, not once per shard process)
+        if self.shard_plan.is_primary:
+            try:
+                synced = await self.tree.sync()
+                print(f"✅ Synced {len(synced)} slash command(s)")
+            except Exception as e:
+                print(f"❌ Failed to sync slash commands: {e}")
         
         # Set up error handler for slash commands
         async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+            record_slash_command(interaction, 'error')
             print(f"Slash command error: {error}")
             if not interaction.response.is_done():
                 await interaction.response.send_message("An error occurred while processing your command.", ephemeral=True)
@@ -245,77 +368,104 @@ class LunaBot(commands.Bot):
         # Start periodic memory cleanup task
         self.loop.create_task(self.periodic_memory_cleanup())
     
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        record_slash_command(interaction, 'ok')
+    
+    async def on_interaction(self, interaction: discord.Interaction):
+        """Route clicks on stateless menus; these have no stored view, so discord.py's view store skips them"""
+        await self.component_router.dispatch(interaction)
+    
+    def is_addressed(self, message) -> bool:
+        """DM, or a mention of the bot's id (or @everyone, as User.mentioned_in counts it)"""
+        if isinstance(message.channel, discord.DMChannel) or message.mention_everyone:
+            return True
+        bot_id = self.user.id
+        return any(user.id == bot_id for user in message.mentions)
+    
     async def on_message(self, message):
         if message.author == self.user:
             return
         
-        # Check if this is a new user before processing commands
+        # Pre-filter: only '!' commands, mentions and DMs get past here; other guild traffic costs nothing more
+        is_command = self.prefix_commands and message.content.startswith(self.command_prefix)
+        addressed = self.is_addressed(message)
+        if not (is_command or addressed):
+            self.messages_filtered += 1
+            return
+        self.messages_processed += 1
+        
         user_id = str(message.author.id)
-        is_new_user = self.memory.is_new_user(user_id)
+        await self.memory.refresh_user(user_id)
+        
+        # Check if this is a new user before processing commands (a command may add memories)
+        is_new_user = addressed and self.memory.is_new_user(user_id)
         
         # Process commands first
-        await self.process_commands(message)
+        if is_command:
+            await self.process_commands(message)
         
         # If message mentions the bot or is a DM, respond with AI
-        if self.user.mentioned_in(message) or isinstance(message.channel, discord.DMChannel):
+        if addressed:
             # Update user activity for any interaction
             self.memory.update_user_activity(user_id)
             
-            # Check if this is a new user
-            if is_new_user:
-                await self.handle_new_user_welcome(message)
-            else:
-                await self.handle_ai_response(message)
+            # Sampled requests get a span tree covering the whole reply
+            trace = self.tracer.start_trace(
+                'on_message',
+                message_id=str(message.id),
+                user_id=user_id,
+                dm=isinstance(message.channel, discord.DMChannel)
+            )
+            with trace:
+                # Check if this is a new user
+                if is_new_user:
+                    with span('handle_new_user_welcome'):
+                        await self.handle_new_user_welcome(message)
+                else:
+                    with span('handle_ai_response'):
+                        await self.handle_ai_response(message)
     
     async def handle_ai_response(self, message):
         """Handle AI-powered responses with rate limiting"""
+        user_id = str(message.author.id)
+        
+        # A user's messages are handled one at a time, so each one reads the history the previous one saved
+        lock = self.user_locks.get(user_id)
+        with CHAT_STAGE_SECONDS.time(stage='user_lock_wait'), span('user_lock_wait', contended=lock.locked()):
+            await lock.acquire()
+        
+        reservation = None
         try:
-            user_id = str(message.author.id)
+            # Pick up tier/usage/personality changes made by other bot processes (shared state only)
+            await self.tier_manager.refresh_user(user_id)
+            await self.personality_manager.refresh_user(user_id)
             
-            # Check rate limits
-            can_request, usage_info = self.tier_manager.can_make_request(user_id)
+            # Check and take one request from the user's limits in one step, so concurrent messages can't all slip through
+            with CHAT_STAGE_SECONDS.time(stage='rate_limit_check'), span('rate_limit_check'):
+                reservation, usage_info = await self.tier_manager.reserve_request(user_id)
             
-            if not can_request:
+            if reservation is None:
+                CHAT_REQUESTS.inc(outcome='rate_limited')
                 # Rate limit exceeded
-                tier = usage_info['tier']
-                reset_time = datetime.fromisoformat(usage_info['resets_at'])
-                hours_until_reset = (reset_time - datetime.now()).total_seconds() / 3600
-                
-                embed = discord.Embed(
-                    title="⏰ Rate Limit Reached",
-                    description=f"You've reached your {tier} tier limit of {usage_info['limit']} requests per 12 hours.",
-                    color=0xFF9933
-                )
-                
-                embed.add_field(
-                    name="📊 Your Usage",
-                    value=f"**Used**: {usage_info['current_usage']}/{usage_info['limit']} requests\n**Resets in**: {hours_until_reset:.1f} hours",
-                    inline=False
-                )
-                
-                if tier == 'free':
-                    embed.add_field(
-                        name="⭐ Upgrade to Premium",
-                        value="Get 200 requests per 12 hours with Premium!\nUse `/subscribe` to upgrade.",
-                        inline=False
-                    )
-                
-                embed.set_footer(text="Use /plan to check your current usage")
-                await message.reply(embed=embed)
+                embed = create_rate_limit_embed(usage_info)
+                await self.dispatcher.send(channel_route(message.channel), lambda: message.reply(embed=embed))
                 return
             
             # Show typing indicator
+            started = time.perf_counter()
             async with message.channel.typing():
                 user_message = message.content.replace(f'<@{self.user.id}>', '').strip()
                 
                 # Get user context with tier-based limit
-                context = self.memory.get_user_context(user_id, self.tier_manager.get_context_limit(user_id))
+                with CHAT_STAGE_SECONDS.time(stage='get_user_context'), span('get_user_context'):
+                    context = self.memory.get_user_context(user_id, self.tier_manager.get_context_limit(user_id))
                 
                 # Get user's personality based on language preference
-                personality = self.get_personality(user_id)
-                
-                # Create prompt
-                prompt = f"""
+                with CHAT_STAGE_SECONDS.time(stage='prompt_build'), span('prompt_build'):
+                    personality = self.get_personality(user_id)
+                    
+                    # Create prompt
+                    prompt = f"""
                 {personality}
                 
                 {context}
@@ -332,33 +482,39 @@ class LunaBot(commands.Bot):
                 """
                 
                 # Generate response
-                response = await self.generate_response(prompt)
+                with CHAT_STAGE_SECONDS.time(stage='generate_response'), span('generate_response', prompt_chars=len(prompt)):
+                    response = await self.generate_response(prompt)
                 
-                # Format response and ensure it's not too long
-                formatted_response = self.format_response(response)
-                
-                # Final check: ensure max 3 lines and reasonable length
-                lines = formatted_response.split('\n')
-                if len(lines) > 2:  # Max 2 lines (0 and 1 index)
-                    formatted_response = '\n'.join(lines[:2])
+                # A failed generation doesn't count against the user's limits
+                if response == self.FALLBACK_RESPONSE:
+                    await self.tier_manager.refund_usage(reservation)
+                else:
+                    self.tier_manager.commit_usage(reservation)
                 
-                # If still too long, truncate
-                if len(formatted_response) > 120:
-                    formatted_response = formatted_response[:117] + "..."
+                # Format response (max 2 lines, 120 characters)
+                with CHAT_STAGE_SECONDS.time(stage='format_response'), span('format_response'):
+                    formatted_response = self.format_response(response)
                 
                 # Send simple text response (no embed for normal chat)
-                await message.reply(formatted_response)
+                with CHAT_STAGE_SECONDS.time(stage='reply_send'), span('reply_send'):
+                    await self.dispatcher.send(channel_route(message.channel), lambda: message.reply(formatted_response))
                 
-                # Check for extreme emotions and send GIF if needed
-                await self.handle_emotion_response(message, response)
+                # Check for extreme emotions in the background so it doesn't delay saving
+                with CHAT_STAGE_SECONDS.time(stage='emotion_queue'), span('emotion_queue'):
+                    self.queue_emotion_response(message, response)
                 
-                # Increment usage counter
-                self.tier_manager.increment_usage(user_id)
-                await self.tier_manager.save_tiers()
+                # Save usage counters
+                with CHAT_STAGE_SECONDS.time(stage='save_tiers'), span('save_tiers'):
+                    await self.tier_manager.save_tiers()
                 
                 # Save message to conversation history
-                self.memory.add_message_to_history(user_id, user_message, response)
-                await self.memory.save_memory()
+                with CHAT_STAGE_SECONDS.time(stage='save_memory'), span('save_memory'):
+                    self.memory.add_message_to_history(user_id, user_message, response)
+                    await self.memory.save_memory()
+            
+            current_span().set('response_chars', len(formatted_response))
+            CHAT_REQUESTS.inc(outcome='ok')
+            CHAT_REQUEST_SECONDS.observe(time.perf_counter() - started)
                 
         except Exception as e:
             error_embed = discord.Embed(
@@ -366,14 +522,52 @@ class LunaBot(commands.Bot):
                 description="Something went wrong while processing your message. Try again in a moment!",
                 color=0xFF6B6B
             )
-            await message.reply(embed=error_embed)
+            CHAT_REQUESTS.inc(outcome='error')
+            if reservation is not None:
+                await self.tier_manager.refund_usage(reservation)
+            await self.dispatcher.send(channel_route(message.channel), lambda: message.reply(embed=error_embed))
             print(f"Error in AI response: {e}")
+        finally:
+            lock.release()
+    
+    def queue_emotion_response(self, message, bot_response: str):
+        """Queue a bot response for background emotion analysis (never blocks the chat path)"""
+        if self.emotion_queue is None:
+            return
+        
+        try:
+            self.emotion_queue.put_nowait((message, bot_response))
+        except asyncio.QueueFull:
+            pass  # GIFs are optional, drop them when the queue is backed up
+    
+    async def emotion_worker(self):
+        """Background task that scores queued bot responses off the reply path and sends GIFs"""
+        while not self.is_closed():
+            try:
+                batch = [await self.emotion_queue.get()]
+                
+                # Drain everything else that piled up so it's handled in one wakeup
+                while not self.emotion_queue.empty():
+                    batch.append(self.emotion_queue.get_nowait())
+                
+                detect_emotion = self.emotion_detector.detect_emotion
+                with CHAT_STAGE_SECONDS.time(stage='emotion_detect'):
+                    emotions = [detect_emotion(response) for _, response in batch]
+                for (message, response), emotion in zip(batch, emotions):
+                    with CHAT_STAGE_SECONDS.time(stage='emotion_gif'):
+                        await self.handle_emotion_response(message, response, emotion)
+                    
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in emotion worker: {e}")
     
-    async def handle_emotion_response(self, message, bot_response: str):
+    async def handle_emotion_response(self, message, bot_response: str, emotion: str = None):
         """Handle emotion detection and send GIFs for extreme emotions"""
         try:
-            # Detect emotion in bot's response
-            emotion = self.emotion_detector.detect_emotion(bot_response)
+            # Detect emotion in bot's response (unless the emotion worker already scored it)
+            if emotion is None:
+                emotion = self.emotion_detector.detect_emotion(bot_response)
             
             # Check if we should send a GIF for this emotion (1/3 chance)
             if self.emotion_detector.should_send_gif(emotion, bot_response):
@@ -381,8 +575,15 @@ class LunaBot(commands.Bot):
                 gif_url = self.emotion_detector.get_emotion_gif(emotion)
                 
                 if gif_url:
-                    # Send only the GIF URL (no text message)
-                    await message.channel.send(gif_url)
+                    # Send only the GIF URL (no text message); a GIF more than 30s late is dropped
+                    sent = await self.dispatcher.send(
+                        channel_route(message.channel),
+                        lambda: message.channel.send(gif_url),
+                        priority=PRIORITY_GIF,
+                        max_age=30
+                    )
+                    if sent:
+                        self.emotion_detector.record_gif_sent(emotion)
                     
         except Exception as e:
             # Don't let emotion detection errors break the main flow
@@ -409,6 +610,9 @@ class LunaBot(commands.Bot):
         """Generate response using Gemini with fallback API keys"""
         last_error = None
         
+        trace = current_span()
+        started = time.perf_counter()
+        
         # Try all available API keys
         for attempt in range(len(self.api_keys)):
             try:
@@ -416,10 +620,17 @@ class LunaBot(commands.Bot):
                     self.model.generate_content,
                     prompt
                 )
-                return response.text
+                text = response.text
+                self.last_generation_at = time.time()
+                trace.set('gemini_key', self.current_api_key_index + 1)
+                trace.set('retries', attempt)
+                prompt_tokens, output_tokens = gemini_token_counts(response)
+                self.usage_series.record(time.perf_counter() - started, prompt_tokens, output_tokens)
+                return text
                 
             except Exception as e:
                 last_error = e
+                trace.set('last_error', str(e))
                 print(f"❌ Gemini API error with key #{self.current_api_key_index + 1}: {e}")
                 
                 # If we have more keys to try, switch to next one
@@ -434,8 +645,10 @@ class LunaBot(commands.Bot):
                     break
         
         # If all keys failed, return error message
+        trace.set('gemini_failed', True)
+        self.usage_series.record(time.perf_counter() - started, error=True)
         print(f"❌ All Gemini API keys failed. Last error: {last_error}")
-        return "Sorry, I'm having trouble with my AI brain right now! 🤔 Please try again in a moment."
+        return self.FALLBACK_RESPONSE
     
     async def on_command_error(self, ctx, error):
         """Global error handler"""
@@ -453,4 +666,17 @@ class LunaBot(commands.Bot):
                 color=0xFF6B6B
             )
             await ctx.reply(embed=embed)
-            print(f"Command error: {error}")
\ No newline at end of file
+            print(f"Command error: {error}")
+
+class ShardedLunaBot(LunaBot, commands.AutoShardedBot):
+    """LunaBot running one gateway connection per shard (all shards, or the ones in its ShardPlan)"""
+    pass
+
+def create_bot(shard_plan: ShardPlan = None) -> LunaBot:
+    """Create the bot for a shard plan - a plain LunaBot unless sharding is configured"""
+    shard_plan = shard_plan or ShardPlan()
+    if not shard_plan.is_sharded:
+        return LunaBot(shard_plan)
+    
+    shard_count = None if shard_plan.shard_count == 'auto' else shard_plan.shard_count
+    return ShardedLunaBot(shard_plan, shard_count=shard_count, shard_ids=shard_plan.shard_ids)
\ No newline at end of file
@@ -2,62 +2,138 @@
 Memory Manager - Handles user memories and conversation history
 """
 
-import json
-import os
-import aiofiles
 from datetime import datetime
+from ..utils.state_backend import StateBackend, JsonFileStateBackend
+from ..utils.running_stats import RunningStats
+
+MEMORY_NAMESPACES = ('user_memories', 'conversation_history', 'user_preferences', 'user_last_activity')
+
+# Fields written by the welcome setup; a memory containing any of them is a profile
+PROFILE_MEMORY_KEYS = ('name:', 'age:', 'hobbies:', 'occupation:', 'likes:')
+
+def is_profile_memory(memory_text: str) -> bool:
+    """Whether a memory looks like structured profile info from the welcome setup"""
+    memory_text = memory_text.lower()
+    return any(key in memory_text for key in PROFILE_MEMORY_KEYS)
 
 class MemoryManager:
-    def __init__(self):
+    def __init__(self, state: StateBackend = None):
         self.user_memories = {}  # Permanent memories set by users
         self.conversation_history = {}  # Last 12 messages per user for context
         self.user_preferences = {}  # User preferences (language, etc.)
         self.user_last_activity = {}  # Track last activity time for each user
-        self.memory_file = "bot_memory.json"
-        self.load_memory()
+        self.state = state or JsonFileStateBackend()
+        self.dirty_users = set()  # Users changed since the last save
+        # Flags kept up to date on every mutation, so the per-message checks are set lookups
+        self.known_users = set()  # Users with at least one memory or conversation
+        self.profiled_users = set()  # Users with a welcome-setup profile memory
+        # /stats totals, likewise kept current on every mutation instead of summed per call
+        self.running_stats = RunningStats(('total_memories', 'total_conversations'), self.stats_contribution)
+    
+    def get_stores(self):
+        """Map each state namespace to the dict that caches it"""
+        return {
+            'user_memories': self.user_memories,
+            'conversation_history': self.conversation_history,
+            'user_preferences': self.user_preferences,
+            'user_last_activity': self.user_last_activity
+        }
     
-    def load_memory(self):
-        """Load memory from file"""
+    async def load_memory(self):
+        """Load memory from the state backend"""
         try:
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
-                    self.user_memories = data.get('user_memories', {})
-                    self.conversation_history = data.get('conversation_history', {})
-                    self.user_preferences = data.get('user_preferences', {})
-                    self.user_last_activity = data.get('user_last_activity', {})
+            self.user_memories = await self.state.load('user_memories')
+            self.conversation_history = await self.state.load('conversation_history')
+            self.user_preferences = await self.state.load('user_preferences')
+            self.user_last_activity = await self.state.load('user_last_activity')
         except Exception as e:
             print(f"Error loading memory: {e}")
+        self.rebuild_user_flags()
+        self.running_stats.rebuild(self.stats_user_ids())
+    
+    def stats_contribution(self, user_id: str) -> dict:
+        """What one user adds to the /stats totals"""
+        return {
+            'total_memories': len(self.user_memories.get(user_id, ())),
+            'total_conversations': len(self.conversation_history.get(user_id, ()))
+        }
+    
+    def stats_user_ids(self) -> set:
+        return set(self.user_memories) | set(self.conversation_history)
+    
+    def rebuild_user_flags(self):
+        """Recompute the new-user and profile flags for everyone (after a full load)"""
+        self.known_users = set()
+        self.profiled_users = set()
+        for user_id in set(self.user_memories) | set(self.conversation_history):
+            self.update_user_flags(user_id)
+    
+    def update_user_flags(self, user_id: str):
+        """Recompute one user's flags from their records (after a removal or an external refresh)"""
+        memories = self.user_memories.get(user_id)
+        if memories or self.conversation_history.get(user_id):
+            self.known_users.add(user_id)
+        else:
+            self.known_users.discard(user_id)
+        
+        if memories and any(is_profile_memory(memory['memory']) for memory in memories):
+            self.profiled_users.add(user_id)
+        else:
+            self.profiled_users.discard(user_id)
     
     async def save_memory(self):
-        """Save memory to file"""
+        """Save users changed since the last save to the state backend"""
+        if not self.dirty_users:
+            return
+        
+        dirty_users, self.dirty_users = self.dirty_users, set()
         try:
-            data = {
-                'user_memories': self.user_memories,
-                'conversation_history': self.conversation_history,
-                'user_preferences': self.user_preferences,
-                'user_last_activity': self.user_last_activity
-            }
-            async with aiofiles.open(self.memory_file, 'w') as f:
-                await f.write(json.dumps(data, indent=2))
+            await self.state.save({
+                namespace: {user_id: store.get(user_id) for user_id in dirty_users}
+                for namespace, store in self.get_stores().items()
+            })
         except Exception as e:
+            self.dirty_users |= dirty_users
             print(f"Error saving memory: {e}")
     
+    async def refresh_user(self, user_id: str):
+        """Re-read a user's records that other bot processes may have written (shared backends only)"""
+        if not self.state.shared or user_id in self.dirty_users:
+            return
+        
+        try:
+            records = await self.state.get_records(MEMORY_NAMESPACES, user_id)
+            stores = self.get_stores()
+            with self.running_stats.updating(user_id):
+                for namespace, record in records.items():
+                    if record is None:
+                        stores[namespace].pop(user_id, None)
+                    else:
+                        stores[namespace][user_id] = record
+            self.update_user_flags(user_id)
+        except Exception as e:
+            print(f"Error refreshing memory for user {user_id}: {e}")
+    
     def add_user_memory(self, user_id: str, memory: str):
         """Add a permanent memory about a user (never deleted)"""
         # Update user activity
         self.update_user_activity(user_id)
         
-        if user_id not in self.user_memories:
-            self.user_memories[user_id] = []
-        self.user_memories[user_id].append({
-            'memory': memory,
-            'timestamp': datetime.now().isoformat()
-        })
+        with self.running_stats.updating(user_id):
+            if user_id not in self.user_memories:
+                self.user_memories[user_id] = []
+            self.user_memories[user_id].append({
+                'memory': memory,
+                'timestamp': datetime.now().isoformat()
+            })
+        self.known_users.add(user_id)
+        if is_profile_memory(memory):
+            self.profiled_users.add(user_id)
     
     def update_user_activity(self, user_id: str):
         """Update user's last activity timestamp"""
         self.user_last_activity[user_id] = datetime.now().isoformat()
+        self.dirty_users.add(user_id)
     
     def cleanup_inactive_user_memory(self, user_id: str):
         """Reduce message history to last 3 messages if user inactive for 3+ hours"""
@@ -72,7 +148,9 @@ class MemoryManager:
             if time_diff.total_seconds() > 10800:  # 3 hours = 10800 seconds
                 if user_id in self.conversation_history and len(self.conversation_history[user_id]) > 3:
                     # Keep only last 3 messages
-                    self.conversation_history[user_id] = self.conversation_history[user_id][-3:]
+                    with self.running_stats.updating(user_id):
+                        self.conversation_history[user_id] = self.conversation_history[user_id][-3:]
+                    self.dirty_users.add(user_id)
                     print(f"Cleaned up memory for inactive user {user_id}: reduced to 3 messages")
                     return True
         except Exception as e:
@@ -88,19 +166,21 @@ class MemoryManager:
         # Check if we need to cleanup memory for this user due to inactivity
         self.cleanup_inactive_user_memory(user_id)
         
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
-        
-        self.conversation_history[user_id].append({
-            'user_message': message,
-            'bot_response': response,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep messages based on tier (max 25 for premium, but we'll store up to 25 for all users)
-        # The context limit is applied when retrieving, not storing
-        if len(self.conversation_history[user_id]) > max_messages:
-            self.conversation_history[user_id] = self.conversation_history[user_id][-max_messages:]
+        with self.running_stats.updating(user_id):
+            if user_id not in self.conversation_history:
+                self.conversation_history[user_id] = []
+            
+            self.conversation_history[user_id].append({
+                'user_message': message,
+                'bot_response': response,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            # Keep messages based on tier (max 25 for premium, but we'll store up to 25 for all users)
+            # The context limit is applied when retrieving, not storing
+            if len(self.conversation_history[user_id]) > max_messages:
+                self.conversation_history[user_id] = self.conversation_history[user_id][-max_messages:]
+        self.known_users.add(user_id)
     
     def get_user_context(self, user_id: str, context_limit: int = 12) -> str:
         """Get user context for AI with tier-based limits"""
@@ -138,7 +218,9 @@ class MemoryManager:
         
         memories = self.user_memories[user_id]
         if 0 <= memory_index < len(memories):
-            del memories[memory_index]
+            with self.running_stats.updating(user_id):
+                del memories[memory_index]
+            self.update_user_flags(user_id)
             # Update activity
             self.update_user_activity(user_id)
             return True
@@ -167,6 +249,7 @@ class MemoryManager:
         if 0 <= memory_index < len(memories):
             memories[memory_index]['memory'] = new_memory
             memories[memory_index]['updated_at'] = datetime.now().isoformat()
+            self.update_user_flags(user_id)
             # Update user activity
             self.update_user_activity(user_id)
             return True
@@ -174,20 +257,25 @@ class MemoryManager:
 
     def clear_user_data(self, user_id: str):
         """Clear all data for a user"""
-        if user_id in self.user_memories:
-            del self.user_memories[user_id]
-        if user_id in self.conversation_history:
-            del self.conversation_history[user_id]
+        with self.running_stats.updating(user_id):
+            if user_id in self.user_memories:
+                del self.user_memories[user_id]
+            if user_id in self.conversation_history:
+                del self.conversation_history[user_id]
         if user_id in self.user_preferences:
             del self.user_preferences[user_id]
         if user_id in self.user_last_activity:
             del self.user_last_activity[user_id]
+        self.known_users.discard(user_id)
+        self.profiled_users.discard(user_id)
+        self.dirty_users.add(user_id)
     
     def set_user_language(self, user_id: str, language: str):
         """Set user's preferred language"""
         if user_id not in self.user_preferences:
             self.user_preferences[user_id] = {}
         self.user_preferences[user_id]['language'] = language
+        self.dirty_users.add(user_id)
     
     def get_user_language(self, user_id: str) -> str:
         """Get user's preferred language (default: english)"""
@@ -197,36 +285,22 @@ class MemoryManager:
     
     def is_new_user(self, user_id: str) -> bool:
         """Check if user is new (no memories and no conversation history)"""
-        has_memories = user_id in self.user_memories and len(self.user_memories[user_id]) > 0
-        has_conversations = user_id in self.conversation_history and len(self.conversation_history[user_id]) > 0
-        return not (has_memories or has_conversations)
+        return user_id not in self.known_users
     
     def has_completed_welcome_setup(self, user_id: str) -> bool:
         """Check if user has completed the welcome setup process"""
         # A user has completed welcome setup if they have at least one memory
         # that contains basic profile information (name, age, hobbies, etc.)
-        if user_id not in self.user_memories or not self.user_memories[user_id]:
-            return False
-        
-        # Check if any memory contains welcome setup indicators
-        for memory in self.user_memories[user_id]:
-            memory_text = memory['memory'].lower()
-            # Look for structured memory from welcome setup (contains multiple fields)
-            if ('name:' in memory_text or 'age:' in memory_text or 
-                'hobbies:' in memory_text or 'occupation:' in memory_text or
-                'likes:' in memory_text):
-                return True
-        
-        return False
+        return user_id in self.profiled_users
     
     def get_stats(self):
         """Get memory statistics"""
-        total_users = len(self.user_memories)
-        total_conversations = sum(len(convos) for convos in self.conversation_history.values())
-        total_memories = sum(len(memories) for memories in self.user_memories.values())
-        
         return {
-            'total_users': total_users,
-            'total_conversations': total_conversations,
-            'total_memories': total_memories
-        }
\ No newline at end of file
+            'total_users': len(self.user_memories),
+            'total_conversations': self.running_stats['total_conversations'],
+            'total_memories': self.running_stats['total_memories']
+        }
+    
+    def check_stats(self, repair: bool = False) -> dict:
+        """Verify the running /stats totals against a full scan; returns the mismatches"""
+        return self.running_stats.check(self.stats_user_ids(), repair)
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+Component Router - Stateless views whose state is encoded in each component's custom_id
+"""
+
+import os
+import time
+
+import discord
+
+from .metrics import REGISTRY
+
+CUSTOM_ID_PREFIX = 'chatore'
+CUSTOM_ID_SEPARATOR = ':'
+MAX_CUSTOM_ID_LENGTH = 100  # Discord's limit
+DEFAULT_MENU_TTL_HOURS = 24
+
+COMPONENT_INTERACTIONS = REGISTRY.counter(
+    'chatore_component_interactions_total',
+    'Button and select clicks handled by the component router',
+    ('kind', 'outcome')
+)
+
+class ComponentId:
+    """A decoded custom_id: which menu, which action, who opened it, when, and any extra state"""
+    
+    def __init__(self, kind: str, action: str, user_id: str, issued_at: int, state: list):
+        self.kind = kind
+        self.action = action
+        self.user_id = user_id
+        self.issued_at = issued_at
+        self.state = state
+    
+    def __repr__(self):
+        return f"ComponentId({self.kind}:{self.action} user={self.user_id} state={self.state})"
+
+def encode_custom_id(kind: str, action: str, user_id, *state, issued_at: int = None) -> str:
+    """Pack a component's routing data into a custom_id like chatore:help:page:1234:66f0c2a1:chat:1"""
+    issued_at = int(time.time()) if issued_at is None else issued_at
+    parts = [CUSTOM_ID_PREFIX, kind, action, str(user_id), format(issued_at, 'x'), *map(str, state)]
+    custom_id = CUSTOM_ID_SEPARATOR.join(parts)
+    if custom_id.count(CUSTOM_ID_SEPARATOR) != len(parts) - 1:
+        raise ValueError(f"custom_id parts may not contain '{CUSTOM_ID_SEPARATOR}': {parts}")
+    if len(custom_id) > MAX_CUSTOM_ID_LENGTH:
+        raise ValueError(f"custom_id is {len(custom_id)} characters, Discord allows {MAX_CUSTOM_ID_LENGTH}")
+    return custom_id
+
+def decode_custom_id(custom_id: str):
+    """Unpack a custom_id made by encode_custom_id; returns None for anything else"""
+    parts = custom_id.split(CUSTOM_ID_SEPARATOR)
+    if len(parts) < 5 or parts[0] != CUSTOM_ID_PREFIX:
+        return None
+    try:
+        issued_at = int(parts[4], 16)
+    except ValueError:
+        return None
+    return ComponentId(parts[1], parts[2], parts[3], issued_at, parts[5:])
+
+class StatelessView(discord.ui.View):
+    """
+    A view used only to lay out components for a send or edit. It is stopped up front, so
+    discord.py never stores it: nothing stays in memory per message and no timeout task runs.
+    Clicks on its components reach ComponentRouter.dispatch through on_interaction instead.
+    """
+    
+    def __init__(self, *items):
+        super().__init__(timeout=None)
+        for item in items:
+            self.add_item(item)
+        self.stop()
+        self.serialized = None
+    
+    def to_components(self):
+        """Serialized once: the view is never changed after it is built, and may be sent many times"""
+        if self.serialized is None:
+            self.serialized = super().to_components()
+        return self.serialized
+
+class ComponentRouter:
+    """Single handler for every stateless component, routed by the kind encoded in its custom_id"""
+    
+    def __init__(self, ttl_seconds: float = DEFAULT_MENU_TTL_HOURS * 3600):
+        self.ttl_seconds = ttl_seconds  # 0 keeps menus usable forever
+        self.handlers = {}  # kind -> (handler, not_owner_message, command)
+    
+    @classmethod
+    def from_env(cls):
+        """MENU_TTL_HOURS sets how long stateless menus stay usable (0 = no expiry)"""
+        try:
+            ttl_hours = float(os.getenv('MENU_TTL_HOURS', str(DEFAULT_MENU_TTL_HOURS)))
+        except ValueError:
+            print("⚠️ Invalid MENU_TTL_HOURS, using the default")
+            ttl_hours = DEFAULT_MENU_TTL_HOURS
+        return cls(max(0.0, ttl_hours) * 3600)
+    
+    def register(self, kind: str, handler, not_owner_message: str, command: str):
+        """
+        handler(interaction, component) is called for clicks by the user who opened the menu.
+        `command` is what the user runs to get a fresh menu when theirs has expired.
+        """
+        if kind in self.handlers:
+            raise ValueError(f"Component kind '{kind}' is already registered")
+        self.handlers[kind] = (handler, not_owner_message, command)
+    
+    def is_expired(self, component: ComponentId) -> bool:
+        return bool(self.ttl_seconds) and time.time() - component.issued_at > self.ttl_seconds
+    
+    async def dispatch(self, interaction: discord.Interaction) -> bool:
+        """Handle a component interaction; returns False if it isn't one of ours"""
+        if interaction.type != discord.InteractionType.component or not interaction.data:
+            return False
+        component = decode_custom_id(interaction.data.get('custom_id', ''))
+        if component is None or component.kind not in self.handlers:
+            return False
+        
+        handler, not_owner_message, command = self.handlers[component.kind]
+        try:
+            if str(interaction.user.id) != component.user_id:
+                outcome = 'not_owner'
+                await interaction.response.send_message(not_owner_message, ephemeral=True)
+            elif self.is_expired(component):
+                outcome = 'expired'
+                await interaction.response.send_message(
+                    f"⏰ This menu has expired. Use `/{command}` to open a new one!",
+                    ephemeral=True
+                )
+            else:
+                outcome = 'ok'
+                await handler(interaction, component)
+        except Exception as e:
+            outcome = 'error'
+            print(f"Error in component {component.kind}:{component.action}: {e}")
+        
+        COMPONENT_INTERACTIONS.inc(kind=component.kind, outcome=outcome)
+        return True
@@ -3,49 +3,41 @@ Emotion Detection System - Detects bot emotions and sends appropriate GIFs
 """
 
 import re
+import os
+import json
 import random
 
+# Weighted emotion lexicon - edit this file to tune detection without code changes
+LEXICON_FILE = os.path.join(os.path.dirname(__file__), 'emotion_lexicon.json')
+
+# Words (with inner apostrophes) plus the emoticons/punctuation the lexicon uses
+TOKEN_REGEX = re.compile(r"t_t|;_;|:\(|\.\.\.|!!|[a-z0-9]+(?:'[a-z0-9]+)*")
+
+def tokenize(text: str) -> list:
+    """Split lowercased text into lexicon tokens"""
+    if '’' in text:
+        text = text.replace('’', "'")
+    return TOKEN_REGEX.findall(text)
+
+def has_phrase(tokens: list, first: str, rest: list) -> bool:
+    """Check if first is followed by the rest tokens anywhere in tokens"""
+    size = len(rest)
+    position = -1
+    try:
+        while True:
+            position = tokens.index(first, position + 1)
+            if tokens[position + 1:position + 1 + size] == rest:
+                return True
+    except ValueError:
+        return False
+
 class EmotionDetector:
-    def __init__(self):
-        # Anger keywords and patterns (specific angry phrases)
-        self.anger_keywords = [
-            'extremely angry', 'really angry', 'very angry', 'so angry',
-            'angry', 'mad', 'furious', 'pissed', 'annoyed', 'irritated', 'frustrated',
-            'rage', 'livid', 'outraged', 'infuriated', 'enraged', 'irate',
-            'wtf', 'damn', 'hell', 'shit', 'fuck', 'bloody', 'bastard',
-            'stupid', 'idiot', 'moron', 'pathetic',
-            'hate', 'disgusted', 'sick of', 'fed up', 'can\'t stand',
-            'bsdk', 'chutiya', 'madarchod', 'bhenchod', 'saala', 'kamina'
-        ]
+    def __init__(self, lexicon_file: str = LEXICON_FILE):
+        self.lexicon_file = lexicon_file
+        self.load_lexicon()
         
-        # Sadness keywords and patterns (specific sad phrases)
-        self.sadness_keywords = [
-            'very sad', 'deeply sad', 'extremely sad', 'really sad', 'so sad',
-            'sad', 'depressed', 'heartbroken', 'crying', 'tears', 'miserable', 
-            'lonely', 'empty', 'broken', 'devastated', 'crushed', 'hopeless', 
-            'despair', 'grief', 'sorry', 'apologize', 'regret', 'mistake', 
-            'failed', 'failure', 'down', 'blue', 'melancholy', 'gloomy', 
-            'dejected', 'sed', 'rip', 'oof', 'feels bad', 'big sad', 'depression',
-            'hurt', 'disappointed', 'upset'
-        ]
-        
-        # Anger patterns (regex)
-        self.anger_patterns = [
-            r'\b(what|why) the (hell|fuck|damn)\b',
-            r'\b(go to hell|fuck off|shut up|piss off)\b',
-            r'\b(i hate|i\'m done|screw this|this sucks)\b',
-            r'[!]{2,}',  # Multiple exclamation marks
-            r'[A-Z]{3,}',  # ALL CAPS words
-        ]
-        
-        # Sadness patterns (regex)
-        self.sadness_patterns = [
-            r'\b(i\'m sorry|so sorry|my bad|forgive me)\b',
-            r'\b(feel bad|feels bad|feeling down)\b',
-            r'\b(no hope|give up|can\'t do)\b',
-            r'[.]{3,}',  # Multiple dots (ellipsis)
-            r':\(',  # Sad emoticon
-        ]
+        # ALL CAPS words count towards anger (needs the original casing)
+        self.caps_regex = re.compile(r'[A-Z]{3,}')
         
         # Angry GIFs (Tenor URLs)
         self.angry_gifs = [
@@ -60,48 +52,101 @@ class EmotionDetector:
             "https://tenor.com/view/sad-gif-17596606390723064939",
             "https://tenor.com/view/stillesque-gif-25544126",
         ]
+        
+        # GIFs sent per emotion since startup
+        self.gifs_sent = {'angry': 0, 'sad': 0}
     
-    def detect_emotion(self, text: str) -> str:
+    def load_lexicon(self):
+        """Load (or reload) the weighted lexicon and build the token index"""
+        try:
+            with open(self.lexicon_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading emotion lexicon: {e}")
+            if hasattr(self, 'token_index'):
+                return  # Keep the lexicon that's already loaded
+            data = {}
+        
+        # first token -> [(remaining phrase tokens, entry)]
+        token_index = {}
+        # entry -> [(category, weight)]
+        entry_weights = {}
+        
+        for category, entries in data.get('lexicon', {}).items():
+            for entry, weight in entries.items():
+                tokens = tokenize(entry.lower())
+                if not tokens:
+                    print(f"Skipping emotion lexicon entry with no tokens: {entry!r}")
+                    continue
+                
+                entry = ' '.join(tokens)
+                if entry not in entry_weights:
+                    entry_weights[entry] = []
+                    token_index.setdefault(tokens[0], []).append((tokens[1:], entry))
+                entry_weights[entry].append((category, weight))
+        
+        self.token_index = token_index
+        self.entry_weights = entry_weights
+        self.caps_weights = data.get('all_caps', {})
+        self.min_score = data.get('min_score', 2)
+        self.categories = sorted(set(data.get('lexicon', {})) | set(self.caps_weights))
+    
+    def score_emotions(self, text: str) -> dict:
         """
-        Detect emotion in text
-        Returns: 'angry', 'sad', or 'neutral'
+        Weighted emotion score per category from a single tokenization pass.
+        Each lexicon entry counts once however often it appears.
+        Returns: {'anger': float, 'sadness': float, 'anger_strong': float, 'sadness_strong': float}
         """
+        scores = dict.fromkeys(self.categories, 0)
         if not text:
-            return 'neutral'
+            return scores
         
-        text_lower = text.lower()
+        tokens = tokenize(text.lower())
+        token_index = self.token_index
         
-        # Count anger indicators
-        anger_score = 0
-        for keyword in self.anger_keywords:
-            if keyword in text_lower:
-                anger_score += 1
+        # Only tokens that start a lexicon entry need any further work
+        for token in token_index.keys() & set(tokens):
+            for rest, entry in token_index[token]:
+                if not rest or has_phrase(tokens, token, rest):
+                    for category, weight in self.entry_weights[entry]:
+                        scores[category] += weight
         
-        for pattern in self.anger_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                anger_score += 1
+        if self.caps_weights and self.caps_regex.search(text):
+            for category, weight in self.caps_weights.items():
+                scores[category] += weight
         
-        # Count sadness indicators
-        sadness_score = 0
-        for keyword in self.sadness_keywords:
-            if keyword in text_lower:
-                sadness_score += 1
+        return scores
+    
+    def detect_emotion(self, text: str) -> str:
+        """
+        Detect emotion in text
+        Returns: 'angry', 'sad', or 'neutral'
+        """
+        if not text:
+            return 'neutral'
         
-        for pattern in self.sadness_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                sadness_score += 1
+        return self.classify_scores(self.score_emotions(text))
+    
+    def classify_scores(self, scores: dict) -> str:
+        """
+        Pick an emotion from per-category scores
+        Returns: 'angry', 'sad', or 'neutral'
+        """
+        anger_score = scores.get('anger', 0)
+        sadness_score = scores.get('sadness', 0)
+        min_score = self.min_score
         
         # Determine emotion based on scores
-        # Need at least 2 indicators for strong emotion detection
-        if anger_score > sadness_score and anger_score >= 2:
+        # Need at least min_score weight for strong emotion detection
+        if anger_score > sadness_score and anger_score >= min_score:
             return 'angry'
-        elif sadness_score > anger_score and sadness_score >= 2:
+        elif sadness_score > anger_score and sadness_score >= min_score:
             return 'sad'
-        elif anger_score == sadness_score and anger_score >= 2:
+        elif anger_score == sadness_score and anger_score >= min_score:
             # If tied, check for specific strong indicators
-            if any(word in text_lower for word in ['furious', 'rage', 'hate', 'fucking', 'damn']):
+            if scores.get('anger_strong'):
                 return 'angry'
-            elif any(word in text_lower for word in ['heartbroken', 'crying', 'devastated', 'sorry']):
+            elif scores.get('sadness_strong'):
                 return 'sad'
             else:
                 return 'angry'  # Default to angry for tied scores
@@ -120,60 +165,22 @@ class EmotionDetector:
         else:
             return None
     
-    def should_send_gif(self, emotion: str, text: str) -> bool:
+    def should_send_gif(self, emotion: str, text: str = None) -> bool:
         """
-        Determine if a GIF should be sent based on emotion intensity
-        Rate: 1/3 chance (33%) when conditions are met
+        Determine if a GIF should be sent for a detected emotion
+        Rate: 1/3 chance (33%) for any angry or sad response
         """
         if emotion == 'neutral':
             return False
         
-        # If emotion is detected (angry or sad), check for intensity
-        text_lower = text.lower()
-        should_send = False
-        
-        if emotion == 'angry':
-            # Check for extreme anger indicators
-            extreme_indicators = [
-                'extremely angry', 'really angry', 'very angry', 'so angry',
-                'fucking', 'damn', 'absolutely', 'totally', 'completely', 'utterly'
-            ]
-            for indicator in extreme_indicators:
-                if indicator in text_lower:
-                    should_send = True
-                    break
-            
-            # Multiple caps or exclamation marks indicate intensity
-            if re.search(r'[A-Z]{4,}|[!]{3,}', text):
-                should_send = True
-            
-            # If basic anger detected but no extreme indicators, still allow with lower chance
-            if not should_send and emotion == 'angry':
-                should_send = True  # Let rate limiting handle it
-        
-        elif emotion == 'sad':
-            # Check for specific sad phrases
-            sad_phrases = [
-                'very sad', 'deeply sad', 'extremely sad', 'really sad', 'so sad',
-                'heartbroken', 'devastated', 'miserable'
-            ]
-            for phrase in sad_phrases:
-                if phrase in text_lower:
-                    should_send = True
-                    break
-            
-            # Multiple dots or specific phrases indicate intensity
-            if re.search(r'[.]{4,}|:\(|T_T|;_;', text):
-                should_send = True
-            
-            # If basic sadness detected but no extreme indicators, still allow with lower chance
-            if not should_send and emotion == 'sad':
-                should_send = True  # Let rate limiting handle it
-        
-        # Apply 1/3 rate limiting (33% chance)
-        if should_send:
-            import random
-            return random.random() < 0.33  # 1/3 chance
-        
-        return False
+        # Every angry/sad response already qualifies, so no intensity rescan is needed;
+        # the 1/3 rate limit is what keeps GIFs rare
+        return random.random() < 0.33  # 1/3 chance
+    
+    def record_gif_sent(self, emotion: str):
+        """Count a GIF that was actually sent, for tuning the send rate"""
+        self.gifs_sent[emotion] = self.gifs_sent.get(emotion, 0) + 1
     
+    def get_gif_stats(self) -> dict:
+        """Get number of GIFs sent per emotion since startup"""
+        return dict(self.gifs_sent)
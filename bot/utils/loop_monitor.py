@@ -0,0 +1,180 @@
+"""
+Loop Monitor - Measures event loop lag and reports what was blocking it
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from .metrics import REGISTRY
+
+DEFAULT_INTERVAL = 0.5  # seconds between lag probes
+DEFAULT_SLOW_THRESHOLD = 0.1  # seconds of lag worth reporting
+LAG_WINDOW = 1200  # probes kept for percentiles (10 minutes at the default interval)
+STACK_DEPTH = 6  # innermost frames shown for a blocking callback
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    'chatore_event_loop_lag_seconds',
+    'How late the loop lag probe woke up',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = REGISTRY.counter('chatore_event_loop_stalls_total', 'Probes that woke up later than the slow threshold')
+SLOW_CALLBACKS = REGISTRY.counter('chatore_slow_callbacks_total', 'Slow callbacks reported by asyncio debug mode')
+
+def describe_stack(frame) -> str:
+    """Summarize a blocked thread's stack: the callback the loop is running, then the innermost frames"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    
+    # The frame right after asyncio's Handle._run is the callback or coroutine step being executed
+    culprit = None
+    for index, frame in enumerate(frames[:-1]):
+        if frame.f_code.co_name == '_run' and frame.f_code.co_filename.endswith(os.path.join('asyncio', 'events.py')):
+            culprit = frames[index + 1]
+            break
+    
+    def where(frame):
+        code = frame.f_code
+        return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+    
+    inner = " <- ".join(where(frame) for frame in reversed(frames[-STACK_DEPTH:]))
+    if culprit is None:
+        return inner
+    return f"{where(culprit)}; innermost: {inner}"
+
+class SlowCallbackLogHandler(logging.Handler):
+    """Prints and counts asyncio debug-mode "Executing <Task ...> took N seconds" warnings"""
+    
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            if message.startswith('Executing '):
+                SLOW_CALLBACKS.inc()
+                print(f"🐢 Slow callback: {message}")
+        except Exception:
+            pass
+
+class LoopMonitor:
+    """
+    Probes scheduling lag with a sleeping task, and runs a watchdog thread that captures
+    the loop thread's stack while it is blocked so the stall can be blamed on a callback.
+    """
+    
+    def __init__(self, interval: float = DEFAULT_INTERVAL, slow_threshold: float = DEFAULT_SLOW_THRESHOLD, debug: bool = False):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.debug = debug
+        self.lags = deque(maxlen=LAG_WINDOW)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.last_tick = None
+        self.loop_thread_id = None
+        self.blocked_stack = None  # Captured by the watchdog during the current stall
+        self.probe_task = None
+        self.watchdog = None
+        self.stopping = threading.Event()
+        self.log_handler = SlowCallbackLogHandler()
+    
+    @classmethod
+    def from_env(cls):
+        """LOOP_LAG_INTERVAL and SLOW_CALLBACK_MS tune the probe; ASYNCIO_DEBUG=1 turns on asyncio debug mode"""
+        try:
+            interval = float(os.getenv('LOOP_LAG_INTERVAL', str(DEFAULT_INTERVAL)))
+            slow_threshold = float(os.getenv('SLOW_CALLBACK_MS', str(DEFAULT_SLOW_THRESHOLD * 1000))) / 1000
+        except ValueError:
+            print("⚠️ Invalid LOOP_LAG_INTERVAL or SLOW_CALLBACK_MS, using defaults")
+            interval, slow_threshold = DEFAULT_INTERVAL, DEFAULT_SLOW_THRESHOLD
+        debug = os.getenv('ASYNCIO_DEBUG', '').strip().lower() in ('1', 'true', 'yes')
+        return cls(interval, slow_threshold, debug)
+    
+    def start(self):
+        """Start the probe task and watchdog thread (call from the running event loop)"""
+        if self.probe_task:
+            return
+        loop = asyncio.get_running_loop()
+        
+        if self.debug:
+            # asyncio then logs every callback slower than the threshold, naming its task/coroutine
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.slow_threshold
+            logging.getLogger('asyncio').addHandler(self.log_handler)
+            print(f"🐢 asyncio debug mode on (slow callbacks > {self.slow_threshold * 1000:.0f}ms are logged)")
+        
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self.probe_task = loop.create_task(self.probe())
+        self.watchdog = threading.Thread(target=self.watch, name='chatore-loop-watchdog', daemon=True)
+        self.watchdog.start()
+    
+    async def probe(self):
+        """Sleep for the interval and record how late the loop woke us"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_tick = now
+            lag = max(0.0, now - expected)
+            self.record(lag)
+    
+    def record(self, lag: float):
+        self.lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG_SECONDS.observe(lag)
+        
+        if lag >= self.slow_threshold:
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            blocked_in = self.blocked_stack or "no stack captured (stall was shorter than the watchdog's check)"
+            print(f"⚠️ Event loop blocked for {lag * 1000:.0f}ms in: {blocked_in}")
+        self.blocked_stack = None
+    
+    def watch(self):
+        """Watchdog thread: when the probe is overdue, grab what the loop thread is running"""
+        check_every = max(self.slow_threshold / 2, 0.01)
+        while not self.stopping.wait(check_every):
+            overdue = time.monotonic() - self.last_tick - self.interval
+            if overdue < self.slow_threshold or self.blocked_stack is not None:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.blocked_stack = describe_stack(frame)
+    
+    def get_percentiles(self) -> dict:
+        """Lag percentiles (seconds) over the recent window"""
+        lags = sorted(self.lags)
+        
+        def percentile(fraction):
+            if not lags:
+                return 0.0
+            return lags[min(len(lags) - 1, int(len(lags) * fraction))]
+        
+        return {
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': self.max_lag,
+        }
+    
+    def get_stats(self) -> dict:
+        stats = self.get_percentiles()
+        stats.update({
+            'samples': len(self.lags),
+            'stalls': self.stalls,
+            'slow_threshold': self.slow_threshold,
+            'debug': self.debug,
+        })
+        return stats
+    
+    async def close(self):
+        self.stopping.set()
+        if self.probe_task:
+            self.probe_task.cancel()
+            self.probe_task = None
+        logging.getLogger('asyncio').removeHandler(self.log_handler)
@@ -0,0 +1,165 @@
+"""
+Metrics - Lightweight in-process counters, gauges and histograms in Prometheus text format
+"""
+
+import bisect
+import math
+import time
+
+# Seconds; wide enough for Gemini calls that take several seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def format_value(value) -> str:
+    """Render a sample value the way Prometheus expects"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def format_labels(names, values, extra: str = "") -> str:
+    """Render {name="value",...} with Prometheus escaping"""
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Metric:
+    """Base for a named metric family with optional labels"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, description: str, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.samples = {}  # label values tuple -> value
+        self.function = None
+    
+    def label_values(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+    
+    def set_function(self, function):
+        """Read the value from function() at scrape time (unlabelled counters and gauges)"""
+        self.function = function
+    
+    def render(self) -> list:
+        if self.function is not None:
+            try:
+                self.samples[()] = self.function()
+            except Exception as e:
+                print(f"Error reading metric {self.name}: {e}")
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self.samples.items():
+            lines.append(f"{self.name}{format_labels(self.labelnames, values)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self.label_values(labels)
+        self.samples[key] = self.samples.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+    
+    def set(self, value: float, **labels):
+        self.samples[self.label_values(labels)] = value
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self.label_values(labels)
+        self.samples[key] = self.samples.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class HistogramTimer:
+    """Context manager that observes the elapsed time of its block"""
+    
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = None
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+class Histogram(Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name: str, description: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))  # samples: labels -> [bucket counts + one for +Inf, sum, count]
+    
+    def observe(self, value: float, **labels):
+        key = self.label_values(labels)
+        sample = self.samples.get(key)
+        if sample is None:
+            sample = self.samples[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        sample[0][bisect.bisect_left(self.buckets, value)] += 1
+        sample[1] += value
+        sample[2] += 1
+    
+    def time(self, **labels) -> HistogramTimer:
+        """with histogram.time(stage='x'): ... observes how long the block took"""
+        return HistogramTimer(self, labels)
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, (bucket_counts, total, count) in self.samples.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                le = format_labels(self.labelnames, values, f'le="{format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds every metric family and renders them for /metrics"""
+    
+    def __init__(self):
+        self.metrics = {}  # name -> Metric, in registration order
+    
+    def register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as a {existing.kind}")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, description: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+    
+    def gauge(self, name: str, description: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, description, labelnames))
+    
+    def histogram(self, name: str, description: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry served at /metrics
+REGISTRY = MetricsRegistry()
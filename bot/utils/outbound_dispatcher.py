@@ -0,0 +1,279 @@
+"""
+Outbound Dispatcher - Central queue for messages the bot sends to Discord
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+import discord
+
+from .tracing import current_span
+
+# Lower value = sent first
+PRIORITY_REPLY = 0  # Chat replies and rate-limit notices
+PRIORITY_GIF = 1  # Emotion GIFs
+PRIORITY_DM = 2  # Premium welcome DMs, owner notifications
+
+PRIORITY_NAMES = {
+    PRIORITY_REPLY: 'reply',
+    PRIORITY_GIF: 'gif',
+    PRIORITY_DM: 'dm',
+}
+
+# Discord allows roughly 5 messages per 5 seconds per channel
+ROUTE_BUCKET_CAPACITY = 5
+ROUTE_BUCKET_REFILL = 1.0  # tokens per second
+MAX_ROUTE_BUCKETS = 10000
+
+def channel_route(channel) -> str:
+    """Route key for sends into a channel (guild channel or DM)"""
+    return f"channel:{channel.id}"
+
+def user_route(user) -> str:
+    """Route key for DMs sent through a user object"""
+    return f"user:{user.id}"
+
+class RouteBucket:
+    """Token bucket for a single route"""
+    
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+    
+    def try_acquire(self, now: float) -> float:
+        """Take a token; returns 0 on success or the seconds until one is available"""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+    
+    def is_idle(self, now: float) -> bool:
+        """Check if the bucket is full again and can be forgotten"""
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+class RateLimitLogHandler(logging.Handler):
+    """Counts the 429 warnings discord.py logs while it retries internally"""
+    
+    def __init__(self, dispatcher):
+        super().__init__(logging.WARNING)
+        self.dispatcher = dispatcher
+    
+    def emit(self, record):
+        try:
+            if 'rate limited' in record.getMessage():
+                self.dispatcher.rate_limits_observed += 1
+        except Exception:
+            pass
+
+class OutboundDispatcher:
+    """
+    Sends outbound messages through one prioritized queue with per-route token buckets.
+    Chat replies are never dropped; GIFs and DMs are dropped once the queue is full.
+    """
+    
+    def __init__(self, max_queue_size: int = 500, max_concurrent_sends: int = 10):
+        self.max_queue_size = max_queue_size
+        self.queue = []  # heap of [priority, sequence, route, send_func, future, queued_at, max_age]
+        self.sequence = itertools.count()
+        self.low_priority_queued = 0
+        self.buckets = {}  # route -> RouteBucket
+        self.wakeup = None
+        self.slots = None
+        self.max_concurrent_sends = max_concurrent_sends
+        self.worker_task = None
+        self.in_flight = set()
+        
+        # Metrics
+        self.sent = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.dropped = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.failed = 0
+        self.rate_limits_observed = 0
+        self.max_queue_delay = 0.0
+        self.recent_delays = deque(maxlen=1000)
+        self.rate_limit_handler = RateLimitLogHandler(self)
+    
+    def start(self):
+        """Start the dispatch worker (call once the event loop is running)"""
+        if self.worker_task:
+            return
+        self.wakeup = asyncio.Event()
+        self.slots = asyncio.Semaphore(self.max_concurrent_sends)
+        logging.getLogger('discord.http').addHandler(self.rate_limit_handler)
+        self.worker_task = asyncio.get_running_loop().create_task(self.worker())
+    
+    async def send(self, route: str, send_func, priority: int = PRIORITY_REPLY, wait: bool = True, max_age: float = None):
+        """
+        Queue a send. send_func is a zero-argument callable returning the send coroutine.
+        With wait=True returns its result (or raises its error); returns None if the send was dropped.
+        """
+        # Not started yet (e.g. before setup_hook) - send directly
+        if self.worker_task is None:
+            return await send_func()
+        
+        is_low_priority = priority != PRIORITY_REPLY
+        if is_low_priority and self.low_priority_queued >= self.max_queue_size:
+            self.dropped[PRIORITY_NAMES[priority]] += 1
+            return None
+        
+        future = asyncio.get_running_loop().create_future() if wait else None
+        heapq.heappush(self.queue, [priority, next(self.sequence), route, send_func, future, time.monotonic(), max_age, current_span()])
+        if is_low_priority:
+            self.low_priority_queued += 1
+        self.wakeup.set()
+        
+        if future is None:
+            return None
+        return await future
+    
+    def next_ready(self):
+        """Pop the highest-priority item whose route has a token; returns (item, seconds_to_wait)"""
+        now = time.monotonic()
+        throttled = []
+        ready = None
+        wait_time = None
+        
+        while self.queue:
+            item = heapq.heappop(self.queue)
+            priority, _, route, _, future, queued_at, max_age, _ = item
+            
+            # Stale low-priority sends (a GIF a minute late) are dropped
+            if max_age is not None and now - queued_at > max_age:
+                self.finish_low_priority(priority)
+                self.dropped[PRIORITY_NAMES[priority]] += 1
+                if future and not future.done():
+                    future.set_result(None)
+                continue
+            
+            bucket = self.buckets.get(route)
+            if bucket is None:
+                bucket = self.buckets[route] = RouteBucket(ROUTE_BUCKET_CAPACITY, ROUTE_BUCKET_REFILL)
+            
+            delay = bucket.try_acquire(now)
+            if delay == 0:
+                ready = item
+                break
+            
+            throttled.append(item)
+            wait_time = delay if wait_time is None else min(wait_time, delay)
+        
+        for item in throttled:
+            heapq.heappush(self.queue, item)
+        
+        if len(self.buckets) > MAX_ROUTE_BUCKETS:
+            self.prune_buckets(now)
+        
+        return ready, wait_time
+    
+    def prune_buckets(self, now: float):
+        """Forget buckets for routes that have fully recovered"""
+        for route in [route for route, bucket in self.buckets.items() if bucket.is_idle(now)]:
+            del self.buckets[route]
+    
+    def finish_low_priority(self, priority: int):
+        """Release a low-priority queue slot"""
+        if priority != PRIORITY_REPLY:
+            self.low_priority_queued -= 1
+    
+    async def worker(self):
+        """Background task that hands queued sends to Discord in priority order"""
+        while True:
+            try:
+                item, wait_time = self.next_ready()
+                
+                if item is None:
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), timeout=wait_time)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                await self.slots.acquire()
+                task = asyncio.create_task(self.deliver(item))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in outbound dispatcher: {e}")
+    
+    async def deliver(self, item):
+        """Run one send and record its metrics"""
+        priority, _, route, send_func, future, queued_at, _, trace = item
+        self.finish_low_priority(priority)
+        
+        delay = time.monotonic() - queued_at
+        self.recent_delays.append(delay)
+        self.max_queue_delay = max(self.max_queue_delay, delay)
+        trace.set('queue_wait_ms', round(delay * 1000, 3))
+        
+        try:
+            result = await send_func()
+            self.sent[PRIORITY_NAMES[priority]] += 1
+            if future and not future.done():
+                future.set_result(result)
+        except Exception as e:
+            self.failed += 1
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                self.rate_limits_observed += 1
+            if future and not future.done():
+                future.set_exception(e)
+            elif future is None:
+                print(f"Error sending queued message to {route}: {e}")
+        finally:
+            self.slots.release()
+    
+    async def close(self):
+        """Stop the worker, cancel sends still queued and wait for sends already in flight"""
+        if self.worker_task:
+            self.worker_task.cancel()
+            await asyncio.gather(self.worker_task, return_exceptions=True)
+            self.worker_task = None
+        
+        # Nothing will deliver these any more, so don't leave their callers waiting forever
+        for priority, _, _, _, future, _, _, _ in self.queue:
+            self.dropped[PRIORITY_NAMES[priority]] += 1
+            if future and not future.done():
+                future.cancel()
+        self.queue.clear()
+        self.low_priority_queued = 0
+        
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+        logging.getLogger('discord.http').removeHandler(self.rate_limit_handler)
+    
+    def get_stats(self) -> dict:
+        """Get dispatcher metrics: queue depth, delays, drops and 429s"""
+        delays = sorted(self.recent_delays)
+        
+        def percentile(fraction):
+            if not delays:
+                return 0.0
+            return delays[min(len(delays) - 1, int(len(delays) * fraction))]
+        
+        return {
+            'queued': len(self.queue),
+            'queued_low_priority': self.low_priority_queued,
+            'in_flight': len(self.in_flight),
+            'routes_tracked': len(self.buckets),
+            'sent': dict(self.sent),
+            'dropped': dict(self.dropped),
+            'failed': self.failed,
+            'rate_limits_observed': self.rate_limits_observed,
+            'queue_delay_p50': percentile(0.50),
+            'queue_delay_p95': percentile(0.95),
+            'queue_delay_max': self.max_queue_delay,
+        }
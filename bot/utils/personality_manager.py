@@ -2,17 +2,21 @@
 Personality Manager - Handles custom bot personalities for premium users
 """
 
-import json
-import os
-import aiofiles
 from datetime import datetime
 from typing import Dict, Optional
+from .state_backend import StateBackend, JsonFileStateBackend
+from .running_stats import RunningStats
+
+# Totals reported by get_stats besides the number of users
+PERSONALITY_STATS = ('with_custom_age', 'with_custom_traits', 'with_custom_interests', 'total_presets')
 
 class PersonalityManager:
-    def __init__(self):
+    def __init__(self, state: StateBackend = None):
         self.custom_personalities = {}  # user_id -> personality_data
-        self.personality_file = "custom_personalities.json"
-        self.load_personalities()
+        self.state = state or JsonFileStateBackend()
+        self.dirty_users = set()  # Users changed since the last save
+        # Customization totals, kept current on every change instead of counted per call
+        self.running_stats = RunningStats(PERSONALITY_STATS, self.stats_contribution)
         
         # Default personality templates
         self.default_personalities = {
@@ -70,23 +74,53 @@ class PersonalityManager:
             """
         }
     
-    def load_personalities(self):
-        """Load custom personalities from file"""
+    async def load_personalities(self):
+        """Load custom personalities from the state backend"""
         try:
-            if os.path.exists(self.personality_file):
-                with open(self.personality_file, 'r') as f:
-                    self.custom_personalities = json.load(f)
+            self.custom_personalities = await self.state.load('custom_personalities')
         except Exception as e:
             print(f"Error loading custom personalities: {e}")
+        self.running_stats.rebuild(self.custom_personalities)
+    
+    def stats_contribution(self, user_id: str) -> dict:
+        """What one user adds to the customization totals"""
+        personality = self.custom_personalities.get(user_id) or {}
+        return {
+            'with_custom_age': int(bool(personality.get('age'))),
+            'with_custom_traits': int(bool(personality.get('traits'))),
+            'with_custom_interests': int(bool(personality.get('interests'))),
+            'total_presets': len(personality.get('presets', {}))
+        }
     
     async def save_personalities(self):
-        """Save custom personalities to file"""
+        """Save users changed since the last save to the state backend"""
+        if not self.dirty_users:
+            return
+        
+        dirty_users, self.dirty_users = self.dirty_users, set()
         try:
-            async with aiofiles.open(self.personality_file, 'w') as f:
-                await f.write(json.dumps(self.custom_personalities, indent=2))
+            await self.state.save({
+                'custom_personalities': {user_id: self.custom_personalities.get(user_id) for user_id in dirty_users}
+            })
         except Exception as e:
+            self.dirty_users |= dirty_users
             print(f"Error saving custom personalities: {e}")
     
+    async def refresh_user(self, user_id: str):
+        """Re-read a user's personality that other bot processes may have written (shared backends only)"""
+        if not self.state.shared or user_id in self.dirty_users:
+            return
+        
+        try:
+            record = (await self.state.get_records(('custom_personalities',), user_id))['custom_personalities']
+            with self.running_stats.updating(user_id):
+                if record is None:
+                    self.custom_personalities.pop(user_id, None)
+                else:
+                    self.custom_personalities[user_id] = record
+        except Exception as e:
+            print(f"Error refreshing personality for user {user_id}: {e}")
+    
     def has_custom_personality(self, user_id: str) -> bool:
         """Check if user has a custom personality set (not just presets)"""
         if user_id not in self.custom_personalities:
@@ -181,17 +215,19 @@ class PersonalityManager:
             if user_id in self.custom_personalities:
                 existing_presets = self.custom_personalities[user_id].get('presets', {})
             
-            # Set new personality data
-            self.custom_personalities[user_id] = {
-                **personality_data,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            # Restore presets if they existed
-            if existing_presets:
-                self.custom_personalities[user_id]['presets'] = existing_presets
+            with self.running_stats.updating(user_id):
+                # Set new personality data
+                self.custom_personalities[user_id] = {
+                    **personality_data,
+                    'created_at': datetime.now().isoformat(),
+                    'updated_at': datetime.now().isoformat()
+                }
+                
+                # Restore presets if they existed
+                if existing_presets:
+                    self.custom_personalities[user_id]['presets'] = existing_presets
             
+            self.dirty_users.add(user_id)
             return True
         except Exception as e:
             print(f"Error setting custom personality for {user_id}: {e}")
@@ -204,16 +240,18 @@ class PersonalityManager:
                 # Save existing presets before reset
                 existing_presets = self.custom_personalities[user_id].get('presets', {})
                 
-                if existing_presets:
-                    # If user has presets, keep only the presets
-                    self.custom_personalities[user_id] = {
-                        'presets': existing_presets,
-                        'reset_at': datetime.now().isoformat()
-                    }
-                else:
-                    # If no presets, remove the user entirely
-                    del self.custom_personalities[user_id]
+                with self.running_stats.updating(user_id):
+                    if existing_presets:
+                        # If user has presets, keep only the presets
+                        self.custom_personalities[user_id] = {
+                            'presets': existing_presets,
+                            'reset_at': datetime.now().isoformat()
+                        }
+                    else:
+                        # If no presets, remove the user entirely
+                        del self.custom_personalities[user_id]
                 
+                self.dirty_users.add(user_id)
                 return True
             return False
         except Exception as e:
@@ -245,31 +283,33 @@ class PersonalityManager:
             if not self.has_custom_personality(user_id):
                 return False
             
-            # Ensure user entry exists
-            if user_id not in self.custom_personalities:
-                self.custom_personalities[user_id] = {}
-            
-            # Ensure presets dict exists
-            if 'presets' not in self.custom_personalities[user_id]:
-                self.custom_personalities[user_id]['presets'] = {}
-            
-            # Check preset limit (max 5 presets per user)
-            current_presets = self.custom_personalities[user_id]['presets']
-            if len(current_presets) >= 5 and preset_name not in current_presets:
-                return "limit_exceeded"  # Return special code for limit exceeded
-            
-            # Save current personality as preset
-            current_personality = self.custom_personalities[user_id].copy()
-            # Remove presets and metadata from the copy to avoid nested presets
-            for key in ['presets', 'reset_at', 'saved_at']:
-                if key in current_personality:
-                    del current_personality[key]
-            
-            self.custom_personalities[user_id]['presets'][preset_name] = {
-                **current_personality,
-                'saved_at': datetime.now().isoformat()
-            }
+            with self.running_stats.updating(user_id):
+                # Ensure user entry exists
+                if user_id not in self.custom_personalities:
+                    self.custom_personalities[user_id] = {}
+                
+                # Ensure presets dict exists
+                if 'presets' not in self.custom_personalities[user_id]:
+                    self.custom_personalities[user_id]['presets'] = {}
+                
+                # Check preset limit (max 5 presets per user)
+                current_presets = self.custom_personalities[user_id]['presets']
+                if len(current_presets) >= 5 and preset_name not in current_presets:
+                    return "limit_exceeded"  # Return special code for limit exceeded
+                
+                # Save current personality as preset
+                current_personality = self.custom_personalities[user_id].copy()
+                # Remove presets and metadata from the copy to avoid nested presets
+                for key in ['presets', 'reset_at', 'saved_at']:
+                    if key in current_personality:
+                        del current_personality[key]
+                
+                self.custom_personalities[user_id]['presets'][preset_name] = {
+                    **current_personality,
+                    'saved_at': datetime.now().isoformat()
+                }
             
+            self.dirty_users.add(user_id)
             return True
         except Exception as e:
             print(f"Error saving personality preset: {e}")
@@ -291,13 +331,15 @@ class PersonalityManager:
             # Keep existing presets
             existing_presets = self.custom_personalities[user_id].get('presets', {})
             
-            # Update personality with preset data
-            self.custom_personalities[user_id] = {
-                **preset_data,
-                'presets': existing_presets,
-                'updated_at': datetime.now().isoformat()
-            }
+            with self.running_stats.updating(user_id):
+                # Update personality with preset data
+                self.custom_personalities[user_id] = {
+                    **preset_data,
+                    'presets': existing_presets,
+                    'updated_at': datetime.now().isoformat()
+                }
             
+            self.dirty_users.add(user_id)
             return True
         except Exception as e:
             print(f"Error loading personality preset: {e}")
@@ -311,7 +353,9 @@ class PersonalityManager:
                 preset_name not in self.custom_personalities[user_id]['presets']):
                 return False
             
-            del self.custom_personalities[user_id]['presets'][preset_name]
+            with self.running_stats.updating(user_id):
+                del self.custom_personalities[user_id]['presets'][preset_name]
+            self.dirty_users.add(user_id)
             return True
         except Exception as e:
             print(f"Error deleting personality preset: {e}")
@@ -328,11 +372,13 @@ class PersonalityManager:
     def update_personality_field(self, user_id: str, field: str, value) -> bool:
         """Update a specific field in user's personality"""
         try:
-            if user_id not in self.custom_personalities:
-                self.custom_personalities[user_id] = {}
-            
-            self.custom_personalities[user_id][field] = value
-            self.custom_personalities[user_id]['updated_at'] = datetime.now().isoformat()
+            with self.running_stats.updating(user_id):
+                if user_id not in self.custom_personalities:
+                    self.custom_personalities[user_id] = {}
+                
+                self.custom_personalities[user_id][field] = value
+                self.custom_personalities[user_id]['updated_at'] = datetime.now().isoformat()
+            self.dirty_users.add(user_id)
             
             return True
         except Exception as e:
@@ -341,20 +387,11 @@ class PersonalityManager:
 
     def get_stats(self) -> Dict:
         """Get personality customization statistics"""
-        total_custom = len(self.custom_personalities)
-        
-        # Count personalities with different features
-        with_age = sum(1 for p in self.custom_personalities.values() if p.get('age'))
-        with_traits = sum(1 for p in self.custom_personalities.values() if p.get('traits'))
-        with_interests = sum(1 for p in self.custom_personalities.values() if p.get('interests'))
-        
-        # Count presets
-        total_presets = sum(len(p.get('presets', {})) for p in self.custom_personalities.values())
-        
         return {
-            'total_custom_personalities': total_custom,
-            'with_custom_age': with_age,
-            'with_custom_traits': with_traits,
-            'with_custom_interests': with_interests,
-            'total_presets': total_presets
-        }
\ No newline at end of file
+            'total_custom_personalities': len(self.custom_personalities),
+            **self.running_stats.totals
+        }
+    
+    def check_stats(self, repair: bool = False) -> dict:
+        """Verify the running customization totals against a full scan; returns the mismatches"""
+        return self.running_stats.check(self.custom_personalities, repair)
\ No newline at end of file
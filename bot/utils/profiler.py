@@ -0,0 +1,167 @@
+"""
+Profiler - On-demand CPU, memory and asyncio task diagnostics for the running bot
+"""
+
+import asyncio
+import cProfile
+import io
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 120
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+TRACEMALLOC_FRAMES = 10
+
+class ProfilerBusy(Exception):
+    """Raised when a profiling run is requested while another one is active"""
+
+class Profiler:
+    """Runs one time-boxed profile at a time against the event loop thread"""
+    
+    def __init__(self):
+        self.running = None  # Description of the active run, if any
+        self.last_snapshot = None  # Previous tracemalloc snapshot, for diffs
+    
+    def begin(self, description: str):
+        if self.running:
+            raise ProfilerBusy(f"Already running: {self.running}")
+        self.running = description
+    
+    async def run_cprofile(self, seconds: float, top: int = 40) -> tuple:
+        """Deterministic profile of everything the event loop runs for `seconds`; returns (summary, report)"""
+        seconds = max(1.0, min(seconds, MAX_PROFILE_SECONDS))
+        self.begin(f"cProfile for {seconds:.0f}s")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            self.running = None
+        
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats('cumulative').print_stats(top)
+        report.write("\n")
+        stats.sort_stats('tottime').print_stats(top)
+        summary = f"{stats.total_calls:,} calls in {stats.total_tt:.2f}s of CPU over {seconds:.0f}s"
+        return summary, report.getvalue()
+    
+    async def run_sampler(self, seconds: float, interval: float = SAMPLE_INTERVAL, top: int = 40) -> tuple:
+        """
+        Statistical profile: SIGPROF fires every `interval` of CPU time and records the interrupted stack.
+        Cheap enough for production; returns (summary, report) with hottest functions and collapsed stacks.
+        A sampling thread would only ever see the loop parked in select(), since it can't take the GIL mid-callback.
+        """
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError("The sampling profiler needs signal.setitimer (Linux/macOS); use cProfile instead")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("The sampling profiler must run on the main thread's event loop")
+        
+        seconds = max(1.0, min(seconds, MAX_PROFILE_SECONDS))
+        self.begin(f"sampling profiler for {seconds:.0f}s")
+        stacks = Counter()
+        
+        def sample(signum, frame):
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            stacks[tuple(reversed(stack))] += 1
+        
+        previous_handler = signal.signal(signal.SIGPROF, sample)
+        try:
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, previous_handler)
+            self.running = None
+        
+        total = sum(stacks.values())
+        own_time = Counter()
+        for stack, count in stacks.items():
+            own_time[stack[-1]] += count
+        
+        report = io.StringIO()
+        report.write(f"{total} samples, one per {interval * 1000:.1f}ms of CPU, over {seconds:.0f}s\n\n")
+        report.write("Top functions by samples on top of the stack:\n")
+        for function, count in own_time.most_common(top):
+            report.write(f"{count * 100 / max(total, 1):6.2f}%  {count:6}  {function}\n")
+        report.write("\nCollapsed stacks (flamegraph.pl / speedscope format):\n")
+        for stack, count in stacks.most_common():
+            report.write(f"{';'.join(stack)} {count}\n")
+        
+        cpu_seconds = total * interval
+        summary = f"{total} samples, ~{cpu_seconds:.2f}s of CPU ({cpu_seconds * 100 / seconds:.0f}% of one core)"
+        return summary, report.getvalue()
+    
+    def memory_snapshot(self, top: int = 25) -> tuple:
+        """
+        Top allocation sites from tracemalloc, plus growth since the previous snapshot.
+        Starts tracing on first use (returns None) since allocations made earlier aren't tracked.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.last_snapshot = None
+            return None
+        
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        
+        report = io.StringIO()
+        report.write(f"Traced memory: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)\n\n")
+        report.write(f"Top {top} allocation sites:\n")
+        for stat in snapshot.statistics('lineno')[:top]:
+            report.write(f"{stat}\n")
+        
+        if self.last_snapshot is not None:
+            report.write(f"\nTop {top} changes since the previous snapshot:\n")
+            for stat in snapshot.compare_to(self.last_snapshot, 'lineno')[:top]:
+                report.write(f"{stat}\n")
+        
+        biggest = snapshot.statistics('traceback')[:3]
+        if biggest:
+            report.write("\nTracebacks of the 3 largest allocation sites:\n")
+            for stat in biggest:
+                report.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                report.write("\n".join(stat.traceback.format()) + "\n")
+        
+        self.last_snapshot = snapshot
+        summary = f"{current / 1024 / 1024:.1f} MiB traced, peak {peak / 1024 / 1024:.1f} MiB"
+        return summary, report.getvalue()
+    
+    def stop_memory_tracing(self) -> bool:
+        """Stop tracemalloc; returns False if it wasn't running"""
+        self.last_snapshot = None
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        return True
+
+def describe_task(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, '__qualname__', None) or repr(coro)
+
+def dump_tasks() -> tuple:
+    """Counts of live asyncio tasks by coroutine plus every task's current stack; returns (counts, report)"""
+    tasks = asyncio.all_tasks()
+    counts = Counter(describe_task(task) for task in tasks)
+    
+    report = io.StringIO()
+    report.write(f"{len(tasks)} tasks at {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    for name, count in counts.most_common():
+        report.write(f"{count:5}  {name}\n")
+    
+    for task in sorted(tasks, key=describe_task):
+        report.write(f"\n--- {task.get_name()}: {describe_task(task)} ---\n")
+        task.print_stack(limit=8, file=report)
+    return counts, report.getvalue()
@@ -0,0 +1,141 @@
+"""
+Rate Limiter - Per-tier request limits enforced with GCRA: one arrival time per user and limit (O(1) memory)
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+# Limits built from each tier config: (name, config key with the request count, period in seconds)
+TIER_LIMITS = (
+    ('window', 'requests_per_12h', 12 * 3600),  # the advertised quota
+    ('burst', 'requests_per_minute', 60),  # keeps one user from flooding the Gemini keys
+)
+
+# Slack for float rounding when arrival times are compared against the tolerance
+EPSILON = 1e-6
+
+class RateLimit:
+    """
+    `limit` requests per `period` on average, through GCRA. Each request moves the user's
+    theoretical arrival time (TAT) one emission interval (period / limit) ahead, and a request
+    fits while the TAT is at most `tolerance` = (limit - 1) intervals past now. So a burst of
+    `limit` is allowed, after which requests come back one per interval; any `period` seconds
+    admit at most 2 * limit - 1. There is no window edge to burst across, and the state is a single float.
+    """
+    
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.period = period
+        self.interval = period / self.limit  # emission interval
+        self.tolerance = (self.limit - 1) * self.interval
+    
+    def fits(self, arrival: float, now: float) -> bool:
+        return max(arrival, now) - now <= self.tolerance + EPSILON
+    
+    def advance(self, arrival: float, now: float, count: int = 1) -> float:
+        """The arrival time after `count` requests (a negative count gives requests back)"""
+        return max(max(arrival, now) + count * self.interval, now)
+    
+    def used(self, arrival: float, now: float) -> int:
+        """Requests still counted against the limit"""
+        return min(self.limit, max(0, math.ceil((arrival - now) / self.interval - EPSILON)))
+    
+    def retry_after(self, arrival: float, now: float) -> float:
+        """Seconds until the next request fits"""
+        return max(0.0, max(arrival, now) - self.tolerance - now)
+    
+    def refill_after(self, arrival: float, now: float) -> float:
+        """Seconds until the whole limit is available again"""
+        return max(0.0, arrival - now)
+
+class RateLimiter(ABC):
+    """
+    Interface TierManager enforces request limits through. A limiter keeps its per-user state
+    in the dict it is handed (stored in the user's usage record) and, on shared backends, in
+    the state backend so every bot process sees the same limits.
+    """
+    
+    @abstractmethod
+    def limits_for(self, tier_config: Dict) -> List[RateLimit]:
+        """The limits a tier's requests are checked against"""
+    
+    @abstractmethod
+    def blocking_limit(self, arrivals: Dict, limits: List[RateLimit], now: float = None) -> Optional[RateLimit]:
+        """The first limit another request would exceed, or None if it fits them all"""
+    
+    @abstractmethod
+    async def acquire(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit]) -> Optional[RateLimit]:
+        """
+        Check and count one request as a single step (atomic across processes on shared backends).
+        Returns the limit that turned it away, in which case nothing was counted.
+        """
+    
+    @abstractmethod
+    async def record(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit], count: int = 1):
+        """Count `count` requests against every limit, unconditionally (a negative count refunds)"""
+    
+    @abstractmethod
+    async def refresh(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit]):
+        """Re-read what other bot processes recorded (shared backends only)"""
+
+class GcraLimiter(RateLimiter):
+    """Generic cell rate algorithm; arrivals maps each limit name to the user's arrival time"""
+    
+    def __init__(self):
+        self.tier_limits = {}  # configured request counts -> limits, built once per distinct tier setting
+    
+    def limits_for(self, tier_config: Dict) -> List[RateLimit]:
+        key = tuple(tier_config.get(config_key) for _, config_key, _ in TIER_LIMITS)
+        if key not in self.tier_limits:
+            self.tier_limits[key] = [
+                RateLimit(name, tier_config[config_key], period)
+                for name, config_key, period in TIER_LIMITS
+                if tier_config.get(config_key)
+            ]
+        return self.tier_limits[key]
+    
+    def blocking_limit(self, arrivals: Dict, limits: List[RateLimit], now: float = None) -> Optional[RateLimit]:
+        now = time.time() if now is None else now
+        for limit in limits:
+            if not limit.fits(arrivals.get(limit.name, 0.0), now):
+                return limit
+        return None
+    
+    async def acquire(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit]) -> Optional[RateLimit]:
+        if not state.shared:
+            # No await between the check and the update, so concurrent tasks can't both pass
+            now = time.time()
+            blocking = self.blocking_limit(arrivals, limits, now)
+            if blocking is None:
+                for limit in limits:
+                    arrivals[limit.name] = limit.advance(arrivals.get(limit.name, 0.0), now)
+            return blocking
+        
+        taken = []
+        for limit in limits:
+            fits, arrivals[limit.name] = await state.advance_arrival(arrival_key(limit, user_id), limit.interval, limit.tolerance)
+            if not fits:
+                # Give back what the earlier limits already counted
+                await self.record(state, user_id, arrivals, taken, count=-1)
+                return limit
+            taken.append(limit)
+        return None
+    
+    async def record(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit], count: int = 1):
+        for limit in limits:
+            if state.shared:
+                # Atomic across bot processes, so the same request is never counted twice or lost
+                _, arrivals[limit.name] = await state.advance_arrival(arrival_key(limit, user_id), limit.interval, None, count)
+            else:
+                arrivals[limit.name] = limit.advance(arrivals.get(limit.name, 0.0), time.time(), count)
+    
+    async def refresh(self, state, user_id: str, arrivals: Dict, limits: List[RateLimit]):
+        for limit in limits:
+            arrivals[limit.name] = await state.get_arrival(arrival_key(limit, user_id))
+
+def arrival_key(limit: RateLimit, user_id: str) -> str:
+    """Name of a user's shared arrival time for one limit"""
+    return f"arrival:{limit.name}:{user_id}"
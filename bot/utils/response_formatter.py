@@ -0,0 +1,63 @@
+"""
+Response Formatter - Shapes AI replies into Chatore's short chat format
+"""
+
+# Chat reply contract: at most 2 lines and 120 characters in total
+MAX_RESPONSE_LENGTH = 120
+SINGLE_LINE_LENGTH = 60  # Replies this short always stay on one line
+SINGLE_LINE_WORDS = 15  # Replies with this few words always stay on one line
+MAX_FIRST_LINE_LENGTH = 80
+
+def format_chat_response(response: str, max_length: int = MAX_RESPONSE_LENGTH) -> str:
+    """
+    Normalize whitespace, truncate at a word boundary and split into at most 2 lines.
+    Walks the words once, tracking where each word ends in the joined output.
+    """
+    # Literal "\n" from the model counts as whitespace too
+    if '\\' in response:
+        response = response.replace('\\n', ' ')
+    words = response.split()
+    if not words:
+        return ''
+    
+    # Fast path: short replies only need whitespace collapsed
+    if len(response) <= SINGLE_LINE_LENGTH:
+        return ' '.join(words)
+    
+    # ends[i] = length of ' '.join(words[:i + 1])
+    ends = []
+    length = -1
+    truncated = False
+    for word in words:
+        length += len(word) + 1
+        if length > max_length:
+            truncated = True
+            break
+        ends.append(length)
+    
+    if truncated:
+        # Drop words until the '...' fits as well
+        while ends and ends[-1] + 3 > max_length:
+            ends.pop()
+        if not ends:
+            # A single word longer than the whole limit - cut it
+            return words[0][:max_length - 3] + "..."
+    
+    kept = len(ends)
+    text = ' '.join(words[:kept]) + ("..." if truncated else "")
+    
+    # Short replies stay on one line
+    if ends[-1] <= SINGLE_LINE_LENGTH or len(words) <= SINGLE_LINE_WORDS or kept < 2:
+        return text
+    
+    # Break near the middle, keeping the first line under MAX_FIRST_LINE_LENGTH
+    split = kept // 2
+    if ends[split - 1] > MAX_FIRST_LINE_LENGTH:
+        for i in range(max(1, split - 3), min(kept, split + 3)):
+            if ends[i - 1] <= MAX_FIRST_LINE_LENGTH:
+                split = i
+                break
+    
+    # The newline replaces the space after word split - 1, so the length is unchanged
+    position = ends[split - 1]
+    return text[:position] + '\n' + text[position + 1:]
@@ -0,0 +1,55 @@
+"""
+Running Stats - Aggregate counters kept in step with per-user records instead of recomputed by full scans
+"""
+
+from contextlib import contextmanager
+
+class RunningStats:
+    """
+    Totals over every user's record. `contribution(user_id)` returns what one user adds to each
+    total; a mutation takes the user's share out before it changes the record and adds the new
+    share back after, so reading a total is O(1) and keeping it current is O(one record).
+    """
+    
+    def __init__(self, names, contribution):
+        self.names = tuple(names)
+        self.contribution = contribution
+        self.totals = dict.fromkeys(self.names, 0)
+    
+    def __getitem__(self, name):
+        return self.totals[name]
+    
+    def scan(self, user_ids) -> dict:
+        """Full recount over the given users"""
+        totals = dict.fromkeys(self.names, 0)
+        for user_id in user_ids:
+            for name, value in self.contribution(user_id).items():
+                totals[name] += value
+        return totals
+    
+    def rebuild(self, user_ids):
+        """Replace the running totals with a full recount (after a load)"""
+        self.totals = self.scan(user_ids)
+    
+    @contextmanager
+    def updating(self, user_id: str):
+        """Wrap any change to one user's record; the totals follow whatever the record ends up as"""
+        before = self.contribution(user_id)
+        try:
+            yield
+        finally:
+            after = self.contribution(user_id)
+            for name in self.names:
+                self.totals[name] += after[name] - before[name]
+    
+    def check(self, user_ids, repair: bool = False) -> dict:
+        """Compare the running totals with a full scan; returns {name: (running, scanned)} for each mismatch"""
+        scanned = self.scan(user_ids)
+        mismatches = {
+            name: (self.totals[name], scanned[name])
+            for name in self.names
+            if self.totals[name] != scanned[name]
+        }
+        if mismatches and repair:
+            self.totals = scanned
+        return mismatches
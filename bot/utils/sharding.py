@@ -0,0 +1,113 @@
+"""
+Sharding - Gateway shard layout and state ownership for multi-process deployments
+"""
+
+import os
+
+from .state_backend import SHARED_STATE_BACKENDS
+
+class ShardPlan:
+    """
+    Which gateway shards this process runs and which state it owns.
+    
+    Guild events arrive on shard (guild_id >> 22) % shard_count and DMs always arrive on shard 0,
+    so a message is handled by the process that runs its shard. A user talks in guilds on any
+    shard, so per-user state (tier, usage, rate limits, memories) lives in one shared state
+    backend that every process reads and writes; each process's data directory only holds its
+    own traces and usage rollups. Process 0 also owns DMs and slash command sync.
+    """
+    
+    def __init__(self, shard_count=None, process_count: int = 1, process_index: int = 0, state_backend: str = 'json'):
+        self.shard_count = shard_count  # None = single gateway connection, 'auto' = Discord's recommendation
+        self.process_count = process_count
+        self.process_index = process_index
+        self.state_backend = state_backend  # STATE_BACKEND the processes will use
+        self.validate()
+    
+    @classmethod
+    def from_env(cls):
+        """Build the plan from SHARD_COUNT, SHARD_PROCESSES and STATE_BACKEND"""
+        shard_count = os.getenv('SHARD_COUNT', '').strip().lower() or None
+        if shard_count and shard_count != 'auto':
+            try:
+                shard_count = int(shard_count)
+            except ValueError:
+                raise ValueError(f"SHARD_COUNT must be a number or 'auto', got '{shard_count}'")
+        
+        try:
+            process_count = int(os.getenv('SHARD_PROCESSES', '1'))
+        except ValueError:
+            raise ValueError("SHARD_PROCESSES must be a number")
+        
+        state_backend = os.getenv('STATE_BACKEND', 'json').strip().lower()
+        return cls(shard_count, process_count, state_backend=state_backend)
+    
+    def validate(self):
+        """Reject layouts that would leave shards unowned, idle processes or a user's state split between processes"""
+        if self.process_count < 1:
+            raise ValueError("SHARD_PROCESSES must be at least 1")
+        if isinstance(self.shard_count, int) and self.shard_count < 1:
+            raise ValueError("SHARD_COUNT must be at least 1")
+        if self.process_count > 1:
+            if not isinstance(self.shard_count, int):
+                raise ValueError("SHARD_COUNT must be a fixed number when SHARD_PROCESSES is more than 1")
+            if self.shard_count < self.process_count:
+                raise ValueError("SHARD_COUNT must be at least SHARD_PROCESSES so every process runs a shard")
+            if self.state_backend not in SHARED_STATE_BACKENDS:
+                raise ValueError(
+                    f"SHARD_PROCESSES above 1 needs a shared STATE_BACKEND ({' or '.join(SHARED_STATE_BACKENDS)}), "
+                    f"not '{self.state_backend}': a user's tier, usage and memories would diverge between processes"
+                )
+        if not 0 <= self.process_index < self.process_count:
+            raise ValueError(f"Process index {self.process_index} is outside 0-{self.process_count - 1}")
+    
+    @property
+    def is_sharded(self) -> bool:
+        """Whether to run as an AutoShardedBot"""
+        return self.shard_count is not None
+    
+    @property
+    def is_multi_process(self) -> bool:
+        return self.process_count > 1
+    
+    @property
+    def is_primary(self) -> bool:
+        """Process 0 runs shard 0 (DMs) and syncs slash commands"""
+        return self.process_index == 0
+    
+    @property
+    def shard_ids(self):
+        """Shards run by this process (None = all of them)"""
+        if not self.is_multi_process:
+            return None
+        return list(range(self.process_index, self.shard_count, self.process_count))
+    
+    @property
+    def data_dir(self) -> str:
+        """Directory for this process's own files - traces and usage rollups ('' = working directory)"""
+        if not self.is_multi_process:
+            return ''
+        return os.path.join('data', f'process-{self.process_index}')
+    
+    def for_process(self, process_index: int):
+        """Plan for one of the processes in this layout"""
+        return ShardPlan(self.shard_count, self.process_count, process_index, self.state_backend)
+    
+    def shard_for_guild(self, guild_id: int) -> int:
+        """Shard that receives events for a guild"""
+        if not isinstance(self.shard_count, int):
+            return 0
+        return (int(guild_id) >> 22) % self.shard_count
+    
+    def process_for_guild(self, guild_id: int) -> int:
+        """Process that handles messages from a guild"""
+        return self.shard_for_guild(guild_id) % self.process_count
+    
+    def describe(self) -> str:
+        """One-line summary for startup logs"""
+        if not self.is_sharded:
+            return "single gateway connection"
+        if not self.is_multi_process:
+            shards = "recommended number of" if self.shard_count == 'auto' else self.shard_count
+            return f"auto-sharded ({shards} shards)"
+        return f"process {self.process_index + 1}/{self.process_count}, shards {self.shard_ids} of {self.shard_count}"
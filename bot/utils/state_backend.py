@@ -0,0 +1,538 @@
+"""
+State Backend - Storage for user records, usage counters and rate limits (JSON files, SQLite or Redis)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+import aiofiles
+
+# Where each namespace lived before backends existed: file -> top-level key (None = the whole file)
+JSON_FILE_LAYOUT = {
+    'user_memories': ('bot_memory.json', 'user_memories'),
+    'conversation_history': ('bot_memory.json', 'conversation_history'),
+    'user_preferences': ('bot_memory.json', 'user_preferences'),
+    'user_last_activity': ('bot_memory.json', 'user_last_activity'),
+    'user_tiers': ('user_tiers.json', 'user_tiers'),
+    'user_usage': ('user_tiers.json', 'user_usage'),
+    'custom_personalities': ('custom_personalities.json', None),
+}
+
+class StateBackend(ABC):
+    """
+    Interface the managers persist through. Records are JSON-compatible values keyed by user id
+    inside a namespace; counters are named integers that can be incremented atomically, and
+    arrivals are named rate limit timestamps that can be checked and advanced atomically.
+    """
+    
+    # True when other processes may write the same store, so managers must re-read before acting
+    shared = False
+    
+    @abstractmethod
+    async def load(self, namespace: str) -> Dict:
+        """Get every record in a namespace"""
+    
+    @abstractmethod
+    async def get_records(self, namespaces: Iterable[str], key: str) -> Dict:
+        """Get one key's record from several namespaces (missing records are None)"""
+    
+    @abstractmethod
+    async def save(self, changes: Dict[str, Dict]):
+        """Write {namespace: {key: record}}; a record of None deletes the key"""
+    
+    @abstractmethod
+    async def incr(self, name: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to a counter and return the new value; ttl (seconds) applies when the counter is created"""
+    
+    @abstractmethod
+    async def get_counter(self, name: str) -> int:
+        """Current value of a counter (0 if missing or expired)"""
+    
+    @abstractmethod
+    async def advance_arrival(self, name: str, interval: float, tolerance: Optional[float] = None, count: int = 1) -> Tuple[bool, float]:
+        """
+        Atomically move a rate limit arrival time (Unix seconds) `count` intervals ahead of
+        max(stored, now). With a tolerance, nothing changes if max(stored, now) is already more
+        than `tolerance` past now. Returns (changed, arrival time); a negative count gives requests back.
+        """
+    
+    @abstractmethod
+    async def get_arrival(self, name: str) -> float:
+        """Current arrival time of a rate limit (0 if it has fully refilled)"""
+    
+    async def close(self):
+        """Release connections"""
+        pass
+
+class MemoryStateBackend(StateBackend):
+    """Process-local dictionaries - nothing is persisted"""
+    
+    def __init__(self):
+        self.namespaces = {}  # namespace -> {key: record}
+        self.counters = {}  # name -> [value, expires_at]
+        self.arrivals = {}  # rate limit name -> arrival time
+    
+    async def load(self, namespace: str) -> Dict:
+        return dict(self.namespaces.get(namespace, {}))
+    
+    async def get_records(self, namespaces: Iterable[str], key: str) -> Dict:
+        return {namespace: self.namespaces.get(namespace, {}).get(key) for namespace in namespaces}
+    
+    async def save(self, changes: Dict[str, Dict]):
+        for namespace, records in changes.items():
+            stored = self.namespaces.setdefault(namespace, {})
+            for key, record in records.items():
+                if record is None:
+                    stored.pop(key, None)
+                else:
+                    stored[key] = record
+    
+    async def incr(self, name: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        counter = self.counters.get(name)
+        if counter is None or (counter[1] is not None and counter[1] <= now):
+            counter = self.counters[name] = [0, now + ttl if ttl else None]
+        counter[0] += amount
+        return counter[0]
+    
+    async def get_counter(self, name: str) -> int:
+        counter = self.counters.get(name)
+        if counter is None or (counter[1] is not None and counter[1] <= time.time()):
+            return 0
+        return counter[0]
+    
+    async def advance_arrival(self, name: str, interval: float, tolerance: Optional[float] = None, count: int = 1) -> Tuple[bool, float]:
+        now = time.time()
+        arrival = max(self.arrivals.get(name, 0.0), now)
+        if tolerance is not None and arrival - now > tolerance + 1e-6:
+            return False, arrival
+        advanced = arrival + count * interval
+        advanced = max(advanced, now)
+        if advanced > now:
+            self.arrivals[name] = advanced
+        else:
+            self.arrivals.pop(name, None)
+        return True, advanced
+    
+    async def get_arrival(self, name: str) -> float:
+        arrival = self.arrivals.get(name, 0.0)
+        return arrival if arrival > time.time() else 0.0
+
+class JsonFileStateBackend(MemoryStateBackend):
+    """The original JSON files (bot_memory.json, user_tiers.json, custom_personalities.json); single process only"""
+    
+    def __init__(self, data_dir: str = ""):
+        super().__init__()
+        self.data_dir = data_dir
+        self.documents = {}  # file name -> parsed JSON
+    
+    def get_document(self, file_name: str) -> Dict:
+        """Read a state file once and keep it for later saves"""
+        if file_name not in self.documents:
+            document = {}
+            path = os.path.join(self.data_dir, file_name)
+            try:
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        document = json.load(f)
+            except Exception as e:
+                print(f"Error loading {path}: {e}")
+            self.documents[file_name] = document
+        return self.documents[file_name]
+    
+    def get_section(self, namespace: str) -> Dict:
+        """The dict inside a state file that holds a namespace"""
+        file_name, section = JSON_FILE_LAYOUT[namespace]
+        document = self.get_document(file_name)
+        if section is None:
+            return document
+        return document.setdefault(section, {})
+    
+    async def load(self, namespace: str) -> Dict:
+        if namespace not in JSON_FILE_LAYOUT:
+            return await super().load(namespace)
+        return dict(self.get_section(namespace))
+    
+    async def get_records(self, namespaces: Iterable[str], key: str) -> Dict:
+        return {namespace: self.get_section(namespace).get(key) for namespace in namespaces}
+    
+    async def save(self, changes: Dict[str, Dict]):
+        touched_files = set()
+        for namespace, records in changes.items():
+            if namespace not in JSON_FILE_LAYOUT:
+                await super().save({namespace: records})
+                continue
+            
+            stored = self.get_section(namespace)
+            for key, record in records.items():
+                if record is None:
+                    stored.pop(key, None)
+                else:
+                    stored[key] = record
+            touched_files.add(JSON_FILE_LAYOUT[namespace][0])
+        
+        for file_name in touched_files:
+            async with aiofiles.open(os.path.join(self.data_dir, file_name), 'w') as f:
+                await f.write(json.dumps(self.documents[file_name], indent=2))
+
+class SQLiteStateBackend(StateBackend):
+    """One SQLite database shared by every bot process on the host (WAL mode)"""
+    
+    shared = True
+    
+    def __init__(self, path: str = "chatore_state.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL,
+                expires_at REAL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS arrivals (
+                name TEXT PRIMARY KEY,
+                arrival REAL NOT NULL
+            )
+        """)
+    
+    def run(self, func, *args):
+        """Run a blocking database call off the event loop"""
+        def locked():
+            with self.lock:
+                return func(*args)
+        return asyncio.to_thread(locked)
+    
+    async def load(self, namespace: str) -> Dict:
+        def query():
+            rows = self.connection.execute("SELECT key, value FROM records WHERE namespace = ?", (namespace,))
+            return {key: json.loads(value) for key, value in rows}
+        return await self.run(query)
+    
+    async def get_records(self, namespaces: Iterable[str], key: str) -> Dict:
+        namespaces = list(namespaces)
+        def query():
+            placeholders = ','.join('?' * len(namespaces))
+            rows = self.connection.execute(
+                f"SELECT namespace, value FROM records WHERE key = ? AND namespace IN ({placeholders})",
+                (key, *namespaces)
+            )
+            found = {namespace: json.loads(value) for namespace, value in rows}
+            return {namespace: found.get(namespace) for namespace in namespaces}
+        return await self.run(query)
+    
+    async def save(self, changes: Dict[str, Dict]):
+        upserts = []
+        deletes = []
+        for namespace, records in changes.items():
+            for key, record in records.items():
+                if record is None:
+                    deletes.append((namespace, key))
+                else:
+                    upserts.append((namespace, key, json.dumps(record)))
+        if not upserts and not deletes:
+            return
+        
+        def write():
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.executemany(
+                    "INSERT INTO records (namespace, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+                    upserts
+                )
+                self.connection.executemany("DELETE FROM records WHERE namespace = ? AND key = ?", deletes)
+        await self.run(write)
+    
+    async def incr(self, name: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        def write():
+            now = time.time()
+            expires_at = now + ttl if ttl else None
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                # An expired counter starts over instead of adding to the old value
+                self.connection.execute(
+                    "INSERT INTO counters (name, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET "
+                    "value = CASE WHEN counters.expires_at <= ? THEN excluded.value ELSE counters.value + excluded.value END, "
+                    "expires_at = CASE WHEN counters.expires_at <= ? THEN excluded.expires_at ELSE counters.expires_at END",
+                    (name, amount, expires_at, now, now)
+                )
+                row = self.connection.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+                
+                # Expired counters are dropped now and then so the table stays small
+                if row[0] == amount:
+                    self.connection.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+            return row[0]
+        return await self.run(write)
+    
+    async def get_counter(self, name: str) -> int:
+        def query():
+            row = self.connection.execute(
+                "SELECT value FROM counters WHERE name = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (name, time.time())
+            ).fetchone()
+            return row[0] if row else 0
+        return await self.run(query)
+    
+    async def advance_arrival(self, name: str, interval: float, tolerance: Optional[float] = None, count: int = 1) -> Tuple[bool, float]:
+        def write():
+            now = time.time()
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                row = self.connection.execute("SELECT arrival FROM arrivals WHERE name = ?", (name,)).fetchone()
+                arrival = max(row[0] if row else 0.0, now)
+                if tolerance is not None and arrival - now > tolerance + 1e-6:
+                    return False, arrival
+                advanced = arrival + count * interval
+                advanced = max(advanced, now)
+                self.connection.execute(
+                    "INSERT INTO arrivals (name, arrival) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET arrival = excluded.arrival",
+                    (name, advanced)
+                )
+                
+                # Arrival times in the past mean a fully refilled limit, so they are dropped now and then
+                if row is None:
+                    self.connection.execute("DELETE FROM arrivals WHERE arrival <= ?", (now,))
+            return True, advanced
+        return await self.run(write)
+    
+    async def get_arrival(self, name: str) -> float:
+        def query():
+            row = self.connection.execute(
+                "SELECT arrival FROM arrivals WHERE name = ? AND arrival > ?",
+                (name, time.time())
+            ).fetchone()
+            return row[0] if row else 0.0
+        return await self.run(query)
+    
+    async def close(self):
+        await self.run(self.connection.close)
+
+class RedisError(RuntimeError):
+    """An error reply (-ERR ...) from the Redis server"""
+
+class RedisStateBackend(StateBackend):
+    """
+    Redis (or anything speaking its protocol) shared by every bot process.
+    Namespaces are hashes of JSON records; counters are plain keys updated with INCRBY.
+    """
+    
+    # Check-and-set of a rate limit arrival time in one step; the key expires once the limit has refilled
+    ADVANCE_ARRIVAL_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local arrival = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), now)
+        local tolerance = tonumber(ARGV[3])
+        if tolerance >= 0 and arrival - now > tolerance + 0.000001 then
+            return {0, tostring(arrival)}
+        end
+        local advanced = arrival + tonumber(ARGV[2]) * tonumber(ARGV[4])
+        advanced = math.max(advanced, now)
+        if advanced > now then
+            redis.call('SET', KEYS[1], tostring(advanced), 'PX', math.ceil((advanced - now) * 1000))
+        else
+            redis.call('DEL', KEYS[1])
+        end
+        return {1, tostring(advanced)}
+    """
+    
+    shared = True
+    
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "chatore"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip('/') or 0)
+        self.prefix = prefix
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()
+    
+    def namespace_key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}"
+    
+    def counter_key(self, name: str) -> str:
+        return f"{self.prefix}:counter:{name}"
+    
+    @staticmethod
+    def encode(command) -> bytes:
+        """Encode one command as a RESP array of bulk strings"""
+        parts = [f"*{len(command)}\r\n".encode()]
+        for argument in command:
+            data = argument if isinstance(argument, bytes) else str(argument).encode()
+            parts.append(f"${len(data)}\r\n".encode())
+            parts.append(data + b"\r\n")
+        return b"".join(parts)
+    
+    async def read_reply(self):
+        """Read one RESP reply; error replies are returned as RedisError so the rest of a pipeline can still be read"""
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            return RedisError(f"Redis error: {payload.decode()}")
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            size = int(payload)
+            if size == -1:
+                return None
+            data = await self.reader.readexactly(size + 2)
+            return data[:-2].decode()
+        if kind == b'*':
+            size = int(payload)
+            if size == -1:
+                return None
+            return [await self.read_reply() for _ in range(size)]
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+    
+    @staticmethod
+    def first_error(replies):
+        """The first error reply in a pipeline, including errors inside a transaction's EXEC reply"""
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                return reply
+            if isinstance(reply, list):
+                for item in reply:
+                    if isinstance(item, RedisError):
+                        return item
+        return None
+    
+    async def connect(self):
+        """Open the connection and authenticate/select the database"""
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.password))
+        if self.database:
+            setup.append(('SELECT', self.database))
+        if setup:
+            self.writer.write(b"".join(self.encode(command) for command in setup))
+            await self.writer.drain()
+            error = self.first_error([await self.read_reply() for _ in setup])
+            if error:
+                raise error
+    
+    def disconnect(self):
+        """Drop the connection; the next call reconnects"""
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+    
+    async def execute(self, *commands) -> list:
+        """Send commands in one pipeline and return their replies in order (raises the first error reply)"""
+        async with self.lock:
+            try:
+                if self.writer is None:
+                    await self.connect()
+                self.writer.write(b"".join(self.encode(command) for command in commands))
+                await self.writer.drain()
+                # Read every reply even after an error, or the next caller would get this pipeline's leftovers
+                replies = [await self.read_reply() for _ in commands]
+            except BaseException:
+                # Broken connection, garbled reply or cancellation mid-pipeline: unread replies may be left on the socket
+                self.disconnect()
+                raise
+        
+        error = self.first_error(replies)
+        if error:
+            raise error
+        return replies
+    
+    async def load(self, namespace: str) -> Dict:
+        reply = (await self.execute(('HGETALL', self.namespace_key(namespace))))[0] or []
+        return {reply[i]: json.loads(reply[i + 1]) for i in range(0, len(reply), 2)}
+    
+    async def get_records(self, namespaces: Iterable[str], key: str) -> Dict:
+        namespaces = list(namespaces)
+        replies = await self.execute(*[('HGET', self.namespace_key(namespace), key) for namespace in namespaces])
+        return {namespace: json.loads(reply) if reply is not None else None for namespace, reply in zip(namespaces, replies)}
+    
+    async def save(self, changes: Dict[str, Dict]):
+        commands = []
+        for namespace, records in changes.items():
+            upserts = []
+            deletes = []
+            for key, record in records.items():
+                if record is None:
+                    deletes.append(key)
+                else:
+                    upserts.extend((key, json.dumps(record)))
+            if upserts:
+                commands.append(('HSET', self.namespace_key(namespace), *upserts))
+            if deletes:
+                commands.append(('HDEL', self.namespace_key(namespace), *deletes))
+        if commands:
+            await self.execute(*commands)
+    
+    async def incr(self, name: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        key = self.counter_key(name)
+        if not ttl:
+            return (await self.execute(('INCRBY', key, amount)))[0]
+        
+        # Create with the expiry if missing, then add - both inside one transaction
+        replies = await self.execute(
+            ('MULTI',),
+            ('SET', key, 0, 'EX', int(ttl), 'NX'),
+            ('INCRBY', key, amount),
+            ('EXEC',)
+        )
+        return replies[-1][1]
+    
+    async def get_counter(self, name: str) -> int:
+        value = (await self.execute(('GET', self.counter_key(name))))[0]
+        return int(value) if value is not None else 0
+    
+    async def advance_arrival(self, name: str, interval: float, tolerance: Optional[float] = None, count: int = 1) -> Tuple[bool, float]:
+        changed, arrival = (await self.execute((
+            'EVAL', self.ADVANCE_ARRIVAL_SCRIPT, 1, self.counter_key(name),
+            repr(time.time()), repr(interval), repr(-1.0 if tolerance is None else tolerance), count
+        )))[0]
+        return bool(changed), float(arrival)
+    
+    async def get_arrival(self, name: str) -> float:
+        value = (await self.execute(('GET', self.counter_key(name))))[0]
+        return float(value) if value is not None else 0.0
+    
+    async def close(self):
+        self.disconnect()
+
+# Backends several bot processes can use at once
+SHARED_STATE_BACKENDS = ('sqlite', 'redis')
+
+def create_state_backend(data_dir: str = "") -> StateBackend:
+    """Pick the backend from STATE_BACKEND (json, memory, sqlite or redis)"""
+    backend = os.getenv('STATE_BACKEND', 'json').strip().lower()
+    
+    if backend == 'memory':
+        return MemoryStateBackend()
+    if backend == 'sqlite':
+        return SQLiteStateBackend(os.getenv('STATE_SQLITE_PATH', 'chatore_state.db'))
+    if backend == 'redis':
+        return RedisStateBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    if backend != 'json':
+        print(f"⚠️ Unknown STATE_BACKEND '{backend}', using JSON files")
+    return JsonFileStateBackend(data_dir)
@@ -0,0 +1,109 @@
+"""
+Text Chunker - Splits long answers into Discord-sized pieces at natural boundaries
+"""
+
+import bisect
+import re
+
+# Discord embed limits
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000
+
+FENCE_REGEX = re.compile(r'```')
+# Sentence end: punctuation (plus closing quotes/brackets/markdown) followed by whitespace
+SENTENCE_END_REGEX = re.compile(r'[.!?]+[)"\'\]*_]*(?=\s)')
+CLOSE_FENCE = '\n```'
+MAX_FENCE_LANGUAGE = 16
+
+def in_code_block(fence_ends, position):
+    """Check whether position falls inside a ``` code block"""
+    return bisect.bisect_right(fence_ends, position) % 2 == 1
+
+def last_outside_code(text, needle, low, high, fence_ends):
+    """Last index of needle in text[low:high] that is not inside a code block, or -1"""
+    position = text.rfind(needle, low, high)
+    while position != -1 and in_code_block(fence_ends, position):
+        position = text.rfind(needle, low, position)
+    return position
+
+def find_break(text, start, limit, fence_ends):
+    """Pick where a chunk starting at start should end, preferring paragraphs, then sentences, then lines, then words"""
+    # Never settle for a chunk less than half full when a worse boundary is available
+    floor = start + (limit - start) // 2
+    
+    position = last_outside_code(text, '\n\n', floor, limit, fence_ends)
+    if position != -1:
+        return position
+    
+    position = -1
+    for match in SENTENCE_END_REGEX.finditer(text, floor, limit):
+        if not in_code_block(fence_ends, match.start()):
+            position = match.end()
+    if position != -1:
+        return position
+    
+    position = last_outside_code(text, '\n', floor, limit, fence_ends)
+    if position != -1:
+        return position
+    
+    # Inside a long code block - split on a line, the fence gets closed and reopened
+    for separator in ('\n', ' '):
+        position = text.rfind(separator, floor, limit)
+        if position != -1:
+            return position
+    
+    # No whitespace at all - hard cut, but never through a ``` marker
+    for fence_end in fence_ends:
+        if fence_end - 3 < limit < fence_end:
+            return max(fence_end - 3, start + 1)
+    return limit
+
+def fence_opening(text, fence_end):
+    """Rebuild the opening ``` line (with its language tag) of the block ending the fence at fence_end"""
+    line_end = text.find('\n', fence_end)
+    if line_end == -1:
+        line_end = len(text)
+    language = text[fence_end:line_end].strip()
+    if len(language) > MAX_FENCE_LANGUAGE or ' ' in language:
+        language = ''
+    return '```' + language + '\n'
+
+def iter_chunks(text: str, max_length: int = EMBED_DESCRIPTION_LIMIT):
+    """
+    Yield pieces of text no longer than max_length in a single forward walk.
+    Code blocks that have to be split are closed and reopened so each piece renders on its own.
+    """
+    text = text.strip()
+    text_length = len(text)
+    fence_ends = [match.end() for match in FENCE_REGEX.finditer(text)]
+    # Room to close a code block at the end of a chunk
+    reserve = len(CLOSE_FENCE) if fence_ends else 0
+    
+    start = 0
+    while start < text_length:
+        open_fences = bisect.bisect_right(fence_ends, start)
+        prefix = fence_opening(text, fence_ends[open_fences - 1]) if open_fences % 2 else ''
+        
+        if text_length - start <= max_length - len(prefix):
+            yield prefix + text[start:]
+            return
+        
+        limit = start + max(max_length - len(prefix) - reserve, 1)
+        end = find_break(text, start, limit, fence_ends)
+        chunk = prefix + text[start:end].rstrip()
+        
+        if in_code_block(fence_ends, end):
+            chunk += CLOSE_FENCE
+            # Keep code indentation, only drop the line break we split on
+            if text.startswith('\n', end):
+                end += 1
+        else:
+            while end < text_length and text[end].isspace():
+                end += 1
+        
+        yield chunk
+        start = end
+
+def chunk_text(text: str, max_length: int = EMBED_DESCRIPTION_LIMIT):
+    """Split text into a list of pieces no longer than max_length"""
+    return list(iter_chunks(text, max_length))
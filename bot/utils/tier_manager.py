@@ -2,20 +2,82 @@
 Tier Manager - Handles user subscription tiers and rate limiting
 """
 
-import json
-import os
-import aiofiles
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 import asyncio
+import time
 import discord
+from .outbound_dispatcher import user_route, PRIORITY_DM
+from .rate_limiter import RateLimiter, GcraLimiter
+from .state_backend import StateBackend, JsonFileStateBackend
+from .running_stats import RunningStats
+
+TIER_NAMESPACES = ('user_tiers', 'user_usage')
+
+def format_wait(seconds: float) -> str:
+    """Seconds as a short wait for users: 40 seconds, 12 minutes, 3.5 hours"""
+    if seconds < 60:
+        return f"{max(1, round(seconds))} seconds"
+    if seconds < 3600:
+        return f"{round(seconds / 60)} minutes"
+    return f"{seconds / 3600:.1f} hours"
+
+def create_rate_limit_embed(usage_info: Dict) -> discord.Embed:
+    """The reply for a request turned away by reserve_request"""
+    tier = usage_info['tier']
+    
+    if usage_info['limited_by'] == 'burst':
+        embed = discord.Embed(
+            title="🐢 Slow Down a Little",
+            description=f"You can send up to {usage_info['limit']} requests per minute.",
+            color=0xFF9933
+        )
+        embed.add_field(
+            name="⏳ Try Again",
+            value=f"In about {format_wait(usage_info['retry_after'])}",
+            inline=False
+        )
+        return embed
+    
+    embed = discord.Embed(
+        title="⏰ Rate Limit Reached",
+        description=f"You've reached your {tier} tier limit of {usage_info['limit']} requests per 12 hours.",
+        color=0xFF9933
+    )
+    
+    embed.add_field(
+        name="📊 Your Usage",
+        value=f"**Used**: {usage_info['current_usage']}/{usage_info['limit']} requests\n**Next request in**: {format_wait(usage_info['retry_after'])}",
+        inline=False
+    )
+    
+    if tier == 'free':
+        embed.add_field(
+            name="⭐ Upgrade to Premium",
+            value="Get 200 requests per 12 hours with Premium!\nUse `/subscribe` to upgrade.",
+            inline=False
+        )
+    
+    embed.set_footer(text="Use /plan to check your current usage")
+    return embed
+
+class UsageReservation:
+    """One request taken from a user's limits by reserve_request, held until it is committed or refunded"""
+    
+    def __init__(self, user_id: str, limits: list):
+        self.user_id = user_id
+        self.limits = limits
+        self.settled = False
 
 class TierManager:
-    def __init__(self):
+    def __init__(self, state: StateBackend = None, limiter: RateLimiter = None):
         self.user_tiers = {}  # user_id -> tier_info
         self.user_usage = {}  # user_id -> usage_info
-        self.tier_file = "user_tiers.json"
-        self.load_tiers()
+        self.state = state or JsonFileStateBackend()
+        self.limiter = limiter or GcraLimiter()  # Enforces each tier's requests_per_12h and requests_per_minute
+        self.dirty_users = set()  # Users changed since the last save
+        # Tier distribution for /tier_stats, kept current on every tier change
+        self.running_stats = RunningStats(('free_users',), self.stats_contribution)
         
         # Tier configurations
         self.tier_configs = {
@@ -23,6 +85,7 @@ class TierManager:
                 'name': 'Free Tier',
                 'context_limit': 12,
                 'requests_per_12h': 40,
+                'requests_per_minute': 6,  # Burst limit
                 'price': 0,
                 'features': [
                     '12 message context',
@@ -37,6 +100,7 @@ class TierManager:
                 'name': 'Premium Tier',
                 'context_limit': 25,
                 'requests_per_12h': 200,
+                'requests_per_minute': 15,  # Burst limit
                 'price': 1.50,  # USD per month
                 'features': [
                     '25 message context',
@@ -55,39 +119,63 @@ class TierManager:
             }
         }
     
-    def load_tiers(self):
-        """Load tier data from file"""
+    async def load_tiers(self):
+        """Load tier data from the state backend"""
         try:
-            if os.path.exists(self.tier_file):
-                with open(self.tier_file, 'r') as f:
-                    data = json.load(f)
-                    self.user_tiers = data.get('user_tiers', {})
-                    self.user_usage = data.get('user_usage', {})
+            self.user_tiers = await self.state.load('user_tiers')
+            self.user_usage = await self.state.load('user_usage')
         except Exception as e:
             print(f"Error loading tier data: {e}")
+        self.running_stats.rebuild(self.user_tiers)
+    
+    def stats_contribution(self, user_id: str) -> dict:
+        """What one user adds to the tier totals"""
+        tier_info = self.user_tiers.get(user_id)
+        return {'free_users': int(tier_info is not None and tier_info['tier'] == 'free')}
     
     async def save_tiers(self):
-        """Save tier data to file"""
+        """Save users changed since the last save to the state backend"""
+        if not self.dirty_users:
+            return
+        
+        dirty_users, self.dirty_users = self.dirty_users, set()
         try:
-            data = {
-                'user_tiers': self.user_tiers,
-                'user_usage': self.user_usage
-            }
-            async with aiofiles.open(self.tier_file, 'w') as f:
-                await f.write(json.dumps(data, indent=2))
+            await self.state.save({
+                'user_tiers': {user_id: self.user_tiers.get(user_id) for user_id in dirty_users},
+                'user_usage': {user_id: self.user_usage.get(user_id) for user_id in dirty_users}
+            })
         except Exception as e:
+            self.dirty_users |= dirty_users
             print(f"Error saving tier data: {e}")
     
+    async def refresh_user(self, user_id: str):
+        """Re-read a user's tier, usage and shared rate limits (shared backends only)"""
+        if not self.state.shared or user_id in self.dirty_users:
+            return
+        
+        try:
+            records = await self.state.get_records(TIER_NAMESPACES, user_id)
+            if records['user_tiers'] is not None:
+                with self.running_stats.updating(user_id):
+                    self.user_tiers[user_id] = records['user_tiers']
+            if records['user_usage'] is not None:
+                self.user_usage[user_id] = records['user_usage']
+                await self.limiter.refresh(self.state, user_id, self.get_arrivals(user_id), self.get_user_limits(user_id))
+        except Exception as e:
+            print(f"Error refreshing tier data for user {user_id}: {e}")
+    
     def get_user_tier(self, user_id: str) -> str:
         """Get user's current tier (default: free)"""
         if user_id not in self.user_tiers:
             # Initialize new user as free tier
-            self.user_tiers[user_id] = {
-                'tier': 'free',
-                'subscribed_at': datetime.now().isoformat(),
-                'expires_at': None,  # Free tier never expires
-                'auto_renew': False
-            }
+            with self.running_stats.updating(user_id):
+                self.user_tiers[user_id] = {
+                    'tier': 'free',
+                    'subscribed_at': datetime.now().isoformat(),
+                    'expires_at': None,  # Free tier never expires
+                    'auto_renew': False
+                }
+            self.dirty_users.add(user_id)
         
         user_tier_info = self.user_tiers[user_id]
         
@@ -96,8 +184,10 @@ class TierManager:
             expires_at = datetime.fromisoformat(user_tier_info['expires_at'])
             if datetime.now() > expires_at:
                 # Downgrade to free tier
-                user_tier_info['tier'] = 'free'
-                user_tier_info['expires_at'] = None
+                with self.running_stats.updating(user_id):
+                    user_tier_info['tier'] = 'free'
+                    user_tier_info['expires_at'] = None
+                self.dirty_users.add(user_id)
                 print(f"User {user_id} premium subscription expired, downgraded to free")
         
         return user_tier_info['tier']
@@ -124,48 +214,89 @@ class TierManager:
         """Initialize usage tracking for user"""
         if user_id not in self.user_usage:
             self.user_usage[user_id] = {
-                'requests_12h': 0,
-                'last_reset': datetime.now().isoformat(),
+                'arrivals': {},
                 'total_requests': 0,
                 'first_request': datetime.now().isoformat()
             }
+            self.dirty_users.add(user_id)
     
-    def reset_usage_if_needed(self, user_id: str):
-        """Reset usage counter if 12 hours have passed"""
+    def get_arrivals(self, user_id: str) -> Dict:
+        """The user's rate limiter state (limit name -> arrival time), stored in their usage record"""
         self.initialize_user_usage(user_id)
         
         usage = self.user_usage[user_id]
-        last_reset = datetime.fromisoformat(usage['last_reset'])
+        if 'arrivals' not in usage:
+            # Records from the fixed 12 hour window start over with a full allowance
+            usage.pop('requests_12h', None)
+            usage.pop('last_reset', None)
+            usage['arrivals'] = {}
+            self.dirty_users.add(user_id)
+        return usage['arrivals']
+    
+    def get_user_limits(self, user_id: str) -> list:
+        """Rate limits for the user's tier, the 12 hour quota first"""
+        return self.limiter.limits_for(self.get_tier_config(self.get_user_tier(user_id)))
+    
+    def describe_usage(self, tier: str, limits: list, arrivals: Dict, blocking=None) -> Dict:
+        """usage_info for a request: the limit it hit, or the 12 hour quota if it fit"""
+        now = time.time()
+        reported = blocking or limits[0]
+        arrival = arrivals.get(reported.name, 0.0)
         
-        # Reset if more than 12 hours have passed
-        if datetime.now() - last_reset > timedelta(hours=12):
-            usage['requests_12h'] = 0
-            usage['last_reset'] = datetime.now().isoformat()
+        return {
+            'current_usage': reported.used(arrival, now),
+            'limit': reported.limit,
+            'limited_by': blocking.name if blocking else None,
+            'retry_after': reported.retry_after(arrival, now),
+            'tier': tier
+        }
     
     def can_make_request(self, user_id: str) -> Tuple[bool, Dict]:
-        """Check if user can make a request based on their tier limits"""
-        self.reset_usage_if_needed(user_id)
+        """Check if user can make a request based on their tier limits (counts nothing, see reserve_request)"""
+        tier = self.get_user_tier(user_id)
+        limits = self.limiter.limits_for(self.get_tier_config(tier))
+        arrivals = self.get_arrivals(user_id)
         
+        blocking = self.limiter.blocking_limit(arrivals, limits)
+        return blocking is None, self.describe_usage(tier, limits, arrivals, blocking)
+    
+    async def reserve_request(self, user_id: str) -> Tuple[Optional[UsageReservation], Dict]:
+        """
+        Check the user's limits and take a request from them in one step, so concurrent messages
+        can't all pass the check before any of them is counted. Returns (None, usage_info) when a
+        limit is reached; otherwise the reservation must be passed to commit_usage or refund_usage.
+        """
         tier = self.get_user_tier(user_id)
-        config = self.get_tier_config(tier)
-        usage = self.user_usage[user_id]
+        limits = self.limiter.limits_for(self.get_tier_config(tier))
+        arrivals = self.get_arrivals(user_id)
         
-        can_request = usage['requests_12h'] < config['requests_per_12h']
+        blocking = await self.limiter.acquire(self.state, user_id, arrivals, limits)
+        usage_info = self.describe_usage(tier, limits, arrivals, blocking)
+        if blocking is not None:
+            return None, usage_info
         
-        return can_request, {
-            'current_usage': usage['requests_12h'],
-            'limit': config['requests_per_12h'],
-            'tier': tier,
-            'resets_at': (datetime.fromisoformat(usage['last_reset']) + timedelta(hours=12)).isoformat()
-        }
+        self.dirty_users.add(user_id)
+        return UsageReservation(user_id, limits), usage_info
     
-    def increment_usage(self, user_id: str):
-        """Increment user's request usage"""
-        self.reset_usage_if_needed(user_id)
+    def commit_usage(self, reservation: UsageReservation):
+        """The reserved request was answered: keep it counted and add it to the lifetime total"""
+        if reservation.settled:
+            return
+        reservation.settled = True
         
-        usage = self.user_usage[user_id]
-        usage['requests_12h'] += 1
-        usage['total_requests'] += 1
+        self.initialize_user_usage(reservation.user_id)
+        self.user_usage[reservation.user_id]['total_requests'] += 1
+        self.dirty_users.add(reservation.user_id)
+    
+    async def refund_usage(self, reservation: UsageReservation):
+        """The reserved request failed: give it back to the user's limits (no-op once settled)"""
+        if reservation.settled:
+            return
+        reservation.settled = True
+        
+        arrivals = self.get_arrivals(reservation.user_id)
+        await self.limiter.record(self.state, reservation.user_id, arrivals, reservation.limits, count=-1)
+        self.dirty_users.add(reservation.user_id)
     
     def get_context_limit(self, user_id: str) -> int:
         """Get context limit for user based on their tier"""
@@ -178,13 +309,15 @@ class TierManager:
         try:
             expires_at = datetime.now() + timedelta(days=30 * duration_months)
             
-            self.user_tiers[user_id] = {
-                'tier': 'premium',
-                'subscribed_at': datetime.now().isoformat(),
-                'expires_at': expires_at.isoformat(),
-                'auto_renew': False,
-                'duration_months': duration_months
-            }
+            with self.running_stats.updating(user_id):
+                self.user_tiers[user_id] = {
+                    'tier': 'premium',
+                    'subscribed_at': datetime.now().isoformat(),
+                    'expires_at': expires_at.isoformat(),
+                    'auto_renew': False,
+                    'duration_months': duration_months
+                }
+            self.dirty_users.add(user_id)
             
             print(f"User {user_id} subscribed to premium for {duration_months} month(s)")
             
@@ -244,8 +377,11 @@ class TierManager:
                 embed.set_footer(text="Thank you for supporting Chatore! 💙")
                 embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else None)
                 
-                await user.send(embed=embed)
-                print(f"Premium welcome DM sent to user {user_id}")
+                sent = await bot.dispatcher.send(user_route(user), lambda: user.send(embed=embed), priority=PRIORITY_DM)
+                if sent:
+                    print(f"Premium welcome DM sent to user {user_id}")
+                else:
+                    print(f"Premium welcome DM to user {user_id} dropped (outbound queue full)")
                 
         except Exception as e:
             print(f"Error sending premium welcome DM to user {user_id}: {e}")
@@ -256,27 +392,24 @@ class TierManager:
     
     def get_usage_stats(self, user_id: str) -> Dict:
         """Get detailed usage statistics for user"""
-        self.reset_usage_if_needed(user_id)
+        arrivals = self.get_arrivals(user_id)
         
         tier_info = self.get_user_tier_info(user_id)
         usage = self.user_usage.get(user_id, {})
         
-        # Calculate time until reset
-        if usage.get('last_reset'):
-            last_reset = datetime.fromisoformat(usage['last_reset'])
-            reset_time = last_reset + timedelta(hours=12)
-            time_until_reset = reset_time - datetime.now()
-            hours_until_reset = max(0, time_until_reset.total_seconds() / 3600)
-        else:
-            hours_until_reset = 0
+        # With a sliding limit, "reset" is when every used request has been given back
+        quota = self.limiter.limits_for(tier_info['config'])[0]
+        arrival = arrivals.get(quota.name, 0.0)
+        now = time.time()
         
         return {
             'tier': tier_info['tier'],
             'tier_name': tier_info['config']['name'],
-            'current_usage': usage.get('requests_12h', 0),
-            'usage_limit': tier_info['config']['requests_per_12h'],
+            'current_usage': quota.used(arrival, now),
+            'usage_limit': quota.limit,
+            'burst_limit': tier_info['config'].get('requests_per_minute'),
             'context_limit': tier_info['config']['context_limit'],
-            'hours_until_reset': hours_until_reset,
+            'hours_until_reset': quota.refill_after(arrival, now) / 3600,
             'total_requests': usage.get('total_requests', 0),
             'member_since': usage.get('first_request'),
             'expires_at': tier_info.get('expires_at')
@@ -297,7 +430,7 @@ class TierManager:
     def get_tier_stats(self) -> Dict:
         """Get overall tier statistics"""
         total_users = len(self.user_tiers)
-        free_users = sum(1 for info in self.user_tiers.values() if info['tier'] == 'free')
+        free_users = self.running_stats['free_users']
         premium_users = total_users - free_users
         
         return {
@@ -305,4 +438,8 @@ class TierManager:
             'free_users': free_users,
             'premium_users': premium_users,
             'premium_percentage': (premium_users / total_users * 100) if total_users > 0 else 0
-        }
\ No newline at end of file
+        }
+    
+    def check_stats(self, repair: bool = False) -> dict:
+        """Verify the running tier totals against a full scan; returns the mismatches"""
+        return self.running_stats.check(self.user_tiers, repair)
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Tracing - Sampled per-request span trees exported as JSON lines or to an OTLP/HTTP collector
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+
+FLUSH_INTERVAL = 2.0  # seconds between exporter writes
+MAX_PENDING_SPANS = 10000  # finished spans held for export before new traces are dropped
+
+# The span that new child spans attach to (follows the running task across awaits)
+CURRENT_SPAN = contextvars.ContextVar('chatore_current_span', default=None)
+
+class NoopSpan:
+    """Stand-in for unsampled requests; every operation is a no-op"""
+    
+    recording = False
+    
+    def set(self, key: str, value):
+        pass
+    
+    def child(self, name: str, **attributes):
+        return self
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+    
+    def end(self):
+        pass
+
+NOOP_SPAN = NoopSpan()
+
+class Span:
+    """One timed step of a traced request"""
+    
+    recording = True
+    
+    def __init__(self, tracer, name: str, trace_id: str, parent=None, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.finished = parent.finished if parent else []  # Shared by the whole trace, exported with the root
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start_time = time.time()
+        self.started = time.perf_counter()
+        self.token = None
+    
+    def set(self, key: str, value):
+        self.attributes[key] = value
+    
+    def child(self, name: str, **attributes):
+        return Span(self.tracer, name, self.trace_id, self, attributes)
+    
+    def __enter__(self):
+        self.token = CURRENT_SPAN.set(self)
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.status = 'error'
+            self.attributes['error'] = f"{exc_type.__name__}: {exc}"
+        CURRENT_SPAN.reset(self.token)
+        self.end()
+        return False
+    
+    def end(self):
+        duration = time.perf_counter() - self.started
+        self.finished.append({
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': round(duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        })
+        if self.parent is None:
+            self.tracer.export(self.finished)
+
+def current_span():
+    """The span of the request being handled, or a no-op span outside a sampled trace"""
+    return CURRENT_SPAN.get() or NOOP_SPAN
+
+def span(name: str, **attributes):
+    """Child span of the current request (no-op when the request isn't sampled)"""
+    return current_span().child(name, **attributes)
+
+class JsonLinesExporter:
+    """Appends one JSON object per span to a local file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def write(self, lines: str):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    
+    async def export(self, spans: list):
+        lines = ''.join(json.dumps(span_record, default=str) + '\n' for span_record in spans)
+        await asyncio.to_thread(self.write, lines)
+    
+    async def close(self):
+        pass
+
+def to_otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def to_otlp(spans: list, service_name: str = 'chatore') -> dict:
+    """Convert span records to an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    otlp_spans = []
+    for record in spans:
+        start_ns = int(record['start_time'] * 1e9)
+        otlp_span = {
+            'traceId': record['trace_id'],
+            'spanId': record['span_id'],
+            'name': record['name'],
+            'kind': 1,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(start_ns + int(record['duration_ms'] * 1e6)),
+            'attributes': [{'key': key, 'value': to_otlp_value(value)} for key, value in record['attributes'].items()],
+            'status': {'code': 2 if record['status'] == 'error' else 1},
+        }
+        if record['parent_id']:
+            otlp_span['parentSpanId'] = record['parent_id']
+        otlp_spans.append(otlp_span)
+    
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': 'chatore'}, 'spans': otlp_spans}],
+    }]}
+
+class HttpExporter:
+    """Posts batches to an OTLP/HTTP JSON endpoint such as a collector's /v1/traces"""
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.session = None
+    
+    async def export(self, spans: list):
+        import aiohttp
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        async with self.session.post(self.url, json=to_otlp(spans)) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"collector returned HTTP {response.status}")
+    
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+class Tracer:
+    """Starts sampled traces and ships finished ones to the exporter in the background"""
+    
+    def __init__(self, sample_rate: float = 0.0, exporter=None):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.exporter = exporter
+        self.pending = []
+        self.flush_task = None
+        self.traces_started = 0
+        self.spans_exported = 0
+        self.spans_dropped = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+    
+    def start_trace(self, name: str, **attributes):
+        """Root span for a new request; unsampled requests get the shared no-op span"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        self.traces_started += 1
+        return Span(self, name, os.urandom(16).hex(), None, attributes)
+    
+    def export(self, spans: list):
+        """Queue a finished trace for the next flush"""
+        if len(self.pending) + len(spans) > MAX_PENDING_SPANS:
+            self.spans_dropped += len(spans)
+            return
+        self.pending.extend(spans)
+    
+    def start(self):
+        """Start the background flush task (call once the event loop is running)"""
+        if self.enabled and self.flush_task is None:
+            self.flush_task = asyncio.get_running_loop().create_task(self.flush_loop())
+    
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+    
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await self.exporter.export(batch)
+            self.spans_exported += len(batch)
+        except Exception as e:
+            self.spans_dropped += len(batch)
+            print(f"Error exporting traces: {e}")
+    
+    async def close(self):
+        """Stop the flush task and write out whatever is still pending"""
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if self.exporter:
+            await self.flush()
+            await self.exporter.close()
+    
+    def get_stats(self) -> dict:
+        return {
+            'sample_rate': self.sample_rate,
+            'traces_started': self.traces_started,
+            'spans_pending': len(self.pending),
+            'spans_exported': self.spans_exported,
+            'spans_dropped': self.spans_dropped,
+        }
+
+def create_tracer(data_dir: str = "") -> Tracer:
+    """Build the tracer from TRACE_SAMPLE_RATE, TRACE_EXPORTER (file or http), TRACE_FILE and TRACE_ENDPOINT"""
+    try:
+        sample_rate = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    except ValueError:
+        print("⚠️ Invalid TRACE_SAMPLE_RATE, tracing disabled")
+        sample_rate = 0.0
+    
+    if sample_rate <= 0:
+        return Tracer()
+    
+    exporter_name = os.getenv('TRACE_EXPORTER', 'file').strip().lower()
+    if exporter_name == 'http':
+        exporter = HttpExporter(os.getenv('TRACE_ENDPOINT', 'http://localhost:4318/v1/traces'))
+    else:
+        if exporter_name != 'file':
+            print(f"⚠️ Unknown TRACE_EXPORTER '{exporter_name}', writing traces to a file")
+        exporter = JsonLinesExporter(os.path.join(data_dir, os.getenv('TRACE_FILE', 'traces.jsonl')))
+    return Tracer(sample_rate, exporter)
@@ -0,0 +1,197 @@
+"""
+Usage Time Series - Gemini request counts, latencies and tokens per minute, hour and day in fixed-size ring buffers
+"""
+
+import array
+import asyncio
+import json
+import os
+import time
+
+# Values summed (or maxed) into every bucket
+FIELDS = ('requests', 'errors', 'latency_ms_sum', 'latency_ms_max', 'prompt_tokens', 'output_tokens')
+FLOAT_FIELDS = ('latency_ms_sum', 'latency_ms_max')
+
+# Bucket width in seconds and how many buckets each resolution keeps
+RESOLUTIONS = {
+    'minute': (60, 24 * 60),  # last 24 hours, memory only
+    'hour': (3600, 30 * 24),  # last 30 days, saved to disk
+    'day': (86400, 365),  # last year, saved to disk
+}
+PERSISTED_RESOLUTIONS = ('hour', 'day')
+SAVE_INTERVAL = 300  # seconds between rollup saves
+
+class RingSeries:
+    """
+    One resolution: a column per field, one slot per bucket. A slot is reused when its bucket
+    comes round again, so memory is fixed by the slot count however long the bot runs.
+    """
+    
+    def __init__(self, step: int, slots: int):
+        self.step = step
+        self.slots = slots
+        self.buckets = array.array('q', [-1]) * slots  # bucket number each slot currently holds
+        self.columns = {
+            field: array.array('d' if field in FLOAT_FIELDS else 'q', [0]) * slots
+            for field in FIELDS
+        }
+    
+    def slot(self, bucket: int) -> int:
+        """Index for a bucket, cleared first if it still holds an older one"""
+        index = bucket % self.slots
+        if self.buckets[index] != bucket:
+            self.buckets[index] = bucket
+            for column in self.columns.values():
+                column[index] = 0
+        return index
+    
+    def add(self, now: float, latency_ms: float, prompt_tokens: int, output_tokens: int, error: bool):
+        index = self.slot(int(now // self.step))
+        columns = self.columns
+        columns['requests'][index] += 1
+        columns['errors'][index] += error
+        columns['latency_ms_sum'][index] += latency_ms
+        if latency_ms > columns['latency_ms_max'][index]:
+            columns['latency_ms_max'][index] = latency_ms
+        columns['prompt_tokens'][index] += prompt_tokens
+        columns['output_tokens'][index] += output_tokens
+    
+    def points(self, count: int, now: float) -> list:
+        """The last `count` buckets, oldest first; buckets with no requests are zero"""
+        current = int(now // self.step)
+        points = []
+        for bucket in range(current - min(count, self.slots) + 1, current + 1):
+            index = bucket % self.slots
+            point = {'start': bucket * self.step}
+            for field, column in self.columns.items():
+                point[field] = column[index] if self.buckets[index] == bucket else 0
+            points.append(point)
+        return points
+    
+    def to_dict(self) -> dict:
+        """Occupied buckets only, as {bucket: [field values]}"""
+        return {
+            'step': self.step,
+            'buckets': {
+                str(bucket): [self.columns[field][index] for field in FIELDS]
+                for index, bucket in enumerate(self.buckets) if bucket >= 0
+            }
+        }
+    
+    def load_dict(self, data: dict, now: float):
+        """Restore saved buckets that still fall inside this series' window"""
+        if data.get('step') != self.step:
+            return
+        oldest = int(now // self.step) - self.slots + 1
+        for bucket, values in data.get('buckets', {}).items():
+            bucket = int(bucket)
+            if bucket < oldest or len(values) != len(FIELDS):
+                continue
+            index = self.slot(bucket)
+            for field, value in zip(FIELDS, values):
+                self.columns[field][index] = value
+
+class UsageTimeSeries:
+    """Records every Gemini request at each resolution; hourly and daily rollups survive restarts"""
+    
+    def __init__(self, path: str = None):
+        self.path = path  # None keeps everything in memory
+        self.series = {name: RingSeries(step, slots) for name, (step, slots) in RESOLUTIONS.items()}
+        self.dirty = False
+        self.save_task = None
+    
+    def record(self, latency: float, prompt_tokens: int = 0, output_tokens: int = 0, error: bool = False, now: float = None):
+        """Add one request (latency in seconds) to the current minute, hour and day"""
+        now = time.time() if now is None else now
+        latency_ms = latency * 1000
+        for series in self.series.values():
+            series.add(now, latency_ms, prompt_tokens, output_tokens, error)
+        self.dirty = True
+    
+    def query(self, resolution: str = 'minute', points: int = 60, now: float = None) -> list:
+        """Per-bucket values for the last `points` buckets, with the average latency filled in"""
+        if resolution not in self.series:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(RESOLUTIONS)}")
+        now = time.time() if now is None else now
+        result = self.series[resolution].points(max(1, points), now)
+        for point in result:
+            point['latency_ms_avg'] = point['latency_ms_sum'] / point['requests'] if point['requests'] else 0.0
+        return result
+    
+    @staticmethod
+    def summarize(points: list) -> dict:
+        """Totals over a query result"""
+        requests = sum(point['requests'] for point in points)
+        latency_sum = sum(point['latency_ms_sum'] for point in points)
+        return {
+            'requests': requests,
+            'errors': sum(point['errors'] for point in points),
+            'latency_ms_avg': latency_sum / requests if requests else 0.0,
+            'latency_ms_max': max((point['latency_ms_max'] for point in points), default=0.0),
+            'prompt_tokens': sum(point['prompt_tokens'] for point in points),
+            'output_tokens': sum(point['output_tokens'] for point in points),
+        }
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by the ring buffers (fixed at construction)"""
+        return sum(
+            series.buckets.itemsize * series.slots + sum(column.itemsize * series.slots for column in series.columns.values())
+            for series in self.series.values()
+        )
+    
+    def read_file(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def write_file(self, document: dict):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        os.replace(temp_path, self.path)
+    
+    async def load(self):
+        """Restore the saved hourly and daily rollups"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            document = await asyncio.to_thread(self.read_file)
+            now = time.time()
+            for name in PERSISTED_RESOLUTIONS:
+                if name in document:
+                    self.series[name].load_dict(document[name], now)
+        except Exception as e:
+            print(f"Error loading usage rollups: {e}")
+    
+    async def save(self):
+        """Write the hourly and daily rollups if anything was recorded since the last save"""
+        if not self.path or not self.dirty:
+            return
+        self.dirty = False
+        document = {name: self.series[name].to_dict() for name in PERSISTED_RESOLUTIONS}
+        try:
+            await asyncio.to_thread(self.write_file, document)
+        except Exception as e:
+            self.dirty = True
+            print(f"Error saving usage rollups: {e}")
+    
+    def start(self):
+        """Start the periodic save task (call once the event loop is running)"""
+        if self.path and self.save_task is None:
+            self.save_task = asyncio.get_running_loop().create_task(self.save_loop())
+    
+    async def save_loop(self):
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            await self.save()
+    
+    async def close(self):
+        """Stop the save task and write out the latest rollups"""
+        if self.save_task:
+            self.save_task.cancel()
+            self.save_task = None
+        await self.save()
+
+def create_usage_series(data_dir: str = "") -> UsageTimeSeries:
+    """USAGE_FILE names the rollup file in the process data directory (empty keeps usage in memory only)"""
+    file_name = os.getenv('USAGE_FILE', 'usage_rollups.json').strip()
+    return UsageTimeSeries(os.path.join(data_dir, file_name) if file_name else None)
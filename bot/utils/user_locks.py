@@ -0,0 +1,28 @@
+"""
+User Locks - One asyncio lock per user so a user's messages change their state one at a time
+"""
+
+import asyncio
+import weakref
+
+class UserLocks:
+    """
+    Locks created on first use and held only weakly: while a handler holds or waits on a user's
+    lock it stays in the table, and once the last one lets go it is garbage collected, so idle
+    users cost nothing. Different users never share a lock and run fully in parallel.
+    """
+    
+    def __init__(self):
+        self.locks = weakref.WeakValueDictionary()  # user_id -> asyncio.Lock
+    
+    def get(self, user_id: str) -> asyncio.Lock:
+        """The user's lock; callers must keep a reference to it until they release it"""
+        lock = self.locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.locks[user_id] = lock
+        return lock
+    
+    def __len__(self) -> int:
+        """Users with a handler currently holding or waiting on their lock"""
+        return len(self.locks)
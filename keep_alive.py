@@ -1,32 +1,92 @@
 """
-Keep Alive Server - Prevents bot from sleeping on free hosting services
+Keep Alive Server - Health, readiness, metrics and usage endpoints served on the bot's own event loop
 """
 
-from flask import Flask
-from threading import Thread
+import math
 import time
+from aiohttp import web
 
-app = Flask('')
+from bot.utils.metrics import REGISTRY
 
-@app.route('/')
-def home():
-    return """
+DEFAULT_PORT = 8080
+
+async def home(request):
+    return web.Response(text="""
     <h1>🍽️ Chatore Discord Bot</h1>
     <p>Bot is running successfully!</p>
     <p>Status: ✅ Online</p>
     <p>Powered by Gemini 2.5 Flash</p>
-    """
+    """, content_type='text/html')
+
+def get_latency(bot):
+    """Gateway heartbeat latency in seconds (None until the first heartbeat)"""
+    latency = bot.latency
+    return None if latency is None or math.isnan(latency) or math.isinf(latency) else latency
+
+def is_gateway_connected(bot) -> bool:
+    return bot.is_ready() and not bot.is_closed()
+
+async def health(request):
+    """Live bot state; 200 unless the bot is shutting down (a reconnecting gateway is reported, not fatal)"""
+    bot = request.app['bot']
+    connected = is_gateway_connected(bot)
+    latency = get_latency(bot)
+    last_generation = bot.last_generation_at
+    
+    body = {
+        "status": "healthy" if connected else "degraded",
+        "bot": "chatore",
+        "version": "1.0",
+        "gateway_connected": connected,
+        "latency_ms": round(latency * 1000, 1) if latency is not None else None,
+        "guilds": len(bot.guilds),
+        "shards": bot.shard_plan.describe(),
+        "last_generation_at": last_generation,
+        "seconds_since_last_generation": round(time.time() - last_generation, 1) if last_generation else None,
+        "loop_lag_p99_ms": round(bot.loop_monitor.get_percentiles()['p99'] * 1000, 1),
+    }
+    return web.json_response(body, status=503 if bot.is_closed() else 200)
+
+async def ready(request):
+    """200 once state is loaded and the gateway is ready to handle messages"""
+    bot = request.app['bot']
+    if is_gateway_connected(bot):
+        return web.json_response({"ready": True})
+    return web.json_response({"ready": False}, status=503)
+
+async def metrics(request):
+    """Every registered metric in Prometheus text format"""
+    return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8')
 
-@app.route('/health')
-def health():
-    return {"status": "healthy", "bot": "chatore", "version": "1.0"}
+async def usage(request):
+    """Gemini usage per bucket: /usage?resolution=minute|hour|day&points=60"""
+    bot = request.app['bot']
+    resolution = request.query.get('resolution', 'minute')
+    try:
+        points = bot.usage_series.query(resolution, int(request.query.get('points', '60')))
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({
+        "resolution": resolution,
+        "totals": bot.usage_series.summarize(points),
+        "points": points,
+    })
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+def create_app(bot) -> web.Application:
+    app = web.Application()
+    app['bot'] = bot
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health)
+    app.router.add_get('/ready', ready)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/usage', usage)
+    return app
 
-def keep_alive():
-    """Start the keep-alive server in a separate thread"""
-    t = Thread(target=run)
-    t.daemon = True
-    t.start()
-    print("🌐 Keep-alive server started on port 8080")
\ No newline at end of file
+async def keep_alive(bot, port: int = DEFAULT_PORT) -> web.AppRunner:
+    """Start the keep-alive server on the running event loop (no extra threads)"""
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host='0.0.0.0', port=port)
+    await site.start()
+    print(f"🌐 Keep-alive server started on port {port}")
+    return runner
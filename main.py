@@ -16,7 +16,8 @@ if sys.platform == 'win32':
 # Load environment variables
 load_dotenv()
 
-from bot.luna_bot import LunaBot
+from bot.luna_bot import create_bot
+from bot.utils.sharding import ShardPlan
 
 def main():
     """Main entry point for Chatore bot"""
@@ -33,26 +34,54 @@ def main():
         print("💡 You can also add GEMINI_API_KEY_2 and GEMINI_API_KEY_3 for fallback")
         return
     
-    # Start keep-alive server for hosting services (optional)
+    # Work out the gateway shard layout (SHARD_COUNT / SHARD_PROCESSES)
     try:
-        from keep_alive import keep_alive
-        keep_alive()
-        print("🌐 Keep-alive server started for hosting compatibility")
-    except ImportError:
-        print("ℹ️ Keep-alive server not available (running locally)")
-    except Exception as e:
-        print(f"⚠️ Keep-alive server failed to start: {e}")
+        shard_plan = ShardPlan.from_env()
+    except ValueError as e:
+        print(f"❌ Invalid sharding configuration: {e}")
+        return
     
-    # Initialize and run the bot
-    bot = LunaBot()
+    if shard_plan.is_multi_process:
+        run_shard_processes(discord_token, shard_plan)
+    else:
+        run_bot(discord_token, shard_plan)
+
+def run_bot(discord_token, shard_plan):
+    """Initialize and run the bot for one shard plan"""
+    bot = create_bot(shard_plan)
     
     try:
-        print("🍽️ Starting Chatore...")
+        print(f"🍽️ Starting Chatore ({shard_plan.describe()})...")
         bot.run(discord_token)
     except KeyboardInterrupt:
         print("\n👋 Chatore shutting down gracefully...")
     except Exception as e:
         print(f"❌ Error starting Chatore: {e}")
 
+def run_shard_processes(discord_token, shard_plan):
+    """Run each group of shards in its own process so a busy process can't stall heartbeats for every guild"""
+    import multiprocessing
+    
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for process_index in range(shard_plan.process_count):
+        process = context.Process(
+            target=run_bot,
+            args=(discord_token, shard_plan.for_process(process_index)),
+            name=f"chatore-shards-{process_index}"
+        )
+        process.start()
+        processes.append(process)
+    
+    print(f"🧩 Started {len(processes)} shard processes for {shard_plan.shard_count} shards")
+    
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n👋 Chatore shutting down gracefully...")
+        for process in processes:
+            process.join(timeout=10)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
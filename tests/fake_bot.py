@@ -0,0 +1,149 @@
+"""
+Fake Discord and Gemini - Offline stand-ins for LunaBot's gateway objects and model, shared by the tests and the load test
+"""
+
+import itertools
+import random
+import threading
+import time
+
+from bot.luna_bot import LunaBot
+from bot.utils.sharding import ShardPlan
+
+REPLY_WORDS = ("yaar that is honestly a solid take but the loop lag graphs say otherwise "
+               "bro gaming tonight sounds fun no cap lol").split()
+
+class FakeGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGemini:
+    """Deterministic stand-in for GenerativeModel: fixed latency plus jitter, optional error rate"""
+    
+    def __init__(self, latency: float, jitter: float, error_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.calls = itertools.count()
+        self.errors = 0
+        self.lock = threading.Lock()
+    
+    def generate_content(self, prompt):
+        """Called from asyncio.to_thread, like the real blocking SDK call"""
+        rng = random.Random(self.seed * 1_000_003 + next(self.calls))
+        time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        if rng.random() < self.error_rate:
+            with self.lock:
+                self.errors += 1
+            raise RuntimeError("fake Gemini error (429 Resource exhausted)")
+        return FakeGeminiResponse(' '.join(rng.choice(REPLY_WORDS) for _ in range(rng.randint(12, 20))))
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = bot
+        self.avatar = None
+        self.dm_received = None  # Set by the harness to time /ask answers
+    
+    def mentioned_in(self, message) -> bool:
+        return self in message.mentions
+    
+    async def send(self, *args, **kwargs):
+        if self.dm_received and not self.dm_received.done():
+            self.dm_received.set_result(time.perf_counter())
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, traceback):
+        return False
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+    
+    def typing(self):
+        return FakeTyping()
+    
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+class FakeMessage:
+    """Just enough of discord.Message for on_message, process_commands and handle_ai_response"""
+    
+    ids = itertools.count(1)
+    
+    def __init__(self, author: FakeUser, channel: FakeChannel, content: str, mentions: list):
+        self.id = next(self.ids)
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.mentions = mentions
+        self.mention_everyone = False
+        self.guild = None
+        self._state = None  # commands.Context reads this
+        self.replied_at = None
+    
+    async def reply(self, *args, **kwargs):
+        if self.replied_at is None:
+            self.replied_at = time.perf_counter()
+
+class FakeInteractionResponse:
+    def __init__(self):
+        self.done = False
+    
+    def is_done(self) -> bool:
+        return self.done
+    
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+    
+    async def defer(self, *args, **kwargs):
+        self.done = True
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser):
+        self.user = user
+        self.guild = None
+        self.response = FakeInteractionResponse()
+        self.followup = FakeFollowup()
+        self.extras = {}
+    
+    async def edit_original_response(self, *args, **kwargs):
+        pass
+    
+    async def delete_original_response(self):
+        pass
+
+class FakeLunaBot(LunaBot):
+    """LunaBot with a fake bot user and Gemini model, and no network-facing extras"""
+    
+    def __init__(self, fake_gemini: FakeGemini, shard_plan: ShardPlan = None, **options):
+        super().__init__(shard_plan or ShardPlan(), **options)
+        self.fake_user = FakeUser(999_000_000_000, "Chatore", bot=True)
+        self.model = fake_gemini
+        self.fake_gemini = fake_gemini
+    
+    @property
+    def user(self):
+        return self.fake_user
+    
+    async def start_keep_alive(self):
+        pass
+    
+    async def switch_api_key(self):
+        """Rotate the key index like the real bot, but keep the fake model"""
+        if len(self.api_keys) <= 1:
+            return False
+        self.current_api_key_index = (self.current_api_key_index + 1) % len(self.api_keys)
+        return True
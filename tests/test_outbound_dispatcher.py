@@ -0,0 +1,70 @@
+"""
+Outbound Dispatcher Tests - Priority order, drops and shutdown
+"""
+
+import asyncio
+
+import pytest
+
+from bot.utils.outbound_dispatcher import OutboundDispatcher, PRIORITY_REPLY, PRIORITY_GIF
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_replies_go_before_gifs():
+    async def scenario():
+        dispatcher = OutboundDispatcher(max_concurrent_sends=1)
+        dispatcher.start()
+        order = []
+        
+        async def record(name):
+            order.append(name)
+        
+        await asyncio.gather(
+            dispatcher.send('channel:1', lambda: record('gif'), PRIORITY_GIF),
+            dispatcher.send('channel:2', lambda: record('reply'), PRIORITY_REPLY),
+        )
+        await dispatcher.close()
+        return order
+    
+    assert run(scenario()) == ['reply', 'gif']
+
+def test_full_queue_drops_low_priority_sends():
+    async def scenario():
+        dispatcher = OutboundDispatcher(max_queue_size=1)
+        dispatcher.start()
+        
+        sent = []
+        
+        async def record():
+            sent.append(True)
+        
+        # Queued without waiting, so the second send finds the queue full
+        await dispatcher.send('channel:1', record, PRIORITY_GIF, wait=False)
+        dropped = await dispatcher.send('channel:1', record, PRIORITY_GIF)
+        await asyncio.sleep(0.05)
+        await dispatcher.close()
+        return dropped, len(sent), dispatcher.dropped['gif']
+    
+    assert run(scenario()) == (None, 1, 1)
+
+def test_close_cancels_queued_sends():
+    async def scenario():
+        dispatcher = OutboundDispatcher()
+        dispatcher.start()
+        sent = []
+        
+        async def record():
+            sent.append(True)
+        
+        # The route's bucket holds 5 tokens, so the rest wait in the queue
+        waiters = [asyncio.create_task(dispatcher.send('channel:1', record)) for _ in range(8)]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(dispatcher.close(), timeout=1)
+        results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1)
+        return sent, results, dispatcher.get_stats()
+    
+    sent, results, stats = run(scenario())
+    assert len(sent) == 5
+    assert sum(isinstance(result, asyncio.CancelledError) for result in results) == 3
+    assert stats['queued'] == 0 and stats['dropped']['reply'] == 3
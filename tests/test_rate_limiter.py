@@ -0,0 +1,146 @@
+"""
+Rate Limiter Tests - GCRA bursts, sustained rate and the bound on any window of a limit's period
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from bot.utils.rate_limiter import RateLimit, RateLimiter, GcraLimiter
+from bot.utils.state_backend import MemoryStateBackend, SQLiteStateBackend
+from bot.utils.tier_manager import TierManager
+
+HOUR = 3600
+START = 1_700_000_000.0
+
+def run(coro):
+    return asyncio.run(coro)
+
+def simulate(tier_config, attempts, refund_rate=0.0, seed=0):
+    """Offer requests at the given times; returns (admitted times, limits, arrivals)"""
+    rng = random.Random(seed)
+    limiter = GcraLimiter()
+    limits = limiter.limits_for(tier_config)
+    arrivals = {}
+    admitted = []
+    
+    for now in attempts:
+        if limiter.blocking_limit(arrivals, limits, now) is not None:
+            continue
+        for limit in limits:
+            arrivals[limit.name] = limit.advance(arrivals.get(limit.name, 0.0), now)
+        if rng.random() < refund_rate:
+            for limit in limits:
+                arrivals[limit.name] = limit.advance(arrivals[limit.name], now, -1)
+        else:
+            admitted.append(now)
+    return admitted, limits, arrivals
+
+def random_traffic(seed, days=4):
+    """Bursts of back-to-back messages separated by random gaps"""
+    rng = random.Random(seed)
+    now, attempts = START, []
+    end = now + days * 24 * HOUR
+    while now < end:
+        for _ in range(rng.randint(1, 60)):
+            now += rng.uniform(0.05, 20)
+            attempts.append(now)
+        now += rng.choice((rng.uniform(1, 120), rng.uniform(600, 4 * HOUR)))
+    return attempts
+
+def assert_gcra_bound(admitted, limit: RateLimit):
+    """Between any two admitted requests there are at most limit + elapsed / interval of them"""
+    for first in range(len(admitted)):
+        for last in range(first, min(len(admitted), first + 2 * limit.limit)):
+            allowed = limit.limit + (admitted[last] - admitted[first]) / limit.interval
+            assert last - first + 1 <= allowed + 1e-6, (admitted[first], admitted[last])
+
+def max_in_any_window(admitted, period):
+    most, start = 0, 0
+    for end in range(len(admitted)):
+        while admitted[end] - admitted[start] >= period:
+            start += 1
+        most = max(most, end - start + 1)
+    return most
+
+def test_full_burst_then_one_per_interval():
+    limit = RateLimit('window', 40, 12 * HOUR)
+    assert limit.tolerance == pytest.approx(39 * limit.interval)
+    
+    # 40 at once fit, the 41st waits exactly one emission interval
+    arrival = 0.0
+    for _ in range(40):
+        assert limit.fits(arrival, START)
+        arrival = limit.advance(arrival, START)
+    assert not limit.fits(arrival, START)
+    assert limit.used(arrival, START) == 40
+    assert limit.retry_after(arrival, START) == pytest.approx(limit.interval)
+    assert limit.refill_after(arrival, START) == pytest.approx(12 * HOUR)
+    assert limit.fits(arrival, START + limit.interval)
+
+def test_sustained_rate_is_the_limit_per_period():
+    # A request every minute for four days gets limit per 12 hours after the first burst
+    attempts = [START + minute * 60 for minute in range(4 * 24 * 60)]
+    admitted, limits, _ = simulate({'requests_per_12h': 40}, attempts)
+    
+    assert len(admitted) <= 40 + 8 * 40
+    assert max_in_any_window(admitted, 12 * HOUR) <= 2 * 40 - 1
+    assert_gcra_bound(admitted, limits[0])
+
+@pytest.mark.parametrize('seed', range(10))
+def test_random_traffic_stays_within_the_gcra_bound(seed):
+    tier_config = {'requests_per_12h': 40, 'requests_per_minute': 6}
+    admitted, limits, arrivals = simulate(tier_config, random_traffic(seed), refund_rate=0.1, seed=seed)
+    
+    assert len(admitted) > 100
+    for limit in limits:
+        assert_gcra_bound(admitted, limit)
+        assert max_in_any_window(admitted, limit.period) <= 2 * limit.limit - 1
+    # O(1) state: one arrival time per limit, however many requests were made
+    assert sorted(arrivals) == ['burst', 'window'] and all(isinstance(value, float) for value in arrivals.values())
+
+def test_tier_manager_reserve_and_refund():
+    async def scenario():
+        manager = TierManager(state=MemoryStateBackend())
+        reservations = [await manager.reserve_request('1') for _ in range(7)]
+        await manager.refund_usage(reservations[0][0])
+        after_refund, _ = await manager.reserve_request('1')
+        return reservations, after_refund, manager.get_usage_stats('1')
+    
+    reservations, after_refund, stats = run(scenario())
+    assert all(reservation is not None for reservation, _ in reservations[:6])
+    refused, usage_info = reservations[6]
+    assert refused is None
+    # 6 per minute: the next request is one 10 second interval away
+    assert usage_info['limited_by'] == 'burst' and 9 < usage_info['retry_after'] <= 10
+    assert after_refund is not None
+    assert stats['current_usage'] == 6
+
+@pytest.mark.parametrize('backend', ('memory', 'sqlite'))
+def test_concurrent_reservations_never_exceed_the_limit(backend, tmp_path):
+    async def scenario():
+        if backend == 'sqlite':
+            # Two managers on one database, like two bot processes
+            states = [SQLiteStateBackend(str(tmp_path / 'state.db')) for _ in range(2)]
+        else:
+            states = [MemoryStateBackend()]
+        managers = [TierManager(state=state) for state in states]
+        results = await asyncio.gather(*(
+            managers[index % len(managers)].reserve_request('1') for index in range(30)
+        ))
+        for state in states:
+            await state.close()
+        return [reservation for reservation, _ in results]
+    
+    reservations = run(scenario())
+    # The free tier's burst limit is 6 per minute
+    assert sum(reservation is not None for reservation in reservations) == 6
+
+def test_incomplete_limiter_fails_when_created():
+    class Incomplete(RateLimiter):
+        def limits_for(self, tier_config):
+            return []
+    
+    with pytest.raises(TypeError):
+        Incomplete()
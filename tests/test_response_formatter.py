@@ -0,0 +1,87 @@
+"""
+Response Formatter Tests - Randomized property checks for format_chat_response
+"""
+
+import random
+
+import pytest
+
+from bot.utils.response_formatter import format_chat_response, MAX_RESPONSE_LENGTH
+
+WORDS = ("yaar bro lol honestly gaming tonight solid take no cap the loop graphs say otherwise "
+         "😂 🎮 ✈️ Minecraft shaders peak chill ```python``` print('hi') a I ok").split()
+SEPARATORS = (' ', ' ', ' ', '  ', '\t', '\n', '\n\n', '\\n', ' \\n ', '\r\n')
+
+def normalize(text):
+    """The words format_chat_response works from"""
+    return text.replace('\\n', ' ').split()
+
+def random_response(rng):
+    """A model reply: mostly short, sometimes rambling, occasionally one very long word"""
+    parts = []
+    for _ in range(rng.choice((1, 3, 8, 15, 16, 25, 40, 80))):
+        roll = rng.random()
+        if roll < 0.02:
+            word = 'a' * rng.randint(100, 300)
+        elif roll < 0.1:
+            word = ''.join(rng.choice('abcdefghij') for _ in range(rng.randint(10, 40)))
+        else:
+            word = rng.choice(WORDS)
+        parts.append(word)
+        parts.append(rng.choice(SEPARATORS))
+    return rng.choice(('', ' ', '\n')) + ''.join(parts)
+
+def check_formatted(response, formatted, max_length):
+    words = normalize(response)
+    
+    assert len(formatted) <= max_length
+    assert formatted.count('\n') <= 1
+    assert formatted == formatted.strip()
+    assert '  ' not in formatted and '\t' not in formatted
+    
+    if formatted.split() == words:
+        return  # Nothing dropped
+    
+    # Truncated: the kept words are a prefix of the reply, followed by "..."
+    assert formatted.endswith('...')
+    kept = formatted[:-3].split()
+    if len(kept) == 1 and len(words[0]) > len(kept[0]) and words[0].startswith(kept[0]):
+        # A first word longer than the whole limit is the only thing cut mid-word
+        assert len(words[0]) + 3 > max_length
+        return
+    assert kept == words[:len(kept)]
+    # As many words as fit were kept
+    assert len(' '.join(words[:len(kept) + 1])) + 3 > max_length
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_replies_keep_the_contract(seed):
+    rng = random.Random(seed)
+    for max_length in (MAX_RESPONSE_LENGTH, 80, 200):
+        for _ in range(10):
+            response = random_response(rng)
+            check_formatted(response, format_chat_response(response, max_length), max_length)
+
+def test_empty_and_whitespace_only():
+    assert format_chat_response('') == ''
+    assert format_chat_response(' \n\t \\n ') == ''
+
+def test_short_reply_collapses_whitespace():
+    assert format_chat_response('  lol   fair\nenough \\n 😂 ') == 'lol fair enough 😂'
+
+def test_long_reply_splits_into_two_lines():
+    response = ' '.join(['word'] * 20)
+    formatted = format_chat_response(response)
+    first, second = formatted.split('\n')
+    assert formatted.replace('\n', ' ') == response
+    assert len(first) <= 80 and second
+
+def test_truncates_at_word_boundary():
+    response = ' '.join(f"w{n:03d}" for n in range(60))
+    formatted = format_chat_response(response)
+    assert len(formatted) <= MAX_RESPONSE_LENGTH
+    assert formatted.endswith('...')
+    assert formatted[:-3].split() == response.split()[:len(formatted[:-3].split())]
+
+def test_single_oversized_word_is_cut():
+    formatted = format_chat_response('x' * 500)
+    assert formatted == 'x' * (MAX_RESPONSE_LENGTH - 3) + '...'
@@ -0,0 +1,128 @@
+"""
+Sharding Tests - Shard layout checks and a local multi-process run behind a fake gateway
+"""
+
+import asyncio
+import multiprocessing
+
+import pytest
+
+from bot.utils.sharding import ShardPlan
+
+SHARD_COUNT = 4
+PROCESS_COUNT = 2
+FREE_USER = 10_001
+PREMIUM_USER = 10_002
+
+def test_shards_are_dealt_round_robin():
+    plan = ShardPlan(SHARD_COUNT, PROCESS_COUNT, state_backend='sqlite')
+    assert [plan.for_process(n).shard_ids for n in range(PROCESS_COUNT)] == [[0, 2], [1, 3]]
+    assert [plan.process_for_guild(shard << 22) for shard in range(SHARD_COUNT)] == [0, 1, 0, 1]
+
+@pytest.mark.parametrize('backend', ('json', 'memory'))
+def test_multi_process_needs_a_shared_backend(backend):
+    with pytest.raises(ValueError, match='shared STATE_BACKEND'):
+        ShardPlan(SHARD_COUNT, PROCESS_COUNT, state_backend=backend)
+
+def test_single_process_keeps_any_backend():
+    assert ShardPlan('auto', 1, state_backend='json').is_sharded
+
+def test_from_env_reads_the_backend(monkeypatch):
+    monkeypatch.setenv('SHARD_COUNT', str(SHARD_COUNT))
+    monkeypatch.setenv('SHARD_PROCESSES', str(PROCESS_COUNT))
+    monkeypatch.setenv('STATE_BACKEND', 'json')
+    with pytest.raises(ValueError):
+        ShardPlan.from_env()
+    monkeypatch.setenv('STATE_BACKEND', 'sqlite')
+    assert ShardPlan.from_env().for_process(1).state_backend == 'sqlite'
+
+def gateway_events():
+    """(guild_id, user_id) for every message, spread over guilds on all four shards"""
+    events = [((n % SHARD_COUNT) << 22, FREE_USER) for n in range(10)]
+    events += [((n % SHARD_COUNT) << 22, PREMIUM_USER) for n in range(20)]
+    return events
+
+def run_shard_process(plan, events, onboarded, results):
+    """One bot process: only the events on its own shards reach it, like a real gateway connection"""
+    results.put((plan.process_index, asyncio.run(handle_events(plan, events, onboarded))))
+
+async def handle_events(plan, events, onboarded):
+    from tests.fake_bot import FakeLunaBot, FakeGemini, FakeUser, FakeChannel, FakeMessage
+    
+    class FakeGuild:
+        def __init__(self, guild_id):
+            self.id = guild_id
+    
+    class RecordingMessage(FakeMessage):
+        async def reply(self, *args, **kwargs):
+            self.reply_kind = 'rate_limited' if 'embed' in kwargs else 'answered'
+    
+    bot = FakeLunaBot(FakeGemini(0, 0, 0, plan.process_index), plan)
+    async with bot:
+        await bot.setup_hook()
+        
+        # Process 0 onboards both users and grants premium; process 1 must see it through the shared backend
+        if plan.is_primary:
+            for user_id in (FREE_USER, PREMIUM_USER):
+                bot.memory.add_user_memory(str(user_id), "Name: shard tester")
+            await bot.memory.save_memory()
+            bot.tier_manager.subscribe_premium(str(PREMIUM_USER))
+            await bot.tier_manager.save_tiers()
+            onboarded.set()
+        await asyncio.to_thread(onboarded.wait, 60)
+        
+        messages = []
+        for guild_id, user_id in events:
+            if plan.process_for_guild(guild_id) != plan.process_index:
+                continue
+            message = RecordingMessage(FakeUser(user_id, f"user{user_id}"), FakeChannel(guild_id + user_id), f"{bot.user.mention} hi", [bot.user])
+            message.guild = FakeGuild(guild_id)
+            messages.append((user_id, message))
+        await asyncio.gather(*(bot.on_message(message) for _, message in messages))
+        
+        answered = {FREE_USER: 0, PREMIUM_USER: 0}
+        for user_id, message in messages:
+            answered[user_id] += getattr(message, 'reply_kind', None) == 'answered'
+        return {
+            'handled': len(messages),
+            'answered': answered,
+            'premium_tier': bot.tier_manager.get_user_tier(str(PREMIUM_USER)),
+        }
+
+def test_processes_share_each_users_state(tmp_path, monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'shard-test-fake-key')
+    monkeypatch.setenv('STATE_BACKEND', 'sqlite')
+    monkeypatch.setenv('STATE_SQLITE_PATH', str(tmp_path / 'state.db'))
+    monkeypatch.setenv('USAGE_FILE', '')
+    monkeypatch.setenv('TRACE_SAMPLE_RATE', '0')
+    monkeypatch.chdir(tmp_path)  # Per-process data directories
+    
+    plan = ShardPlan(SHARD_COUNT, PROCESS_COUNT, state_backend='sqlite')
+    context = multiprocessing.get_context('spawn')
+    onboarded = context.Event()
+    results = context.Queue()
+    events = gateway_events()
+    
+    processes = [
+        context.Process(target=run_shard_process, args=(plan.for_process(n), events, onboarded, results))
+        for n in range(PROCESS_COUNT)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        outcomes = dict(results.get(timeout=60) for _ in processes)
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    
+    assert all(process.exitcode == 0 for process in processes)
+    # Every event went to exactly one process, and both processes got some
+    assert sum(outcome['handled'] for outcome in outcomes.values()) == len(events)
+    assert all(outcome['handled'] for outcome in outcomes.values())
+    # Premium granted through process 0 is seen by process 1
+    assert outcomes[1]['premium_tier'] == 'premium'
+    # One burst limit per user across all processes, not one per process
+    assert sum(outcome['answered'][FREE_USER] for outcome in outcomes.values()) == 6
+    assert sum(outcome['answered'][PREMIUM_USER] for outcome in outcomes.values()) == 15
@@ -0,0 +1,278 @@
+"""
+State Backend Tests - JSON, memory, SQLite and Redis (against a small in-process fake server)
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from bot.utils.state_backend import (
+    StateBackend, JsonFileStateBackend, MemoryStateBackend, SQLiteStateBackend, RedisStateBackend, RedisError
+)
+
+BACKENDS = ('json', 'memory', 'sqlite', 'redis')
+
+class FakeRedisServer:
+    """
+    Just enough of Redis for RedisStateBackend: hashes, string keys with expiry, INCRBY,
+    MULTI/EXEC and the arrival EVAL script (run as its Python equivalent). Replies to a GET of
+    a key starting with 'slow' are delayed so a test can cancel a caller mid-pipeline.
+    """
+    
+    def __init__(self):
+        self.hashes = {}
+        self.strings = {}  # key -> [value, expires_at]
+        self.connections = 0
+        self.server = None
+    
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+    
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    @staticmethod
+    async def read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        assert line.startswith(b'*')
+        command = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            command.append((await reader.readexactly(size + 2))[:-2].decode())
+        return command
+    
+    @classmethod
+    def encode(cls, reply) -> bytes:
+        if isinstance(reply, Exception):
+            return f"-ERR {reply}\r\n".encode()
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, bool) or isinstance(reply, int):
+            return f":{int(reply)}\r\n".encode()
+        if isinstance(reply, list):
+            return f"*{len(reply)}\r\n".encode() + b"".join(cls.encode(item) for item in reply)
+        if reply == 'OK':
+            return b"+OK\r\n"
+        data = str(reply).encode()
+        return f"${len(data)}\r\n".encode() + data + b"\r\n"
+    
+    async def handle(self, reader, writer):
+        self.connections += 1
+        queued = None  # commands inside MULTI
+        try:
+            while True:
+                command = await self.read_command(reader)
+                if command is None:
+                    break
+                name = command[0].upper()
+                if name == 'MULTI':
+                    queued = []
+                    reply = 'OK'
+                elif name == 'EXEC':
+                    reply = [self.run(queued_command) for queued_command in queued]
+                    queued = None
+                elif queued is not None:
+                    queued.append(command)
+                    reply = 'QUEUED'
+                else:
+                    if name == 'GET' and command[1].startswith('slow'):
+                        await asyncio.sleep(1)
+                    reply = self.run(command)
+                writer.write(self.encode(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+    
+    def get_string(self, key):
+        entry = self.strings.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            self.strings.pop(key, None)
+            return None
+        return entry[0]
+    
+    def run(self, command):
+        name, args = command[0].upper(), command[1:]
+        if name in ('AUTH', 'SELECT'):
+            return 'OK'
+        if name == 'HGETALL':
+            return [item for pair in self.hashes.get(args[0], {}).items() for item in pair]
+        if name == 'HGET':
+            return self.hashes.get(args[0], {}).get(args[1])
+        if name == 'HSET':
+            stored = self.hashes.setdefault(args[0], {})
+            pairs = args[1:]
+            for index in range(0, len(pairs), 2):
+                stored[pairs[index]] = pairs[index + 1]
+            return len(pairs) // 2
+        if name == 'HDEL':
+            stored = self.hashes.get(args[0], {})
+            return sum(stored.pop(key, None) is not None for key in args[1:])
+        if name == 'GET':
+            return self.get_string(args[0])
+        if name == 'DEL':
+            return int(self.strings.pop(args[0], None) is not None)
+        if name == 'SET':
+            key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+            if 'NX' in options and self.get_string(key) is not None:
+                return None
+            expires_at = None
+            if 'EX' in options:
+                expires_at = time.time() + int(args[2 + options.index('EX') + 1])
+            if 'PX' in options:
+                expires_at = time.time() + int(args[2 + options.index('PX') + 1]) / 1000
+            self.strings[key] = [value, expires_at]
+            return 'OK'
+        if name == 'INCRBY':
+            value = self.get_string(args[0])
+            if value is not None and not value.lstrip('-').isdigit():
+                return ValueError("value is not an integer or out of range")
+            new_value = int(value or 0) + int(args[1])
+            expires_at = self.strings[args[0]][1] if value is not None else None
+            self.strings[args[0]] = [str(new_value), expires_at]
+            return new_value
+        if name == 'EVAL' and args[0] == RedisStateBackend.ADVANCE_ARRIVAL_SCRIPT:
+            return self.advance_arrival(args[2], *(float(value) for value in args[3:7]))
+        return ValueError(f"unknown command '{command[0]}'")
+    
+    def advance_arrival(self, key, now, interval, tolerance, count):
+        arrival = max(float(self.get_string(key) or 0), now)
+        if tolerance >= 0 and arrival - now > tolerance + 0.000001:
+            return [0, repr(arrival)]
+        advanced = arrival + interval * count
+        advanced = max(advanced, now)
+        if advanced > now:
+            self.strings[key] = [repr(advanced), time.time() + (advanced - now)]
+        else:
+            self.strings.pop(key, None)
+        return [1, repr(advanced)]
+
+@asynccontextmanager
+async def open_backends(name, tmp_path, count=1):
+    """`count` backends of one kind sharing the same store (a fresh JSON/memory backend only reloads what was saved)"""
+    server = None
+    if name == 'redis':
+        server = FakeRedisServer()
+        url = await server.start()
+        backends = [RedisStateBackend(url) for _ in range(count)]
+    elif name == 'sqlite':
+        backends = [SQLiteStateBackend(str(tmp_path / 'state.db')) for _ in range(count)]
+    elif name == 'json':
+        backends = [JsonFileStateBackend(str(tmp_path)) for _ in range(count)]
+    else:
+        backends = [MemoryStateBackend()] * count
+    try:
+        yield backends
+    finally:
+        for backend in backends:
+            await backend.close()
+        if server:
+            await server.close()
+
+def run(coro):
+    return asyncio.run(coro)
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_records_round_trip(name, tmp_path):
+    async def scenario():
+        async with open_backends(name, tmp_path, 2) as (writer, reader):
+            await writer.save({
+                'user_memories': {'1': [{'content': 'likes chess'}], '2': [{'content': 'likes go'}]},
+                'user_tiers': {'1': {'tier': 'premium'}},
+            })
+            await writer.save({'user_memories': {'2': None}})
+            return (
+                await reader.load('user_memories'),
+                await reader.get_records(['user_memories', 'user_tiers', 'user_usage'], '1'),
+            )
+    
+    memories, records = run(scenario())
+    assert memories == {'1': [{'content': 'likes chess'}]}
+    assert records == {'user_memories': [{'content': 'likes chess'}], 'user_tiers': {'tier': 'premium'}, 'user_usage': None}
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_counters(name, tmp_path):
+    async def scenario():
+        async with open_backends(name, tmp_path) as (backend,):
+            values = [await backend.incr('requests') for _ in range(3)]
+            values.append(await backend.incr('requests', 5))
+            values.append(await backend.incr('window', 2, ttl=60))
+            values.append(await backend.incr('window', 1, ttl=60))
+            values.append(await backend.get_counter('requests'))
+            values.append(await backend.get_counter('missing'))
+            return values
+    
+    assert run(scenario()) == [1, 2, 3, 8, 2, 3, 8, 0]
+
+@pytest.mark.parametrize('name', ('memory', 'sqlite', 'redis'))
+def test_concurrent_increments_are_not_lost(name, tmp_path):
+    async def scenario():
+        async with open_backends(name, tmp_path, 2) as backends:
+            await asyncio.gather(*(backend.incr('shared') for backend in backends for _ in range(50)))
+            return await backends[0].get_counter('shared')
+    
+    assert run(scenario()) == 100
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_advance_arrival_limits_and_refunds(name, tmp_path):
+    async def scenario():
+        async with open_backends(name, tmp_path) as (backend,):
+            # 3 per 60s (tolerance of 2 intervals): three requests fit, the fourth is refused and changes nothing
+            fits = [(await backend.advance_arrival('arrival:burst:1', 20.0, 40.0))[0] for _ in range(4)]
+            before = await backend.get_arrival('arrival:burst:1')
+            changed, after = await backend.advance_arrival('arrival:burst:1', 20.0, None, -1)
+            refunded_fits, _ = await backend.advance_arrival('arrival:burst:1', 20.0, 40.0)
+            return fits, before, changed, after, refunded_fits, await backend.get_arrival('arrival:missing')
+    
+    fits, before, changed, after, refunded_fits, missing = run(scenario())
+    assert fits == [True, True, True, False]
+    assert 59 < before - time.time() <= 60
+    assert changed and after == pytest.approx(before - 20.0)
+    assert refunded_fits
+    assert missing == 0.0
+
+def test_incomplete_backend_fails_when_created():
+    class Incomplete(StateBackend):
+        async def load(self, namespace):
+            return {}
+    
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_redis_error_reply_leaves_the_connection_in_sync(tmp_path):
+    async def scenario():
+        async with open_backends('redis', tmp_path) as (backend,):
+            await backend.execute(('SET', 'a', 'first'), ('SET', 'b', 'second'))
+            with pytest.raises(RedisError):
+                await backend.execute(('GET', 'a'), ('NOSUCHCOMMAND',), ('GET', 'b'))
+            # Every reply of the failed pipeline was read, so this gets its own reply, not 'second'
+            return await backend.execute(('GET', 'a'))
+    
+    assert run(scenario()) == ['first']
+
+def test_redis_error_inside_a_transaction_is_raised(tmp_path):
+    async def scenario():
+        async with open_backends('redis', tmp_path) as (backend,):
+            await backend.execute(('SET', 'chatore:counter:text', 'not a number'))
+            with pytest.raises(RedisError):
+                await backend.incr('text', ttl=60)
+            return await backend.incr('fine', ttl=60)
+    
+    assert run(scenario()) == 1
+
+def test_redis_cancelled_call_drops_the_connection(tmp_path):
+    async def scenario():
+        async with open_backends('redis', tmp_path) as (backend,):
+            await backend.execute(('SET', 'slow-key', 'slow'), ('SET', 'other', 'other'))
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(backend.execute(('GET', 'slow-key')), timeout=0.1)
+            # The late 'slow' reply must not be read as the answer to this call
+            return await backend.execute(('GET', 'other'))
+    
+    assert run(scenario()) == ['other']
@@ -0,0 +1,83 @@
+"""
+Text Chunker Tests - Limits, code fences and content on 10k-word answers
+"""
+
+import random
+
+import pytest
+
+from bot.utils.text_chunker import chunk_text, EMBED_DESCRIPTION_LIMIT
+
+WORDS = ("the model returns a long answer with lists code and plenty of detail "
+         "about python async discord embeds limits and rate buckets").split()
+CHUNK_LENGTHS = (EMBED_DESCRIPTION_LIMIT, 3800, 1000, 500, 120)
+
+def build_answer(word_count, seed=0, code_rate=0.0015):
+    """A long answer with sentences, paragraphs and an occasional code block"""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(word_count):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.07:
+            word += '.'
+        elif roll < 0.08:
+            word += '?'
+        elif roll < 0.09:
+            word += '.\n\n'
+        elif roll < 0.09 + code_rate:
+            lines = '\n'.join(f"    total += {n}" for n in range(rng.randint(5, 400)))
+            word += f"\n```python\ndef example():\n    total = 0\n{lines}\n    return total\n```\n"
+        parts.append(word)
+    return ' '.join(parts)
+
+def words(text):
+    """Words with code fences (and the language tag of a reopened fence) taken out"""
+    return text.replace('```python', ' ').replace('```', ' ').split()
+
+def check_chunks(text, chunks, max_length):
+    assert chunks
+    assert all(0 < len(chunk) <= max_length for chunk in chunks), "chunk over limit"
+    assert all(chunk.count('```') % 2 == 0 for chunk in chunks), "unbalanced code fence"
+    assert [word for chunk in chunks for word in words(chunk)] == words(text), "words lost or reordered"
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('max_length', CHUNK_LENGTHS)
+def test_10k_word_answers(seed, max_length):
+    text = build_answer(10_000, seed)
+    check_chunks(text, chunk_text(text, max_length), max_length)
+
+@pytest.mark.parametrize('max_length', (EMBED_DESCRIPTION_LIMIT, 3800, 1000))
+def test_10k_word_prose_breaks_at_sentences(max_length):
+    text = build_answer(10_000, seed=42, code_rate=0)
+    chunks = chunk_text(text, max_length)
+    check_chunks(text, chunks, max_length)
+    # Every chunk but the last ends a sentence or paragraph
+    assert all(chunk.endswith(('.', '?')) for chunk in chunks[:-1])
+
+@pytest.mark.parametrize('max_length', CHUNK_LENGTHS)
+def test_code_block_longer_than_a_chunk(max_length):
+    code = '\n'.join(f"    value_{n} = compute({n}, {n * 2})" for n in range(2000))
+    text = f"Here is the script:\n\n```python\ndef main():\n{code}\n```\n\nThat is all."
+    chunks = chunk_text(text, max_length)
+    check_chunks(text, chunks, max_length)
+    # Split code is closed and reopened with its language so each piece renders on its own
+    assert all(chunk.startswith('```python\n') for chunk in chunks[2:-1])
+    assert all(chunk.endswith('\n```') for chunk in chunks[1:-2])
+
+@pytest.mark.parametrize('max_length', CHUNK_LENGTHS)
+def test_words_without_whitespace(max_length):
+    text = ''.join(random.Random(7).choice('abcdefghijklmnopqrstuvwxyz') for _ in range(60_000))
+    chunks = chunk_text(text, max_length)
+    assert all(0 < len(chunk) <= max_length for chunk in chunks)
+    assert ''.join(chunks) == text
+
+def test_no_whitespace_never_cuts_a_fence():
+    text = 'x' * 117 + '```' + 'y' * 300 + '```'
+    chunks = chunk_text(text, 120)
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert all(chunk.count('```') % 2 == 0 for chunk in chunks)
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("  Just one short answer.  ") == ["Just one short answer."]
+    assert chunk_text("") == []